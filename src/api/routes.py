@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from fastapi.responses import PlainTextResponse, Response
 
-from src.api.v1 import auth, user, question, answer, contact
+from src.api.v1 import admin, auth, user, question, answer, contact
 
 home_router = APIRouter()
 
@@ -17,3 +17,4 @@ api_router.include_router(user.router, tags=["User"], prefix="/user")
 api_router.include_router(question.router, tags=["Question"], prefix="/question")
 api_router.include_router(answer.router, tags=["Answer"], prefix="/answer")
 api_router.include_router(contact.router, tags=["Contact-Us"], prefix="/contact-us")
+api_router.include_router(admin.router, tags=["Admin"], prefix="/admin")
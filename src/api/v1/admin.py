@@ -0,0 +1,43 @@
+from typing import Any
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import Query
+
+from src.db.profiler import query_profiler
+from src.repositories.dependence import get_current_admin
+from src.schemas.common import IGetResponseBase
+
+router = APIRouter()
+
+
+@router.get(
+    "/queries",
+    response_description="Statements taking the most database time and routes over their query budget",
+    response_model=IGetResponseBase[Dict[str, Any]],
+)
+async def get_query_offenders(
+        limit: int = Query(default=20, ge=1, le=100),
+        admin=Depends(get_current_admin),
+) -> IGetResponseBase[Dict[str, Any]]:
+    return IGetResponseBase[Dict[str, Any]](
+        data=query_profiler.worst(limit),
+        meta={
+            "enabled": query_profiler.enabled,
+            "budget": {
+                "queries": query_profiler.max_queries,
+                "seconds": query_profiler.max_seconds,
+                "repeat_threshold": query_profiler.repeat_threshold,
+            },
+        },
+    )
+
+
+@router.delete(
+    "/queries",
+    response_description="Reset the query profile",
+)
+async def reset_query_offenders(admin=Depends(get_current_admin)) -> Dict[str, str]:
+    query_profiler.reset()
+    return {"message": "Query profile reset"}
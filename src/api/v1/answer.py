@@ -1,3 +1,4 @@
+import logging
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -5,9 +6,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
+from src.core.exceptions import NotFoundException
 from src.repositories.answer import AnswersRepository
-from src.schemas.answer import SAnswerRead, SAnswerCreate, SAnswerUpdate
-from src.schemas.common import IGetResponseBase, IPostResponseBase
+from src.repositories.dependence import get_current_admin
+from src.repositories.question import QuestionsRepository, questionnaire_changed
+from src.schemas.answer import (
+    SAnswerBatchUpdate,
+    SAnswerCreate,
+    SAnswerRead,
+    SAnswerUpdate,
+    SAnswerUpsert,
+)
+from src.schemas.common import IGetResponseBase, IPostResponseBase, SBatchDelete, SBatchRequest
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -30,13 +43,97 @@ async def get_answers(
 )
 async def create_answer(
         answer: SAnswerCreate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> IPostResponseBase[SAnswerRead]:
-    answers_repo = AnswersRepository(db=session)
+    answers_repo = AnswersRepository(db=uow.session)
     new_answer = await answers_repo.create(answer)
-    print('\nnew_answer:', new_answer)
+    await uow.commit()
+    logger.debug("Created answer %s", new_answer.id)
+    await questionnaire_changed()
     return IPostResponseBase[SAnswerRead](data=new_answer.dict())
 
+async def check_questions(session: AsyncSession, answers) -> None:
+    question_ids = {answer.question_id for answer in answers if answer.question_id is not None}
+    missing = question_ids - await QuestionsRepository(db=session).existing_ids(question_ids)
+    if missing:
+        raise NotFoundException(f"Questions not found: {sorted(missing)}")
+
+@router.post(
+    "/batch",
+    response_description="Create answers in bulk",
+    response_model=IPostResponseBase[List[SAnswerRead]],
+)
+async def create_answers(
+        batch: SBatchRequest[SAnswerCreate],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SAnswerRead]]:
+    await check_questions(session, batch.items)
+    try:
+        answers = await AnswersRepository(db=session).bulk_create(batch.items)
+    finally:
+        # earlier chunks are committed even if a later one fails
+        await questionnaire_changed()
+    return IPostResponseBase[List[SAnswerRead]](
+        data=[answer.dict() for answer in answers],
+        meta={"count": len(answers)},
+    )
+
+@router.put(
+    "/batch",
+    response_description="Create or replace answers by ID in bulk",
+    response_model=IPostResponseBase[List[SAnswerRead]],
+)
+async def upsert_answers(
+        batch: SBatchRequest[SAnswerUpsert],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SAnswerRead]]:
+    await check_questions(session, batch.items)
+    try:
+        answers = await AnswersRepository(db=session).bulk_upsert(batch.items)
+    finally:
+        await questionnaire_changed()
+    return IPostResponseBase[List[SAnswerRead]](
+        data=[answer.dict() for answer in answers],
+        meta={"count": len(answers)},
+    )
+
+@router.patch(
+    "/batch",
+    response_description="Update answers by ID in bulk",
+    response_model=IPostResponseBase[List[SAnswerRead]],
+)
+async def update_answers(
+        batch: SBatchRequest[SAnswerBatchUpdate],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SAnswerRead]]:
+    await check_questions(session, batch.items)
+    try:
+        answers = await AnswersRepository(db=session).bulk_update(batch.items)
+    finally:
+        await questionnaire_changed()
+    return IPostResponseBase[List[SAnswerRead]](
+        data=[answer.dict() for answer in answers],
+        meta={"count": len(answers)},
+    )
+
+@router.post(
+    "/batch/delete",
+    response_description="Delete answers by ID in bulk",
+)
+async def delete_answers(
+        batch: SBatchDelete,
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> dict:
+    try:
+        deleted = await AnswersRepository(db=session).bulk_delete(batch.ids)
+    finally:
+        await questionnaire_changed()
+    return {"message": "Deleted successfully", "data": deleted}
+
 @router.get(
     "/{id}",
     response_description="Get answer by ID",
@@ -58,11 +155,13 @@ async def get_answer_by_id(
 async def update_answer_by_id(
         id: int,
         answer: SAnswerUpdate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> IPostResponseBase[SAnswerRead]:
-    answers_repo = AnswersRepository(db=session)
+    answers_repo = AnswersRepository(db=uow.session)
     current_answer = await answers_repo.get(id=id)
     updated_answer = await answers_repo.update(obj_current=current_answer, obj_in=answer)
+    await uow.commit()
+    await questionnaire_changed()
     return IPostResponseBase[SAnswerRead](data=updated_answer.dict())
 
 @router.delete(
@@ -71,9 +170,9 @@ async def update_answer_by_id(
 )
 async def delete_answer_by_id(
         id: int,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> None:
-    answers_repo = AnswersRepository(db=session)
+    answers_repo = AnswersRepository(db=uow.session)
     try:
         await answers_repo.delete(id=id)
     except Exception as e:
@@ -81,4 +180,6 @@ async def delete_answer_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    await uow.commit()
+    await questionnaire_changed()
     return None
@@ -10,6 +10,8 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from src.models.user import User
 
 from src.db.session import get_session
+from src.db.uow import UnitOfWork
+from src.db.uow import get_uow
 
 from src.repositories.auth import hash_password
 from src.repositories.user import UserRepository
@@ -40,7 +42,7 @@ async def login_user(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        if not verify_password(user_auth.password, user.password):
+        if not await verify_password(user_auth.password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid password"
@@ -103,9 +105,9 @@ async def refresh_token(
 @router.post("/forget-password", tags=["Auth"], summary="Reset password")
 async def forget_password(
     user_auth: SUserAuth,
-    db: AsyncSession = Depends(get_session)
+    uow: UnitOfWork = Depends(get_uow)
 ):
-    user_repo = UserRepository(db=db)
+    user_repo = UserRepository(db=uow.session)
     user = await user_repo.get(email=user_auth.email)
     if not user:
         raise HTTPException(
@@ -115,10 +117,11 @@ async def forget_password(
 
     copy_user = user.copy()
     if user_auth.password:
-        hashed_password = hash_password(user_auth.password)
+        hashed_password = await hash_password(user_auth.password)
         copy_user.password = hashed_password
 
     await user_repo.update(user, copy_user)
+    await uow.commit()
 
     return {"status": "Password updated successfully"}
 
@@ -126,9 +129,9 @@ async def forget_password(
 @router.post("/reset-password", tags=["Auth"], summary="Reset password")
 async def reset_password(
     user_auth: SUserPassword,
-    db: AsyncSession = Depends(get_session)
+    uow: UnitOfWork = Depends(get_uow)
 ):
-    user_repo = UserRepository(db=db)
+    user_repo = UserRepository(db=uow.session)
 
     user = await user_repo.get(email=user_auth.email)
     if not user:
@@ -137,15 +140,16 @@ async def reset_password(
             detail="User not found"
         )
 
-    if not verify_password(user_auth.password, user.password):
+    if not await verify_password(user_auth.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Password is incorrect"
         )
 
-    hashed_password = hash_password(user_auth.new_password)
+    hashed_password = await hash_password(user_auth.new_password)
     user.password = hashed_password
 
     await user_repo.update(user, user)
+    await uow.commit()
 
     return {"status": "Password updated successfully"}
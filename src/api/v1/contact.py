@@ -2,26 +2,25 @@ from fastapi import Form
 from fastapi import File
 from fastapi import APIRouter
 from fastapi import UploadFile
+from pydantic import EmailStr
+from starlette import status
 
-from src.repositories.contact import send_email
+from src.repositories.contact import email_dispatcher
 
 router = APIRouter()
 
 
-@router.post("/")
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
 async def send_email_route(
     body: str = Form(...),
-    email: str = Form(...),
+    email: EmailStr = Form(...),
     file: UploadFile = File(None)
 ):
-    file_content = await file.read() if file else None
-    filename = file.filename if file else None
-
-    send_email(
+    # Queued only: the dispatcher sends it in the background
+    await email_dispatcher.enqueue(
         body=f"From: {email}\n\n{body}",
-        attachment=file_content,
         email=email,
-        filename=filename
+        file=file
     )
 
-    return {"message": "Email sent successfully!"}
+    return {"message": "Email queued for delivery"}
@@ -1,13 +1,27 @@
+import json
+import logging
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from src.core.etag import compute_etag, etag_response
 from src.db.session import get_session
-from src.repositories.question import QuestionsRepository
-from src.schemas.common import IGetResponseBase, IPostResponseBase
-from src.schemas.question import SQuestionRead, SQuestionCreate, SQuestionUpdate
+from src.db.uow import UnitOfWork, get_uow
+from src.repositories.question import QuestionsRepository, questionnaire_cache, questionnaire_changed
+from src.repositories.dependence import get_current_admin
+from src.schemas.common import IGetResponseBase, IPostResponseBase, SBatchDelete, SBatchRequest
+from src.schemas.question import (
+    SQuestionBatchUpdate,
+    SQuestionCreate,
+    SQuestionRead,
+    SQuestionUpdate,
+    SQuestionUpsert,
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,19 +32,22 @@ router = APIRouter()
     response_model=IGetResponseBase[List[SQuestionRead]],
 )
 async def get_questions(
+        request: Request,
         session: AsyncSession = Depends(get_session),
-) -> IGetResponseBase[List[SQuestionRead]]:
-    questions_repo = QuestionsRepository(db=session)
-    questions = await questions_repo.all(sort_field="id", relations=["answers"])
-    # print('\nquestions:', questions)
-    # print('\nquestions:', questions[0].dict())
-
-    # Ensure answers are loaded
-    # for question in questions:
-    #     print(f"Question ID: {question.id}, Answers: {question.answers}")
+) -> Response:
+    # Static content for every new user: serialized once, then served from cache
+    cached = await questionnaire_cache.get("all")
+    if cached is None:
+        questions = await QuestionsRepository(db=session).questionnaire()
+        body = json.dumps(
+            {"message": "Success", "meta": {}, "data": jsonable_encoder(questions)},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        cached = {"body": body, "etag": compute_etag(body)}
+        await questionnaire_cache.set("all", cached)
 
-    # Serialize using Pydantic's from_orm without extra brackets
-    return IGetResponseBase[List[SQuestionRead]](data=[SQuestionRead.from_orm(q) for q in questions])
+    return etag_response(request, cached["body"], cached["etag"])
 
 
 @router.post(
@@ -40,14 +57,93 @@ async def get_questions(
 )
 async def create_question(
         question: SQuestionCreate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> IPostResponseBase[SQuestionRead]:
-    questions_repo = QuestionsRepository(db=session)
+    questions_repo = QuestionsRepository(db=uow.session)
     new_question = await questions_repo.create(question)
-    print('\nnew_question:', new_question)
+    await uow.commit()
+    logger.debug("Created question %s", new_question.id)
+    await questionnaire_changed()
     return IPostResponseBase[SQuestionRead](data=new_question.dict())
 
 
+@router.post(
+    "/batch",
+    response_description="Create questions in bulk",
+    response_model=IPostResponseBase[List[SQuestionRead]],
+)
+async def create_questions(
+        batch: SBatchRequest[SQuestionCreate],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SQuestionRead]]:
+    try:
+        questions = await QuestionsRepository(db=session).bulk_create(batch.items)
+    finally:
+        # earlier chunks are committed even if a later one fails
+        await questionnaire_changed()
+    return IPostResponseBase[List[SQuestionRead]](
+        data=[question.dict() for question in questions],
+        meta={"count": len(questions)},
+    )
+
+
+@router.put(
+    "/batch",
+    response_description="Create or replace questions by ID in bulk",
+    response_model=IPostResponseBase[List[SQuestionRead]],
+)
+async def upsert_questions(
+        batch: SBatchRequest[SQuestionUpsert],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SQuestionRead]]:
+    try:
+        questions = await QuestionsRepository(db=session).bulk_upsert(batch.items)
+    finally:
+        await questionnaire_changed()
+    return IPostResponseBase[List[SQuestionRead]](
+        data=[question.dict() for question in questions],
+        meta={"count": len(questions)},
+    )
+
+
+@router.patch(
+    "/batch",
+    response_description="Update questions by ID in bulk",
+    response_model=IPostResponseBase[List[SQuestionRead]],
+)
+async def update_questions(
+        batch: SBatchRequest[SQuestionBatchUpdate],
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> IPostResponseBase[List[SQuestionRead]]:
+    try:
+        questions = await QuestionsRepository(db=session).bulk_update(batch.items)
+    finally:
+        await questionnaire_changed()
+    return IPostResponseBase[List[SQuestionRead]](
+        data=[question.dict() for question in questions],
+        meta={"count": len(questions)},
+    )
+
+
+@router.post(
+    "/batch/delete",
+    response_description="Delete questions by ID in bulk",
+)
+async def delete_questions(
+        batch: SBatchDelete,
+        session: AsyncSession = Depends(get_session),
+        admin=Depends(get_current_admin),
+) -> dict:
+    try:
+        deleted = await QuestionsRepository(db=session).bulk_delete(batch.ids)
+    finally:
+        await questionnaire_changed()
+    return {"message": "Deleted successfully", "data": deleted}
+
+
 @router.get(
     "/{id}",
     response_description="Get question by ID",
@@ -70,11 +166,13 @@ async def get_question_by_id(
 async def update_question_by_id(
         id: int,
         question: SQuestionUpdate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> IPostResponseBase[SQuestionRead]:
-    questions_repo = QuestionsRepository(db=session)
+    questions_repo = QuestionsRepository(db=uow.session)
     current_question = await questions_repo.get(id=id)
     updated_question = await questions_repo.update(obj_current=current_question, obj_in=question)
+    await uow.commit()
+    await questionnaire_changed()
     return IPostResponseBase[SQuestionRead](data=updated_question.dict())
 
 
@@ -84,9 +182,9 @@ async def update_question_by_id(
 )
 async def delete_question_by_id(
         id: int,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> None:
-    questions_repo = QuestionsRepository(db=session)
+    questions_repo = QuestionsRepository(db=uow.session)
     try:
         await questions_repo.delete(id=id)
     except Exception as e:
@@ -94,4 +192,6 @@ async def delete_question_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    await uow.commit()
+    await questionnaire_changed()
     return None
@@ -1,19 +1,27 @@
 from typing import Any
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Query
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import responses
 from starlette import status
 
 from src.db.session import get_session
-from src.repositories.answer import AnswersRepository
+from src.db.uow import UnitOfWork
+from src.db.uow import get_uow
+from src.models.user import User
 from src.repositories.auth import create_access_token
 from src.repositories.auth import create_refresh_token
 from src.repositories.auth import hash_password
-from src.repositories.question import QuestionsRepository
+from src.repositories.interests import CHILD_LEVELS
+from src.repositories.interests import interest_resolver
 from src.repositories.user import UserRepository
 from src.schemas.common import IGetResponseBase
 from src.schemas.common import IPostResponseBase
@@ -32,74 +40,111 @@ router = APIRouter()
 async def get_users(
     session: AsyncSession = Depends(get_session),
     email: str = None,
-    uuid: str = None
-) -> IGetResponseBase[List[SUserRead]]:
+    uuid: str = None,
+    cursor: str = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    fields: str = Query(default=None, description="Comma-separated fields to return, e.g. id,email,name"),
+    include: str = Query(default=None, description="Comma-separated relations to load, e.g. orders"),
+) -> Any:
+    selected = parse_fields(fields)
+    relations = parse_csv(include)
+
     user_repo = UserRepository(db=session)
-    users = await user_repo.all(
-        relations=[
-            'analytics',
-            'selected_answers',
-            'payments',
-            "children",
-            "subscriptions"
-        ],
+    users, next_cursor = await user_repo.paginate(
+        cursor=cursor,
+        limit=limit,
+        fields=user_columns(selected),
+        relations=relations,
         uuid=uuid,
         email=email
     )
 
-    question_repo = QuestionsRepository(db=session)
-    question = await question_repo.get(
-        question_text="What kind of game themes might your child enjoy?"
-    )
+    interests = {}
+    if wants_interests(selected):
+        # one query for the whole page instead of scanning answers per user
+        interests = await interest_resolver.resolve(session, (user.id for user in users))
 
-    answer_repo = AnswersRepository(db=session)
-    answers = await answer_repo.all(question_id=question.id)
+    return responses.JSONResponse(content=jsonable_encoder(IGetResponseBase[List[Dict[str, Any]]](
+        data=[serialize_user(user, selected, relations, interests) for user in users],
+        meta={"next_cursor": next_cursor}
+    )))
 
-    response_data = []
-    for user in users:
-        user_dict = SUserRead.from_orm(user)
-        response_data.append(user_dict)
 
-        user_dict.subscriptions = user_dict.subscriptions[::-1]
+# not columns: worked out per request from answers and kids_age
+COMPUTED_FIELDS = {"interests", "selected_interests", "child_level"}
 
-        if user.selected_answers:
-            selected_answer = next(
-                (answer for answer in user.selected_answers 
-                 if answer.question_id == question.id),
-                None
-            )
-            if selected_answer:
-                # Check if custom_answer is digit or not
-                if selected_answer.custom_answer.isdigit():
-                    user_dict.interests = [
-                        answer.answer_text 
-                        for answer in answers 
-                        if answer.id == int(selected_answer.custom_answer)
-                    ]
-                else:
-                    list_int = list(
-                        map(
-                            int,
-                            selected_answer.custom_answer.replace(' ', '').split(',')
-                        )
-                    )
-                    user_dict.selected_interests = [
-                        answer.answer_text 
-                        for answer in answers 
-                        if answer.id in list_int
-                    ]
-
-        if user.kids_age:
-            child_levels = {
-                2: "Toddler",
-                3: "PreK1",
-                4: "PreK2",
-                5: "Kindergarten",
-                6: "Grade"
-            }
-            user_dict.child_level = child_levels.get(user.kids_age, "Toddler")
-
-    return IGetResponseBase[List[SUserRead]](data=response_data)
+
+def parse_csv(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """`fields=id,email` -> the names to return, None for all of SUserRead."""
+    names = parse_csv(fields)
+    if not names:
+        return None
+
+    unknown = set(names) - set(SUserRead.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return names
+
+
+def user_columns(selected: Optional[List[str]]) -> Optional[List[str]]:
+    """Columns to load for the requested fields; None loads them all."""
+    if selected is None:
+        return None
+
+    columns = User.__table__.columns
+    names = [name for name in selected if name in columns]
+    if "child_level" in selected and "kids_age" in columns:
+        names.append("kids_age")
+    return names
+
+
+def wants_interests(selected: Optional[List[str]]) -> bool:
+    return selected is None or bool({"interests", "selected_interests"} & set(selected))
+
+
+def serialize_user(
+        user: User,
+        selected: Optional[List[str]],
+        relations: List[str],
+        interests: Dict[int, Tuple[List[str], List[str]]],
+) -> Dict[str, Any]:
+    if selected is None:
+        data = SUserRead.model_validate(user).model_dump()
+        computed = COMPUTED_FIELDS
+    else:
+        data = {name: getattr(user, name, None) for name in selected if name not in COMPUTED_FIELDS}
+        computed = COMPUTED_FIELDS & set(selected)
+
+    user_interests, user_selected_interests = interests.get(user.id, ([], []))
+    if "interests" in computed:
+        data["interests"] = user_interests
+    if "selected_interests" in computed:
+        data["selected_interests"] = user_selected_interests
+    if "child_level" in computed:
+        kids_age = getattr(user, "kids_age", None)
+        data["child_level"] = CHILD_LEVELS.get(kids_age, "Toddler") if kids_age else None
+
+    for relation in relations:
+        related = getattr(user, relation)
+        if isinstance(related, list):
+            data[relation] = [row_to_dict(item) for item in related]
+        else:
+            data[relation] = row_to_dict(related) if related is not None else None
+
+    return data
+
+
+def row_to_dict(obj: Any) -> Dict[str, Any]:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
 
 
 @router.post(
@@ -108,10 +153,10 @@ async def get_users(
 )
 async def create_user(
         user: SUserCreate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> Any:
     try:
-        user_repo = UserRepository(db=session)
+        user_repo = UserRepository(db=uow.session)
 
         existing_user = await user_repo.get(email=user.email)
         if existing_user:
@@ -124,9 +169,11 @@ async def create_user(
             )
 
         if user.password:
-            user.password = hash_password(user.password)
+            user.password = await hash_password(user.password)
 
         new_user = await user_repo.get_or_create(obj_in=user, email=user.email)
+        # the id goes into the tokens
+        await uow.flush()
 
         if new_user.id is None:
             raise HTTPException(
@@ -136,6 +183,7 @@ async def create_user(
 
         access_token = create_access_token({"sub": str(new_user.id)})
         refresh_token = create_refresh_token({"sub": str(new_user.id)})
+        await uow.commit()
 
         return {
             "message": "User created successfully",
@@ -158,7 +206,11 @@ async def create_user(
 async def get_user_by_id(
         id_or_uuid: str,
         session: AsyncSession = Depends(get_session),
-) -> IGetResponseBase[SUserRead]:
+        fields: str = Query(default=None, description="Comma-separated fields to return, e.g. id,email,name"),
+        include: str = Query(default=None, description="Comma-separated relations to load, e.g. orders"),
+) -> Any:
+    selected = parse_fields(fields)
+    relations = parse_csv(include)
     user_repo = UserRepository(db=session)
 
     if id_or_uuid.isdigit():
@@ -167,13 +219,8 @@ async def get_user_by_id(
         filter_params = {'uuid': id_or_uuid}
 
     user = await user_repo.get(
-        relations=[
-            'analytics',
-            'selected_answers',
-            'payments',
-            'children',
-            'subscriptions',
-        ],
+        fields=user_columns(selected),
+        relations=relations,
         **filter_params
     )
     if user is None:
@@ -182,7 +229,13 @@ async def get_user_by_id(
             detail="User not found or has been deleted"
         )
 
-    return IGetResponseBase[SUserRead](data=SUserRead.from_orm(user))
+    interests = {}
+    if wants_interests(selected):
+        interests = await interest_resolver.resolve(session, [user.id])
+
+    return responses.JSONResponse(content=jsonable_encoder(IGetResponseBase[Dict[str, Any]](
+        data=serialize_user(user, selected, relations, interests)
+    )))
 
 
 @router.patch(
@@ -193,9 +246,9 @@ async def get_user_by_id(
 async def update_user_by_id(
         id_or_uuid: str,
         user: SUserUpdate,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> IPostResponseBase[SUserRead]:
-    user_repo = UserRepository(db=session)
+    user_repo = UserRepository(db=uow.session)
 
     if id_or_uuid.isdigit():
         filter_params = {'id': int(id_or_uuid)}
@@ -205,12 +258,13 @@ async def update_user_by_id(
     current_user = await user_repo.get(**filter_params)
 
     if user.password:
-        user.password = hash_password(user.password)
+        user.password = await hash_password(user.password)
 
     updated_user = await user_repo.update(
         obj_current=current_user,
         obj_in=user
     )
+    await uow.commit()
 
     return IPostResponseBase[SUserRead](data=updated_user.dict())
 
@@ -221,9 +275,9 @@ async def update_user_by_id(
 )
 async def delete_user_by_id(
         id_or_uuid: str,
-        session: AsyncSession = Depends(get_session),
+        uow: UnitOfWork = Depends(get_uow),
 ) -> None:
-    user_repo = UserRepository(db=session)
+    user_repo = UserRepository(db=uow.session)
     try:
         if id_or_uuid.isdigit():
             filter_params = {'id': int(id_or_uuid)}
@@ -236,4 +290,5 @@ async def delete_user_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    await uow.commit()
     return None
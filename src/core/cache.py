@@ -0,0 +1,231 @@
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, TypeVar
+
+from fastapi.encoders import jsonable_encoder
+
+from src.interfaces.cache import ICacheBackend
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# generation tokens outlive any entry, so they only expire when unused
+GENERATION_TTL = 7 * 24 * 3600
+
+
+class TTLCache(Generic[T]):
+    """
+    In-process LRU cache with per-entry expiry.
+    Not thread-safe: it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[T]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: T, ttl: Optional[float] = None) -> None:
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InMemoryCacheBackend(ICacheBackend):
+    """Process-local stand-in for a shared backend (tests, single worker)."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self._cache: TTLCache[str] = TTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        self._cache.delete(*keys)
+
+
+class RedisCacheBackend(ICacheBackend):
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("CACHE_URL points to redis, but the redis package is not installed") from exc
+
+        self._redis = aioredis.from_url(url, encoding="utf8", decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+
+def build_backend(url: str) -> Optional[ICacheBackend]:
+    """Shared backend from a CACHE_URL: `memory://`, `redis://...` or empty for none."""
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryCacheBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+
+class TwoLevelCache:
+    """
+    JSON values cached in-process (L1) and, optionally, in a shared
+    backend (L2). A miss in L1 falls through to L2 and repopulates L1.
+    Invalidation drops the key from both levels; other workers keep their
+    L1 copy until it expires, so keep the L1 ttl short.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            ttl: int,
+            maxsize: int,
+            backend: Optional[ICacheBackend] = None,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local: TTLCache[Dict[str, Any]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.local.get(key)
+        if value is not None or self.backend is None:
+            return value
+
+        try:
+            raw = await self.backend.get(self._key(key))
+        except Exception as exc:
+            logger.warning("Cache backend read failed: %s", exc)
+            return None
+
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.local.set(key, value)
+        if self.backend is None:
+            return
+
+        try:
+            await self.backend.set(self._key(key), json.dumps(jsonable_encoder(value)), self.ttl)
+        except Exception as exc:
+            logger.warning("Cache backend write failed: %s", exc)
+
+    async def invalidate(self, *keys: str) -> None:
+        self.local.delete(*keys)
+        if self.backend is None:
+            return
+
+        try:
+            await self.backend.delete(*[self._key(key) for key in keys])
+        except Exception as exc:
+            logger.warning("Cache backend delete failed: %s", exc)
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized responses, one entry per set of query
+    parameters. Every key embeds a generation token, so invalidate() drops
+    all entries at once by switching to a new token. With a shared backend
+    the token is kept there as well and is read on each lookup, so writes
+    on one worker are seen by all of them right away.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            ttl: int,
+            maxsize: int,
+            backend: Optional[ICacheBackend] = None,
+    ) -> None:
+        self.entries = TwoLevelCache(namespace, ttl=ttl, maxsize=maxsize, backend=backend)
+        self.backend = backend
+        self._generation_key = f"{namespace}:generation"
+        self._generation = uuid.uuid4().hex
+
+    async def generation(self) -> str:
+        if self.backend is None:
+            return self._generation
+
+        try:
+            generation = await self.backend.get(self._generation_key)
+            if generation is None:
+                await self.backend.set(self._generation_key, self._generation, GENERATION_TTL)
+                return self._generation
+        except Exception as exc:
+            logger.warning("Cache backend read failed: %s", exc)
+            return self._generation
+
+        self._generation = generation
+        return generation
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.entries.get(f"{await self.generation()}:{key}")
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.entries.set(f"{await self.generation()}:{key}", value)
+
+    def forget(self) -> None:
+        """Drops this worker's entries only, e.g. after another worker called invalidate()."""
+        self._generation = uuid.uuid4().hex
+        self.entries.local.clear()
+
+    async def invalidate(self) -> None:
+        self.forget()
+        if self.backend is None:
+            return
+
+        try:
+            await self.backend.set(self._generation_key, self._generation, GENERATION_TTL)
+        except Exception as exc:
+            logger.warning("Cache backend write failed: %s", exc)
@@ -4,9 +4,22 @@ from typing import Any, List, Optional
 from dotenv import load_dotenv
 from pydantic import AnyHttpUrl, Field, PostgresDsn, field_validator, ValidationInfo
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_url(url: str) -> str:
+    """The same URL with the asyncio driver of its backend."""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Coffee Shop API"
@@ -23,6 +36,7 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = Field(default="5432", env="POSTGRES_PORT")
     POSTGRES_DB: str = Field(default="network-of-coffee-db", env="POSTGRES_DB")
     DATABASE_URL: str = Field(default="", env="DATABASE_URL")
+    POSTGRES_URL: str = Field(default="", env="POSTGRES_URL")
 
     # Security
     SECRET_KEY: str = Field(default="your-secret-key-here", env="SECRET_KEY")
@@ -40,6 +54,15 @@ class Settings(BaseSettings):
     SMTP_PORT: int = Field(default=587, env="SMTP_PORT")
     SMTP_USER: str = Field(default="your-email@gmail.com", env="SMTP_USER")
     SMTP_PASSWORD: str = Field(default="your-password", env="SMTP_PASSWORD")
+    SMTP_STARTTLS: bool = Field(default=True, env="SMTP_STARTTLS")
+    RECIPIENT_EMAIL: str = Field(default="info@coffeeshop.com", env="RECIPIENT_EMAIL")
+
+    # Outbound mail queue for /contact-us
+    EMAIL_QUEUE_SIZE: int = Field(default=100, env="EMAIL_QUEUE_SIZE")
+    EMAIL_BATCH_SIZE: int = Field(default=20, env="EMAIL_BATCH_SIZE")
+    EMAIL_MAX_RETRIES: int = Field(default=5, env="EMAIL_MAX_RETRIES")
+    EMAIL_RETRY_BACKOFF: float = Field(default=2.0, env="EMAIL_RETRY_BACKOFF")
+    EMAIL_SPOOL_DIR: str = Field(default="", env="EMAIL_SPOOL_DIR")
 
     # 60 minutes * 24 hours * 2 days = 2 days
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 15
@@ -47,20 +70,101 @@ class Settings(BaseSettings):
     API_URL: str = Field(default="", env="API_URL")
     API_TOKEN: str = Field(default="", env="API_TOKEN")
     LOG_LEVEL: int = Field(default=logging.INFO, env="LOG_LEVEL")
+    # Log records are buffered and written by a background thread; past
+    # LOG_QUEUE_SIZE pending records new ones are dropped (and counted)
+    LOG_QUEUE_SIZE: int = Field(default=10000, env="LOG_QUEUE_SIZE")
+    LOG_BATCH_SIZE: int = Field(default=256, env="LOG_BATCH_SIZE")
+    # Share of sub-WARNING records kept per logger prefix, "name=rate,..."
+    LOG_SAMPLE_RATES: str = Field(default="src.repositories.sqlalchemy=0.01", env="LOG_SAMPLE_RATES")
+
+    # /metrics: with several workers per host each one writes its metrics
+    # to METRICS_MULTIPROC_DIR every METRICS_FLUSH_INTERVAL seconds, and the
+    # endpoint adds them up; empty to expose the serving worker's only
+    METRICS_MULTIPROC_DIR: str = Field(default="", env="METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL: float = Field(default=5.0, env="METRICS_FLUSH_INTERVAL")
+
+    # Query profiler: a request is flagged when it goes over QUERY_BUDGET_QUERIES
+    # queries or QUERY_BUDGET_SECONDS in the database, or runs one statement
+    # QUERY_REPEAT_THRESHOLD times (N+1); single queries slower than
+    # SLOW_QUERY_SECONDS are logged. Off by default: it fingerprints every
+    # query; at most QUERY_PROFILER_MAX_FINGERPRINTS statements are kept
+    QUERY_PROFILER_ENABLED: bool = Field(default=False, env="QUERY_PROFILER_ENABLED")
+    QUERY_PROFILER_MAX_FINGERPRINTS: int = Field(default=500, env="QUERY_PROFILER_MAX_FINGERPRINTS")
+    QUERY_BUDGET_QUERIES: int = Field(default=20, env="QUERY_BUDGET_QUERIES")
+    QUERY_BUDGET_SECONDS: float = Field(default=0.5, env="QUERY_BUDGET_SECONDS")
+    QUERY_REPEAT_THRESHOLD: int = Field(default=5, env="QUERY_REPEAT_THRESHOLD")
+    SLOW_QUERY_SECONDS: float = Field(default=0.2, env="SLOW_QUERY_SECONDS")
 
     DEBUG: bool = Field(default=True, env="DEBUG")
 
+    # bcrypt runs in its own bounded thread pool
+    PASSWORD_HASH_WORKERS: int = Field(default=2, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_MAX_PENDING: int = Field(default=64, env="PASSWORD_HASH_MAX_PENDING")
+
+    # Chat: per-connection outbox size and what to do when it fills up ("evict" or "drop")
+    CHAT_SEND_QUEUE_SIZE: int = Field(default=100, env="CHAT_SEND_QUEUE_SIZE")
+    CHAT_SLOW_CONSUMER_POLICY: str = Field(default="evict", env="CHAT_SLOW_CONSUMER_POLICY")
+    CHAT_SEND_TIMEOUT: float = Field(default=5.0, env="CHAT_SEND_TIMEOUT")
+    # "memory" reaches only this worker's clients, "postgres" fans out via LISTEN/NOTIFY
+    CHAT_BACKEND: str = Field(default="memory", env="CHAT_BACKEND")
+
+    # Menu snapshot: same backends as chat, used to tell other workers to rebuild
+    # and to drop their product, search and questionnaire caches
+    MENU_BACKEND: str = Field(default="memory", env="MENU_BACKEND")
+
+    # Cache: CACHE_URL is the shared backend (memory:// or redis://), empty for in-process only
+    CACHE_URL: str = Field(default="", env="CACHE_URL")
+    AUTH_CACHE_TTL: int = Field(default=60, env="AUTH_CACHE_TTL")
+    AUTH_CACHE_MAXSIZE: int = Field(default=10000, env="AUTH_CACHE_MAXSIZE")
+    CATALOG_CACHE_TTL: int = Field(default=300, env="CATALOG_CACHE_TTL")
+    CATALOG_CACHE_MAXSIZE: int = Field(default=1024, env="CATALOG_CACHE_MAXSIZE")
+    QUESTIONNAIRE_CACHE_TTL: int = Field(default=3600, env="QUESTIONNAIRE_CACHE_TTL")
+
+    # Connection budget: DB_POOL_SIZE persistent and DB_MAX_CONNECTIONS total
+    # connections are shared by all WEB_CONCURRENCY workers.
     DB_POOL_SIZE: int = Field(default=83, env="DB_POOL_SIZE")
     WEB_CONCURRENCY: int = Field(default=9, env="WEB_CONCURRENCY")
-    MAX_OVERFLOW: int = Field(default=64, env="MAX_OVERFLOW")
+    DB_MAX_CONNECTIONS: int = Field(default=100, env="DB_MAX_CONNECTIONS")
+    DB_POOL_TIMEOUT: int = Field(default=30, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    MAX_OVERFLOW: Optional[int] = None
     POOL_SIZE: Optional[int] = None
 
+    # Read replicas: comma-separated URLs; repository reads go there round-robin
+    DATABASE_REPLICA_URLS: str = Field(default="", env="DATABASE_REPLICA_URLS")
+    REPLICA_HEALTH_CHECK_INTERVAL: float = Field(default=5.0, env="REPLICA_HEALTH_CHECK_INTERVAL")
+    # how long a user who wrote keeps reading from the primary (replication lag)
+    READ_YOUR_WRITES_SECONDS: int = Field(default=5, env="READ_YOUR_WRITES_SECONDS")
+    REPLICA_URLS: List[str] = []
+
     @field_validator("DATABASE_URL", mode="before")
     def build_database_url(cls, v: Optional[str], values: ValidationInfo) -> str:
         if v:
             return v
         return f"postgresql://{values.data.get('POSTGRES_USER')}:{values.data.get('POSTGRES_PASSWORD')}@{values.data.get('POSTGRES_HOST')}:{values.data.get('POSTGRES_PORT')}/{values.data.get('POSTGRES_DB')}"
 
+    @field_validator("POSTGRES_URL", mode="before")
+    def build_async_database_url(cls, v: Optional[str], values: ValidationInfo) -> str:
+        if v:
+            return v
+        # same database as DATABASE_URL, but through an asyncio driver
+        return async_url(values.data.get("DATABASE_URL"))
+
+    @field_validator("REPLICA_URLS", mode="before")
+    def build_replica_urls(cls, v: Optional[List[str]], values: ValidationInfo) -> List[str]:
+        if v:
+            return v
+        urls = [url.strip() for url in values.data.get("DATABASE_REPLICA_URLS").split(",") if url.strip()]
+        return [async_url(url) for url in urls]
+
+    @field_validator("MAX_OVERFLOW", mode="before")
+    def build_max_overflow(cls, v: Optional[str], values: ValidationInfo) -> Any:
+        if v is not None:
+            return v
+        spare = values.data.get("DB_MAX_CONNECTIONS") - values.data.get("DB_POOL_SIZE")
+        return max(spare // values.data.get("WEB_CONCURRENCY"), 0)
+
     @field_validator("POOL_SIZE", mode="before")
     def build_pool(cls, v: Optional[str], values: ValidationInfo) -> Any:
         if isinstance(v, int):
@@ -73,6 +177,3 @@ class Settings(BaseSettings):
 
 # object to store settings
 settings = Settings()
-print('-' * 20)
-print('project name:', settings.PROJECT_NAME)
-print('database url:', settings.DATABASE_URL)
@@ -0,0 +1,30 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# clients may reuse a response but must revalidate it (If-None-Match) first
+CACHE_CONTROL = "public, no-cache"
+
+
+def compute_etag(body: str) -> str:
+    """Strong ETag: changes whenever a single byte of the body does."""
+    return '"%s"' % hashlib.sha256(body.encode()).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak validators compare equal to strong ones for If-None-Match
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def etag_response(request: Request, body: str, etag: str) -> Response:
+    """200 with `body`, or an empty 304 when the client already has this ETag."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -120,9 +120,28 @@ class PermissionException(BaseAPIException):
         )
 
 
+class ConflictException(BaseAPIException):
+    def __init__(self, detail: str = "Conflict", data: dict = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail
+        )
+        # rendered next to the message, e.g. which rows were and weren't written
+        self.data = data
+
+
 class DatabaseException(BaseAPIException):
     def __init__(self, detail: str = "Database error"):
         super().__init__(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=detail
         )
+
+
+class ServiceUnavailableException(BaseAPIException):
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
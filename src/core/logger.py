@@ -1,51 +1,248 @@
+import itertools
 import logging
+import queue
 import sys
-from typing import Any, Dict, Optional
+import threading
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, TextIO
 
 from loguru import logger
 from src.core.config import settings
 
-class InterceptHandler(logging.Handler):
+STDOUT_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+FILE_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}"
+
+# Arguments of these types can't change under us and are safe to read from
+# another thread, so they're interpolated on the writer thread. Anything
+# else (ORM objects, dicts...) is rendered by the caller: it could be
+# mutated, or lazy-load, before the writer gets to it.
+LAZY_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+_STOP = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'src.repositories.sqlalchemy=0.01,src.db=0.1' -> {logger name prefix: share of records kept}"""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+class BatchedStream:
+    """
+    loguru sink that only collects formatted messages; the writer thread
+    writes and flushes them once per batch instead of once per record.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self._pending: List[str] = []
+
+    def write(self, message: str) -> None:
+        self._pending.append(message)
+
+    def drain(self) -> None:
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending.clear()
+        self.stream.write(data)
+        self.stream.flush()
+
+
+class LogPipeline(logging.Handler):
+    """
+    Root logging handler that keeps log output off the request path.
+
+    emit() only samples the record and puts it, unformatted, into a bounded
+    buffer. A writer thread takes records out in batches, builds the
+    messages and hands them to loguru's sinks (JSON to stdout, the rotating
+    file). When the buffer is full a record is dropped and counted rather
+    than making the caller wait.
+
+    Records below WARNING from loggers listed in `sample_rates` are
+    sampled: with a rate of 0.01 one record in a hundred is kept.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 10000,
+            batch_size: int = 256,
+            sample_rates: Optional[Dict[str, float]] = None,
+    ) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.sample_rates = sample_rates or {}
+        self.streams: List[BatchedStream] = []
+
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        # logger name -> keep every n-th record (0: none)
+        self._every: Dict[str, int] = {}
+        self._counters: Dict[str, Iterator[int]] = {}
+
+        self.dropped = 0
+        self.sampled = 0
+        self.written = 0
+        self.batches = 0
+
+    def start(self, streams: Optional[List[BatchedStream]] = None) -> None:
+        if streams is not None:
+            self.streams = streams
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Writes out what is buffered and stops the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "sampled": self.sampled,
+            "written": self.written,
+            "batches": self.batches,
+        }
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # logging.Handler.handle takes the handler lock around emit();
+        # the queue is thread-safe on its own
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
     def emit(self, record: logging.LogRecord) -> None:
+        if not self._keep(record):
+            return
+
+        if not isinstance(record.msg, str):
+            record.msg = str(record.msg)
+        if isinstance(record.args, tuple):
+            if not all(isinstance(arg, LAZY_ARG_TYPES) for arg in record.args):
+                record.args = tuple(arg if isinstance(arg, LAZY_ARG_TYPES) else str(arg) for arg in record.args)
+        elif record.args:
+            record.msg, record.args = record.getMessage(), None
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _keep(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.sample_rates:
+            return True
+
+        every = self._every.get(record.name)
+        if every is None:
+            every = self._every[record.name] = self._sampling_for(record.name)
+        if every == 1:
+            return True
+        if every and next(self._counters.setdefault(record.name, itertools.count())) % every == 0:
+            return True
+        self.sampled += 1
+        return False
+
+    def _sampling_for(self, name: str) -> int:
+        matches = [prefix for prefix in self.sample_rates if name == prefix or name.startswith(prefix + ".")]
+        if not matches:
+            return 1
+        rate = self.sample_rates[max(matches, key=len)]
+        if rate <= 0:
+            return 0
+        return max(1, round(1 / rate))
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for record in batch:
+                if record is not _STOP:
+                    self._write(record)
+            for stream in self.streams:
+                try:
+                    stream.drain()
+                except Exception:
+                    pass
+            self.batches += 1
+
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, record: logging.LogRecord) -> None:
         try:
             level = logger.level(record.levelname).name
         except ValueError:
             level = record.levelno
 
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        def patch(entry: dict) -> None:
+            # point loguru's record at the caller, not at this thread
+            entry.update(
+                name=record.name,
+                module=record.module,
+                function=record.funcName,
+                line=record.lineno,
+                file=type(entry["file"])(record.filename, record.pathname),
+                thread=type(entry["thread"])(record.thread, record.threadName),
+                time=entry["time"] + timedelta(seconds=record.created - entry["time"].timestamp()),
+            )
+
+        try:
+            logger.patch(patch).opt(exception=record.exc_info).log(level, record.getMessage())
+            self.written += 1
+        except Exception:
+            self.handleError(record)
+
+
+log_pipeline = LogPipeline(
+    maxsize=settings.LOG_QUEUE_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    sample_rates=parse_sample_rates(settings.LOG_SAMPLE_RATES),
+)
 
-        logger.opt(depth=depth, exception=record.exc_info).log(
-            level, record.getMessage()
-        )
 
 def setup_logging() -> None:
-    # Remove all existing handlers
-    logging.root.handlers = []
-    
-    # Set up logging level
-    logging.root.setLevel(settings.LOG_LEVEL)
-    
-    # Add intercept handler
-    logging.root.addHandler(InterceptHandler())
-    
-    # Configure loguru
+    stdout = BatchedStream(sys.stdout)
+
+    # Configure loguru; its sinks are only called from the writer thread
     logger.configure(
         handlers=[
             {
-                "sink": sys.stdout,
-                "format": "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+                "sink": stdout,
+                "format": STDOUT_FORMAT,
                 "level": settings.LOG_LEVEL,
                 "serialize": True,
             },
             {
                 "sink": "logs/app.log",
-                "format": "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
+                "format": FILE_FORMAT,
                 "level": settings.LOG_LEVEL,
                 "rotation": "500 MB",
                 "retention": "10 days",
             },
         ]
-    ) 
\ No newline at end of file
+    )
+    log_pipeline.start([stdout])
+
+    # Route the standard logging module through the pipeline
+    logging.root.handlers = [log_pipeline]
+    logging.root.setLevel(settings.LOG_LEVEL)
@@ -0,0 +1,404 @@
+import asyncio
+import bisect
+import json
+import logging
+import math
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# route label of requests no route matched (keeps 404 scans from adding series)
+UNMATCHED = "unmatched"
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series: Dict[LabelValues, Any] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "help": self.documentation,
+            "labels": list(self.labels),
+            "series": [[list(labels), value] for labels, value in self.series.items()],
+        }
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.series[labels] = self.series.get(labels, 0.0) + amount
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        """For totals counted elsewhere (pool, chat) and copied in by a collector."""
+        self.series[labels] = value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), aggregate: str = "sum") -> None:
+        super().__init__(name, documentation, labels)
+        # how the values of several workers are combined: "sum", "max" or "min"
+        self.aggregate = aggregate
+
+    def set(self, labels: LabelValues, value: float) -> None:
+        self.series[labels] = value
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.series[labels] = self.series.get(labels, 0.0) + amount
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), "aggregate": self.aggregate}
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            # one count per bucket, one for +Inf, then the sum
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+
+class MetricsRegistry:
+    """
+    The worker's metrics. Recording is a plain dict update: every metric is
+    written from the event loop thread only, so nothing needs a lock.
+    Collectors run right before a snapshot is taken and copy in values
+    kept elsewhere (pool counters, chat stats...).
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = (), aggregate: str = "sum") -> Gauge:
+        return self._register(Gauge(name, documentation, labels, aggregate))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            labels: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, func: Callable[[], None]) -> Callable[[], None]:
+        self._collectors.append(func)
+        return func
+
+    def collect(self) -> Dict[str, Dict[str, Any]]:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as exc:
+                logger.warning("Metrics collector %s failed: %s", collector.__name__, exc)
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+
+def merge(snapshots: List[Dict[str, Dict[str, Any]]], live: List[bool]) -> Dict[str, Dict[str, Any]]:
+    """
+    Combines the snapshots of several workers: counters and histograms are
+    added up (including workers that have exited, so totals never go
+    down), gauges only over live workers, by their `aggregate`.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot, is_live in zip(snapshots, live):
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "series": {}})
+            if metric["kind"] == "gauge" and not is_live:
+                continue
+            for labels, value in metric["series"]:
+                key = tuple(labels)
+                current = target["series"].get(key)
+                if current is None:
+                    target["series"][key] = value
+                elif metric["kind"] == "histogram":
+                    target["series"][key] = [a + b for a, b in zip(current, value)]
+                elif metric["kind"] == "gauge" and metric.get("aggregate") == "max":
+                    target["series"][key] = max(current, value)
+                elif metric["kind"] == "gauge" and metric.get("aggregate") == "min":
+                    target["series"][key] = min(current, value)
+                else:
+                    target["series"][key] = current + value
+    return merged
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render(metrics: Dict[str, Dict[str, Any]]) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for name, metric in metrics.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labels"]
+        for labels, value in sorted(metric["series"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + [math.inf], value[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(list(names) + ["le"], list(labels) + [_format_value(bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+class MultiprocessStore:
+    """
+    Shares metrics between the workers of one host. Each worker writes its
+    snapshot to `<directory>/<pid>.json` every `interval` seconds (and on
+    shutdown); whichever worker serves /metrics writes its own and merges
+    all of them. A file not refreshed for three intervals belongs to a dead
+    worker: its counters still count, its gauges don't.
+
+    With no directory configured the worker exposes only its own metrics.
+    Clear the directory when deploying, as uvicorn/gunicorn pids change.
+    """
+
+    def __init__(self, registry: MetricsRegistry, directory: str = "", interval: float = 5.0) -> None:
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{os.getpid()}.json")
+
+    async def start(self) -> None:
+        if not self.directory or self._task is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.write(stopped=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.write()
+            except Exception as exc:
+                logger.warning("Writing metrics to %s failed: %s", self.directory, exc)
+
+    async def write(self, stopped: bool = False) -> None:
+        data = {"time": time.time(), "stopped": stopped, "metrics": self.registry.collect()}
+        await asyncio.to_thread(self._dump, data)
+
+    def _dump(self, data: Dict[str, Any]) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def _load(self) -> Tuple[List[Dict[str, Dict[str, Any]]], List[bool]]:
+        snapshots, live = [], []
+        stale = time.time() - 3 * self.interval
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                # being replaced right now, or left half-written by a crash
+                continue
+            snapshots.append(data["metrics"])
+            live.append(not data["stopped"] and data["time"] >= stale)
+        return snapshots, live
+
+    async def exposition(self) -> str:
+        if not self.directory:
+            return render(merge([self.registry.collect()], [True]))
+        await self.write()
+        snapshots, live = await asyncio.to_thread(self._load)
+        return render(merge(snapshots, live))
+
+
+metrics = MetricsRegistry()
+metrics_store = MultiprocessStore(
+    metrics,
+    directory=settings.METRICS_MULTIPROC_DIR,
+    interval=settings.METRICS_FLUSH_INTERVAL,
+)
+
+
+class RequestStats:
+    """Database work done on behalf of the current request; filled in by the engine events."""
+
+    __slots__ = ("queries", "seconds", "profile")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+        # fingerprint -> [count, seconds, call site], kept by the query profiler
+        self.profile: Optional[Dict[str, List[Any]]] = None
+
+
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+# called with (method, route, stats) after every HTTP request
+request_observers: List[Callable[[str, str, RequestStats], None]] = []
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status"),
+)
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request", ("method", "route"),
+)
+http_request_queries = metrics.histogram(
+    "http_request_db_queries", "Database queries made by one HTTP request", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_db_seconds = metrics.histogram(
+    "http_request_db_duration_seconds", "Time one HTTP request spent in database queries", ("method", "route"),
+)
+http_requests_in_progress = metrics.gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ("method",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Records count, status and latency of every HTTP request, plus how many
+    queries it made and how long they took, labelled with the route's path
+    template (e.g. /api/product/{product_id}) rather than the raw path.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: Optional[Dict[Any, List[Any]]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        http_requests_in_progress.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            http_requests_in_progress.dec((method,))
+
+            labels = (method, self._route_of(scope))
+            http_requests.inc(labels + (str(status_code),))
+            http_request_seconds.observe(labels, elapsed)
+            http_request_queries.observe(labels, stats.queries)
+            http_request_db_seconds.observe(labels, stats.seconds)
+            for observer in request_observers:
+                try:
+                    observer(*labels, stats)
+                except Exception as exc:
+                    logger.warning("Request observer %s failed: %s", observer, exc)
+
+    def _route_of(self, scope: Scope) -> str:
+        # the router leaves the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED
+
+        if self._routes is None:
+            self._routes = {}
+            for route in scope["app"].routes:
+                key = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                self._routes.setdefault(key, []).append(route)
+
+        routes = self._routes.get(endpoint, [])
+        if len(routes) == 1:
+            return routes[0].path
+        # one function behind several routes: find the one that matched
+        for route in routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return UNMATCHED
@@ -0,0 +1,43 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Dict
+
+from src.core.exceptions import ValidationException
+
+SORT_ORDERS = ("asc", "desc")
+
+
+def encode_cursor(sort_field: str, sort_order: str, value: Any, id: int) -> str:
+    """
+    Packs the position of the last row of a page into an opaque token.
+    The token also carries the ordering, so a page can't be continued
+    with a different sort than the one it was produced with.
+    """
+    payload: Dict[str, Any] = {"f": sort_field, "o": sort_order, "id": id, "v": value}
+
+    if isinstance(value, datetime):
+        payload.update(v=value.isoformat(), t="dt")
+    elif isinstance(value, date):
+        payload.update(v=value.isoformat(), t="d")
+
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload.get("t") == "dt":
+            payload["v"] = datetime.fromisoformat(payload["v"])
+        elif payload.get("t") == "d":
+            payload["v"] = date.fromisoformat(payload["v"])
+        payload["id"] = int(payload["id"])
+        if not isinstance(payload["f"], str) or payload["o"] not in SORT_ORDERS:
+            raise ValueError
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise ValidationException("Invalid cursor")
+
+    return payload
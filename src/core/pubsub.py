@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import List, Optional, Set
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from src.interfaces.pubsub import IPubSub, MessageHandler
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7999
+
+
+class InMemoryHub:
+    """Stands in for the shared transport: every InMemoryPubSub on a hub sees every message."""
+
+    def __init__(self) -> None:
+        self.handlers: List[MessageHandler] = []
+
+
+class InMemoryPubSub(IPubSub):
+    """Single-process backend, also used in tests to simulate several workers."""
+
+    def __init__(self, hub: Optional[InMemoryHub] = None) -> None:
+        self.hub = hub or InMemoryHub()
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        if self._handler is not None:
+            return
+        self._handler = handler
+        self.hub.handlers.append(handler)
+
+    async def publish(self, room: str, message: str) -> None:
+        for handler in list(self.hub.handlers):
+            await handler(room, message)
+
+    async def stop(self) -> None:
+        if self._handler in self.hub.handlers:
+            self.hub.handlers.remove(self._handler)
+        self._handler = None
+
+
+class PostgresPubSub(IPubSub):
+    """
+    Fans messages out through Postgres LISTEN/NOTIFY, so every worker on
+    every node connected to the same database receives them. Messages are
+    delivered to local clients right away; the copy coming back through
+    NOTIFY is recognised by its origin id and skipped.
+    """
+
+    def __init__(self, dsn: str, channel: str = "chat", reconnect_delay: float = 1.0) -> None:
+        # asyncpg wants a plain postgresql:// DSN without a driver suffix
+        self.dsn = make_url(dsn).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.origin = uuid.uuid4().hex
+        self._handler: Optional[MessageHandler] = None
+        self._listener = None
+        self._publisher = None
+        self._publish_lock = asyncio.Lock()
+        self._reconnect: Optional[asyncio.Task] = None
+        # the loop only keeps weak references to tasks
+        self._deliveries: Set[asyncio.Task] = set()
+        self._closing = False
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+        self._closing = False
+        await self._listen()
+
+    async def _listen(self) -> None:
+        self._listener = await asyncpg.connect(self.dsn)
+        self._listener.add_termination_listener(self._on_termination)
+        await self._listener.add_listener(self.channel, self._on_notify)
+
+    def _on_termination(self, connection) -> None:
+        if not self._closing and (self._reconnect is None or self._reconnect.done()):
+            logger.warning("Chat LISTEN connection lost, reconnecting")
+            self._reconnect = asyncio.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self) -> None:
+        delay = self.reconnect_delay
+        while not self._closing:
+            try:
+                await self._listen()
+                return
+            except Exception as exc:
+                logger.warning("Chat LISTEN reconnect failed: %s", exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed chat notification")
+            return
+
+        if data.get("origin") == self.origin or self._handler is None:
+            return
+        task = asyncio.create_task(self._deliver(data["room"], data["message"]))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, room: str, message: str) -> None:
+        try:
+            await self._handler(room, message)
+        except Exception as exc:
+            logger.error("Delivering a notification for room %s failed: %s", room, exc)
+
+    async def publish(self, room: str, message: str) -> None:
+        if self._handler is not None:
+            await self._handler(room, message)
+
+        payload = json.dumps({"origin": self.origin, "room": room, "message": message})
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+            logger.warning("Chat message too large for NOTIFY, delivered to this worker only")
+            return
+
+        async with self._publish_lock:
+            try:
+                if self._publisher is None or self._publisher.is_closed():
+                    self._publisher = await asyncpg.connect(self.dsn)
+                await self._publisher.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("Chat NOTIFY failed, delivered to this worker only: %s", exc)
+                self._publisher = None
+
+    async def stop(self) -> None:
+        self._closing = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        for task in self._deliveries:
+            task.cancel()
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+        self._deliveries.clear()
+        for connection in (self._listener, self._publisher):
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        self._listener = self._publisher = None
+        self._handler = None
+
+
+def build_pubsub(backend: str, dsn: str, channel: str = "chat") -> IPubSub:
+    """`memory` (single worker) or `postgres` (LISTEN/NOTIFY on `dsn` and `channel`)."""
+    if backend == "memory":
+        return InMemoryPubSub()
+    if backend == "postgres":
+        return PostgresPubSub(dsn, channel=channel)
+    raise ValueError(f"Unsupported pub/sub backend: {backend}")
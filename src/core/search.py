@@ -0,0 +1,62 @@
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# pg_trgm's default pg_trgm.word_similarity_threshold, used by the <% operator
+WORD_SIMILARITY_THRESHOLD = 0.6
+# a match in the description counts half as much as one in the name
+DESCRIPTION_WEIGHT = 0.5
+
+_WORD = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Trigrams the way pg_trgm extracts them: per lowercased word, padded with two leading and one trailing space."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def word_similarity(query: FrozenSet[str], text: FrozenSet[str]) -> float:
+    """Share of the query's trigrams found in the text, close to pg_trgm's word_similarity()."""
+    if not query:
+        return 0.0
+    return len(query & text) / len(query)
+
+
+class TrigramIndex:
+    """
+    In-memory stand-in for the GIN trigram indexes on databases without
+    pg_trgm (SQLite in tests and local runs). Scores documents the same
+    way ProductRepository.search ranks them on Postgres.
+    Not shared between workers: callers rebuild it after writes.
+    """
+
+    def __init__(self) -> None:
+        self._documents: Dict[int, Tuple[FrozenSet[str], FrozenSet[str]]] = {}
+        self.ready = False
+
+    def build(self, documents: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        self._documents = {
+            id: (trigrams(name or ""), trigrams(description or ""))
+            for id, name, description in documents
+        }
+        self.ready = True
+
+    def invalidate(self) -> None:
+        self.ready = False
+
+    def search(self, query: str) -> List[Tuple[float, int]]:
+        """(score, id) of matching documents, best first, ties by id descending."""
+        needle = trigrams(query)
+        matches = []
+        for id, (name, description) in self._documents.items():
+            name_score = word_similarity(needle, name)
+            description_score = word_similarity(needle, description)
+            if max(name_score, description_score) < WORD_SIMILARITY_THRESHOLD:
+                continue
+            matches.append((max(name_score, description_score * DESCRIPTION_WEIGHT), id))
+
+        matches.sort(reverse=True)
+        return matches
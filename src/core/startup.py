@@ -0,0 +1,42 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class StartupError(RuntimeError):
+    """A startup phase found the worker unfit to serve (used by --check)."""
+
+
+class StartupTimer:
+    """
+    Times the phases of worker startup. Every phase is logged as it
+    finishes, and report() gives the whole breakdown, so slow boots can
+    be traced to the step responsible.
+    """
+
+    def __init__(self) -> None:
+        self.phases: List[Tuple[str, float]] = []
+        self._started = time.perf_counter()
+
+    @asynccontextmanager
+    async def phase(self, name: str) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases.append((name, elapsed))
+            logger.info("Startup phase %s took %.1f ms", name, elapsed * 1000)
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self._started
+
+    def report(self) -> Dict[str, float]:
+        """Phase name -> seconds, plus the wall time since the timer was created as `total`."""
+        report = {name: round(seconds, 4) for name, seconds in self.phases}
+        report["total"] = round(self.total, 4)
+        return report
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from fastapi import WebSocket, status
+
+from src.interfaces.pubsub import IPubSub
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_ROOM = "general"
+
+DROP = "drop"
+EVICT = "evict"
+
+
+class Connection:
+    """A client socket with its own bounded outbox and sender task."""
+
+    __slots__ = ("websocket", "room", "queue", "sender")
+
+    def __init__(self, websocket: WebSocket, room: str, queue_size: int) -> None:
+        self.websocket = websocket
+        self.room = room
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: Optional[asyncio.Task] = None
+
+
+class ConnectionManager:
+    """
+    Chat membership per room. broadcast() never awaits a client: it only
+    puts the message in each connection's outbox, and every connection
+    has its own task writing to its socket, so a slow or dead client
+    can't hold up the others. When an outbox is full the message is
+    either dropped for that client or the client is evicted, depending
+    on `overflow`.
+
+    With a pub/sub backend, broadcast() publishes to every worker and each
+    worker's manager delivers to its own clients.
+    """
+
+    def __init__(
+            self,
+            queue_size: int = 100,
+            overflow: str = EVICT,
+            send_timeout: float = 5,
+            pubsub: Optional[IPubSub] = None,
+    ) -> None:
+        if overflow not in (DROP, EVICT):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.send_timeout = send_timeout
+        self.pubsub = pubsub
+        self.rooms: Dict[str, Set[Connection]] = defaultdict(set)
+        self._connections: Dict[WebSocket, Connection] = {}
+        # the loop only keeps weak references to tasks
+        self._closing: Set[asyncio.Task] = set()
+
+        self.sent = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    @property
+    def active_connections(self) -> int:
+        return len(self._connections)
+
+    async def start(self) -> None:
+        if self.pubsub is not None:
+            await self.pubsub.start(self._on_message)
+
+    async def stop(self) -> None:
+        if self.pubsub is not None:
+            await self.pubsub.stop()
+
+    async def _on_message(self, room: str, message: str) -> None:
+        self.deliver(message, room)
+
+    async def connect(self, websocket: WebSocket, room: str = DEFAULT_ROOM) -> Connection:
+        await websocket.accept()
+        connection = Connection(websocket, room, self.queue_size)
+        connection.sender = asyncio.create_task(self._send_loop(connection))
+        self.rooms[room].add(connection)
+        self._connections[websocket] = connection
+        return connection
+
+    def disconnect(self, websocket: WebSocket) -> None:
+        connection = self._connections.pop(websocket, None)
+        if connection is None:
+            return
+
+        members = self.rooms.get(connection.room)
+        if members is not None:
+            members.discard(connection)
+            if not members:
+                del self.rooms[connection.room]
+
+        if connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+
+    async def broadcast(self, message: str, room: str = DEFAULT_ROOM) -> None:
+        if self.pubsub is None:
+            self.deliver(message, room)
+        else:
+            await self.pubsub.publish(room, message)
+
+    def deliver(self, message: str, room: str = DEFAULT_ROOM) -> int:
+        """Queues `message` for this worker's clients in `room`; returns how many got it."""
+        delivered = 0
+        # copy: eviction changes the set while we iterate
+        for connection in list(self.rooms.get(room, ())):
+            try:
+                connection.queue.put_nowait(message)
+                delivered += 1
+            except asyncio.QueueFull:
+                if self.overflow == DROP:
+                    self.dropped += 1
+                else:
+                    self._evict(connection)
+        return delivered
+
+    def _evict(self, connection: Connection) -> None:
+        self.evicted += 1
+        logger.info("Evicting slow chat client from room %s", connection.room)
+        self.disconnect(connection.websocket)
+        task = asyncio.create_task(self._close(connection.websocket, status.WS_1013_TRY_AGAIN_LATER))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def _send_loop(self, connection: Connection) -> None:
+        while True:
+            message = await connection.queue.get()
+            try:
+                await asyncio.wait_for(connection.websocket.send_text(message), self.send_timeout)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.info("Dropping chat client after failed send: %s", exc)
+                self.disconnect(connection.websocket)
+                await self._close(connection.websocket, status.WS_1011_INTERNAL_ERROR)
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": self.active_connections,
+            "rooms": len(self.rooms),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+        }
@@ -1,16 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.core.config import settings
+# Compatibility shim: the sync engine is gone, everything runs on the
+# pooled async engine from src.db.session.
+from src.db.session import engine, SessionLocal, get_session as get_db
 from src.models.base import Base
 
-SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+__all__ = ['engine', 'SessionLocal', 'get_db', 'Base']
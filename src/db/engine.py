@@ -0,0 +1,173 @@
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.config import settings
+from src.core.metrics import metrics, request_stats
+from src.db.profiler import query_profiler
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolMetrics:
+    """Counters collected by InstrumentedQueuePool for one engine."""
+
+    name: str
+    size: int = 0
+    max_overflow: int = 0
+    checkouts: int = 0
+    timeouts: int = 0
+    overflow_opened: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait time and overflow usage."""
+
+    metrics: PoolMetrics
+
+    def connect(self) -> Any:
+        overflow_before = self._overflow
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - started)
+            if self._overflow > overflow_before and self._overflow > 0:
+                self.metrics.overflow_opened += 1
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+_engines: Dict[str, AsyncEngine] = {}
+_engine_names: "WeakKeyDictionary[Engine, str]" = WeakKeyDictionary()
+
+db_queries = metrics.counter("db_queries_total", "Queries sent to the database", ("engine",))
+db_query_seconds = metrics.histogram("db_query_duration_seconds", "Time spent in one query", ("engine",))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    labels = (_engine_names.get(conn.engine, "unknown"),)
+    db_queries.inc(labels)
+    db_query_seconds.observe(labels, elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+    query_profiler.observe(stats, statement, elapsed)
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Counts and times the engine's queries, overall and for the request that made them."""
+    sync_engine = engine.sync_engine
+    _engine_names[sync_engine] = name
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def create_engine(url: str, name: str = "primary", **overrides: Any) -> AsyncEngine:
+    """
+    Builds an async engine with the pool settings from Settings and
+    registers it under `name` so its pool shows up in pool_metrics()
+    """
+    kwargs: Dict[str, Any] = dict(echo=settings.DEBUG, future=True)
+
+    if make_url(url).get_backend_name() != "sqlite":
+        # aiosqlite uses NullPool/StaticPool, which reject queue pool sizing
+        kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.POOL_SIZE,
+            max_overflow=settings.MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    kwargs.update(overrides)
+
+    engine = create_async_engine(url, **kwargs)
+
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.metrics = PoolMetrics(
+            name=name,
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+        )
+
+    _engines[name] = engine
+    instrument_engine(engine, name)
+    return engine
+
+
+def pool_metrics(name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns a snapshot of every registered pool (or only `name`):
+    checked-out connections, open overflow connections, checkout
+    wait time and timeouts
+    """
+    snapshot: Dict[str, Dict[str, Any]] = {}
+
+    for engine_name, engine in _engines.items():
+        if name and engine_name != name:
+            continue
+
+        pool = engine.pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            snapshot[engine_name] = {"name": engine_name, "pool": pool.__class__.__name__}
+            continue
+
+        data = asdict(pool.metrics)
+        data.update(
+            pool=pool.__class__.__name__,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+        snapshot[engine_name] = data
+
+    return snapshot
+
+
+def check_connection_budget() -> None:
+    """Warns when all workers together may open more connections than Postgres allows."""
+    per_worker = settings.POOL_SIZE + settings.MAX_OVERFLOW
+    total = per_worker * settings.WEB_CONCURRENCY
+
+    if total > settings.DB_MAX_CONNECTIONS:
+        logger.warning(
+            "Connection pools may open %s connections (%s workers x %s), "
+            "above DB_MAX_CONNECTIONS=%s",
+            total, settings.WEB_CONCURRENCY, per_worker, settings.DB_MAX_CONNECTIONS,
+        )
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.util import identity_key
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Session.info key of the session's loader
+LOADER = "loader"
+
+Shape = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+class EntityLoader:
+    """
+    Request-scoped front for BaseSQLAlchemyRepository.get, living in the
+    session's info (the session is per request):
+
+    - a lookup that was already made returns the same result (or waits for
+      the query in flight) instead of querying again;
+    - get(id=...) calls made concurrently (asyncio.gather) are sent as one
+      WHERE id IN (...) query once the callers have all queued up;
+    - get(id=...) for an object the session already holds with the needed
+      columns loaded is answered from the identity map.
+
+    Repositories drop their model's results with forget() after writes.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self._results: Dict[Hashable, asyncio.Future] = {}
+        self._batches: Dict[Tuple[type, Shape], Dict[Any, asyncio.Future]] = {}
+        self._dispatches: Set[asyncio.Task] = set()
+
+        self.queries = 0
+        self.reused = 0
+
+    @classmethod
+    def of(cls, session: AsyncSession) -> "EntityLoader":
+        loader = session.info.get(LOADER)
+        if loader is None:
+            loader = session.info[LOADER] = cls(session)
+        return loader
+
+    async def load(
+            self,
+            repository: Any,
+            filters: Dict[str, Any],
+            fields: Optional[List[str]] = None,
+            relations: Optional[List[str]] = None,
+    ) -> Any:
+        shape: Shape = (tuple(sorted(fields or ())), tuple(sorted(relations or ())))
+        key = (type(repository), shape, tuple(sorted(filters.items())))
+        try:
+            future = self._results.get(key)
+        except TypeError:
+            # unhashable filter values: nothing to share
+            self.queries += 1
+            return await repository._fetch(fields=fields, relations=relations, **filters)
+
+        if future is not None:
+            self.reused += 1
+            return await future
+
+        if set(filters) == {"id"}:
+            obj = self._from_identity_map(repository, filters["id"], shape)
+            if obj is not None:
+                self.reused += 1
+                return obj
+            future = self._enqueue(repository, shape, filters["id"])
+            self._results[key] = future
+            return await future
+
+        future = asyncio.get_running_loop().create_future()
+        self._results[key] = future
+        self.queries += 1
+        try:
+            result = await repository._fetch(fields=fields, relations=relations, **filters)
+        except BaseException as exc:
+            self._results.pop(key, None)
+            future.set_exception(exc)
+            # mark it retrieved: waiters, if any, get the error on their own
+            future.exception()
+            raise
+        future.set_result(result)
+        return result
+
+    def _from_identity_map(self, repository: Any, id: Any, shape: Shape) -> Any:
+        obj = self.session.sync_session.identity_map.get(identity_key(repository._model, id))
+        if obj is None:
+            return None
+
+        state = sa_inspect(obj)
+        fields, relations = shape
+        needed = set(fields or repository._model.__table__.columns.keys()) | set(relations)
+        # anything unloaded would need a lazy load, which async sessions can't do
+        if state.deleted or state.was_deleted or needed & state.unloaded:
+            return None
+        if not repository._visible(obj):
+            return None
+        return obj
+
+    def _enqueue(self, repository: Any, shape: Shape, id: Any) -> asyncio.Future:
+        batch_key = (type(repository), shape)
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = {}
+            # runs after every caller already scheduled on the loop has queued its id
+            task = asyncio.create_task(self._dispatch(repository, batch_key))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+        future = batch.get(id)
+        if future is None:
+            future = batch[id] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def _dispatch(self, repository: Any, batch_key: Tuple[type, Shape]) -> None:
+        batch = self._batches.pop(batch_key)
+        fields, relations = batch_key[1]
+        self.queries += 1
+        try:
+            rows = await repository._fetch_many(
+                list(batch),
+                fields=list(fields) or None,
+                relations=list(relations) or None,
+            )
+        except BaseException as exc:
+            self.forget(repository._model)
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+
+        found = {row.id: row for row in rows}
+        for id, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(id))
+
+    def forget(self, model: type) -> None:
+        """Drops the results for `model`, e.g. after it was written to."""
+        for key in [key for key in self._results if key[0]._model is model]:
+            del self._results[key]
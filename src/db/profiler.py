@@ -0,0 +1,211 @@
+import logging
+import re
+import sys
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import greenlet
+
+from src.core.config import settings
+from src.core.metrics import RequestStats, request_observers
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SRC_DIR = str(Path(__file__).resolve().parents[1])
+# plumbing between the code that asked for a query and the driver
+_PLUMBING = (
+    str(Path(SRC_DIR) / "db"),
+    str(Path(SRC_DIR) / "repositories" / "sqlalchemy.py"),
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|\?")
+_POSTCOMPILE = re.compile(r"\(?\s*__\[POSTCOMPILE_\w+\]\s*\)?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    The statement with its values taken out: literals and placeholders
+    become ?, IN lists and multi-row VALUES collapse to one (?), so the
+    same query with other arguments has the same fingerprint.
+    """
+    text = _STRING.sub("?", statement)
+    text = _POSTCOMPILE.sub("(?)", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("(?)", text)
+    text = _ROWS.sub("(?)", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def call_site() -> str:
+    """
+    file:line of the app code that ran the query. Engine events run in the
+    greenlet SQLAlchemy spawns for the driver call, so the walk carries on
+    into the parent greenlet, where the awaiting coroutine is suspended.
+    """
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(SRC_DIR):
+            site = f"{Path(filename).relative_to(SRC_DIR).as_posix()}:{frame.f_lineno}"
+            if not filename.startswith(_PLUMBING):
+                return site
+            fallback = fallback or site
+        frame = frame.f_back
+        if frame is None and current.parent is not None:
+            frame = current.parent.gr_frame
+            current = current.parent
+    return fallback or "unknown"
+
+
+class QueryProfiler:
+    """
+    Fed by the engine events: keeps totals per statement fingerprint (count,
+    time, slowest, where it's called from) and checks every request against
+    the query budget. A request is flagged when it runs more than
+    `max_queries` queries, spends more than `max_seconds` in the database,
+    or repeats one fingerprint `repeat_threshold` times or more, the usual
+    shape of an N+1.
+
+    Fingerprinting and the call-site walk cost something on every query, so
+    it is off unless enabled. The totals are capped: fingerprints past
+    `max_fingerprints` only count against their request, and call sites
+    past `max_sites` per fingerprint are added up under "other".
+    """
+
+    def __init__(
+            self,
+            enabled: bool = False,
+            max_queries: int = 20,
+            max_seconds: float = 0.5,
+            repeat_threshold: int = 5,
+            slow_query_seconds: float = 0.2,
+            keep: int = 100,
+            max_fingerprints: int = 500,
+            max_sites: int = 20,
+    ) -> None:
+        self.enabled = enabled
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+        self.repeat_threshold = repeat_threshold
+        self.slow_query_seconds = slow_query_seconds
+        self.max_fingerprints = max_fingerprints
+        self.max_sites = max_sites
+
+        self.queries: Dict[str, Dict[str, Any]] = {}
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.flagged: Deque[Dict[str, Any]] = deque(maxlen=keep)
+
+    def observe(self, stats: Optional[RequestStats], statement: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        key = fingerprint(statement)
+        site = call_site()
+
+        entry = self.queries.get(key)
+        if entry is None and len(self.queries) < self.max_fingerprints:
+            entry = self.queries[key] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "sites": {}}
+        if entry is not None:
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            sites = entry["sites"]
+            counted = site if site in sites or len(sites) < self.max_sites else "other"
+            sites[counted] = sites.get(counted, 0) + 1
+
+        if seconds >= self.slow_query_seconds:
+            logger.warning("Slow query (%.1f ms) at %s: %s", seconds * 1000, site, key)
+
+        if stats is not None:
+            if stats.profile is None:
+                stats.profile = {}
+            seen = stats.profile.get(key)
+            if seen is None:
+                stats.profile[key] = [1, seconds, site]
+            else:
+                seen[0] += 1
+                seen[1] += seconds
+
+    def finish(self, method: str, route: str, stats: RequestStats) -> None:
+        """Checks a finished request against the budget."""
+        if not self.enabled:
+            return
+        name = f"{method} {route}"
+        totals = self.routes.get(name)
+        if totals is None:
+            totals = self.routes[name] = {"requests": 0, "flagged": 0, "max_queries": 0, "max_seconds": 0.0}
+        totals["requests"] += 1
+        totals["max_queries"] = max(totals["max_queries"], stats.queries)
+        totals["max_seconds"] = max(totals["max_seconds"], stats.seconds)
+
+        reasons = self.violations(stats)
+        if not reasons:
+            return
+        totals["flagged"] += 1
+        self.flagged.append({
+            "route": name,
+            "queries": stats.queries,
+            "seconds": round(stats.seconds, 6),
+            "reasons": reasons,
+        })
+        logger.warning("Query budget exceeded by %s: %s", name, "; ".join(reasons))
+
+    def violations(self, stats: RequestStats) -> List[str]:
+        reasons = []
+        if stats.queries > self.max_queries:
+            reasons.append(f"{stats.queries} queries, budget {self.max_queries}")
+        if stats.seconds > self.max_seconds:
+            reasons.append(f"{stats.seconds * 1000:.1f} ms in the database, budget {self.max_seconds * 1000:.0f} ms")
+        for key, (count, _, site) in (stats.profile or {}).items():
+            if count >= self.repeat_threshold:
+                reasons.append(f"N+1: {count} x [{key}] from {site}")
+        return reasons
+
+    def worst(self, limit: int = 20) -> Dict[str, Any]:
+        """The statements that took the most time overall and the routes flagged most often."""
+        queries = sorted(self.queries.items(), key=lambda item: item[1]["seconds"], reverse=True)[:limit]
+        routes = sorted(
+            ((name, totals) for name, totals in self.routes.items() if totals["flagged"]),
+            key=lambda item: (item[1]["flagged"], item[1]["max_queries"]),
+            reverse=True,
+        )[:limit]
+        return {
+            "queries": [
+                {
+                    "fingerprint": key,
+                    "count": entry["count"],
+                    "seconds": round(entry["seconds"], 6),
+                    "max_seconds": round(entry["max_seconds"], 6),
+                    "sites": dict(sorted(entry["sites"].items(), key=lambda item: item[1], reverse=True)[:5]),
+                }
+                for key, entry in queries
+            ],
+            "routes": [{"route": name, **totals} for name, totals in routes],
+            "recent": list(self.flagged)[-limit:],
+        }
+
+    def reset(self) -> None:
+        self.queries.clear()
+        self.routes.clear()
+        self.flagged.clear()
+
+
+query_profiler = QueryProfiler(
+    enabled=settings.QUERY_PROFILER_ENABLED,
+    max_queries=settings.QUERY_BUDGET_QUERIES,
+    max_seconds=settings.QUERY_BUDGET_SECONDS,
+    repeat_threshold=settings.QUERY_REPEAT_THRESHOLD,
+    slow_query_seconds=settings.SLOW_QUERY_SECONDS,
+    max_fingerprints=settings.QUERY_PROFILER_MAX_FINGERPRINTS,
+)
+request_observers.append(query_profiler.finish)
@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.dml import UpdateBase
+
+from src.core.cache import TwoLevelCache
+from src.interfaces.cache import ICacheBackend
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# execution option marking a SELECT that may be served by a replica
+REPLICA = "replica"
+
+# Session.info keys
+REPLICAS = "replicas"
+PRIMARY = "primary"
+WROTE = "wrote"
+WRITER_KEYS = "writer_keys"
+
+
+class ReplicaSet:
+    """
+    Read replicas handed out round-robin. A replica is taken out of the
+    rotation when a connection to it breaks or a health check fails, and
+    put back once a later check succeeds. With no healthy replica left,
+    reads go to the primary.
+    """
+
+    def __init__(
+            self,
+            engines: List[AsyncEngine],
+            check_interval: float = 5,
+            check_timeout: float = 2,
+    ) -> None:
+        self.engines = engines
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.healthy: Dict[AsyncEngine, bool] = {engine: True for engine in engines}
+        self._cycle = itertools.cycle(engines)
+        self._checker: Optional[asyncio.Task] = None
+
+        self.reads = 0
+        self.fallbacks = 0
+
+        for engine in engines:
+            event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def pick(self) -> Optional[AsyncEngine]:
+        for _ in range(len(self.engines)):
+            engine = next(self._cycle)
+            if self.healthy[engine]:
+                self.reads += 1
+                return engine
+        self.fallbacks += 1
+        return None
+
+    def _on_error(self, context: Any) -> None:
+        # dropped connection, or no connection could be opened at all
+        if context.is_disconnect or context.connection is None:
+            for engine in self.engines:
+                if engine.sync_engine is context.engine:
+                    self.mark(engine, False)
+
+    def mark(self, engine: AsyncEngine, healthy: bool) -> None:
+        if self.healthy[engine] != healthy:
+            logger.warning("Replica %s is %s", engine.url.render_as_string(), "back" if healthy else "down")
+        self.healthy[engine] = healthy
+
+    async def check(self) -> None:
+        """Pings every replica once and updates the rotation."""
+        for engine in self.engines:
+            try:
+                async with engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), self.check_timeout)
+                self.mark(engine, True)
+            except Exception as exc:
+                logger.debug("Replica health check failed: %s", exc)
+                self.mark(engine, False)
+
+    async def start(self) -> None:
+        if self.engines:
+            await self.check()
+            self._checker = asyncio.create_task(self._check_loop())
+
+    async def stop(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            self._checker = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def _check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "replicas": len(self.engines),
+            "healthy": sum(self.healthy.values()),
+            "reads": self.reads,
+            "fallbacks": self.fallbacks,
+        }
+
+
+class RoutingSession(Session):
+    """
+    Sends statements marked with the REPLICA execution option to a
+    replica from info[REPLICAS]; everything else, and every statement
+    once the session has written or was pinned, goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        replicas: Optional[ReplicaSet] = self.info.get(REPLICAS)
+        if replicas:
+            if self._flushing or isinstance(clause, UpdateBase):
+                # read-your-writes: the rest of this session stays on the primary
+                self.info[WROTE] = True
+            elif (
+                    not self.info.get(WROTE)
+                    and not self.info.get(PRIMARY)
+                    and isinstance(clause, Executable)
+                    and clause.get_execution_options().get(REPLICA)
+            ):
+                engine = replicas.pick()
+                if engine is not None:
+                    return engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+class ReadYourWrites:
+    """
+    Remembers who wrote recently, so that their next requests read from
+    the primary until replication has caught up (`window` seconds). Keyed
+    like the principal cache ("id:1", "username:bob"); with a shared
+    backend the pin holds across workers.
+    """
+
+    def __init__(self, window: int, backend: Optional[ICacheBackend] = None) -> None:
+        self.writers = TwoLevelCache(namespace="writer", ttl=window, maxsize=10000, backend=backend)
+
+    async def identify(self, session: AsyncSession, key: str) -> None:
+        """Called once the request's user is known, before its first read."""
+        session.info.setdefault(WRITER_KEYS, []).append(key)
+        if await self.writers.get(key) is not None:
+            session.info[PRIMARY] = True
+
+    async def remember(self, session: AsyncSession) -> None:
+        """Called after a commit: pins the request's user if the session wrote."""
+        if not session.info.get(WROTE):
+            return
+        for key in session.info.get(WRITER_KEYS, []):
+            await self.writers.set(key, {"at": time.time()})
@@ -1,28 +1,51 @@
-from typing import AsyncGenerator
+from pathlib import Path
+from typing import AsyncGenerator, Set, Tuple
 
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+from src.core.cache import build_backend
 from src.core.config import settings
+from src.db.engine import create_engine
+from src.db.routing import REPLICAS, ReadYourWrites, ReplicaSet, RoutingSession
 
 
-engine = create_async_engine(
-    settings.POSTGRES_URL,
-    echo=settings.DEBUG,
-    future=True,
-    pool_size=settings.POOL_SIZE,
-    max_overflow=settings.MAX_OVERFLOW,
-    pool_timeout=30,  # Timeout for getting a connection from the pool (in seconds)
-    pool_recycle=1800, # Recycle connections every 30 minutes (in seconds)
+# schema is managed by alembic only; the app never creates tables itself
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# The primary engine: legacy routers and /api/v1 share its pool
+engine = create_engine(settings.POSTGRES_URL)
+replicas = ReplicaSet(
+    [create_engine(url, name=f"replica{i}") for i, url in enumerate(settings.REPLICA_URLS, 1)],
+    check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL,
+)
+read_your_writes = ReadYourWrites(
+    window=settings.READ_YOUR_WRITES_SECONDS,
+    backend=build_backend(settings.CACHE_URL),
+)
+SessionLocal = sessionmaker(
+    engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    info={REPLICAS: replicas},
+    expire_on_commit=False,
 )
-SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
-async def add_postgresql_extension() -> None:
-    async with SessionLocal() as db:
-        query = text("CREATE EXTENSION IF NOT EXISTS pg_trgm")
-        await db.execute(query)
+def _expected_heads() -> Set[str]:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "src" / "migrations"))
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+async def schema_revisions() -> Tuple[Set[str], Set[str]]:
+    """(revisions the database is at, head revisions of the migrations); also proves the database is reachable."""
+    async with engine.connect() as conn:
+        current = await conn.run_sync(lambda sync_conn: MigrationContext.configure(sync_conn).get_current_heads())
+    return set(current), _expected_heads()
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -33,4 +56,3 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
-
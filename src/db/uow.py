@@ -0,0 +1,73 @@
+from typing import AsyncGenerator, Awaitable, Callable, List
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.loader import LOADER
+from src.db.session import get_session, read_your_writes
+
+ON_COMMIT = "on_commit"
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], Awaitable[None]]) -> None:
+    """Schedules `callback` to run after the session's unit of work commits; dropped on rollback."""
+    session.info.setdefault(ON_COMMIT, []).append(callback)
+
+
+class UnitOfWork:
+    """
+    One transaction per request. Repositories built on `uow.session` only
+    add, flush and execute; nothing is committed until the handler calls
+    commit(), so a handler touching several repositories pays one commit
+    and either all of its writes land or none do. Work that must only
+    happen once the data is durable (cache invalidation) is registered
+    with on_commit() and runs right after it.
+
+    The bulk_* repository methods are the exception: they commit their
+    own chunks so a large import never holds one long transaction.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    async def flush(self) -> None:
+        """Sends pending writes (e.g. to get generated ids) without committing."""
+        await self.session.flush()
+
+    async def commit(self) -> None:
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.rollback()
+            raise
+
+        await read_your_writes.remember(self.session)
+        callbacks: List[Callable[[], Awaitable[None]]] = self.session.info.pop(ON_COMMIT, [])
+        for callback in callbacks:
+            await callback()
+
+    async def rollback(self) -> None:
+        self.session.info.pop(ON_COMMIT, None)
+        # rolled back objects are expired; don't hand them out again
+        self.session.info.pop(LOADER, None)
+        await self.session.rollback()
+
+
+async def get_uow(session: AsyncSession = Depends(get_session)) -> AsyncGenerator[UnitOfWork, None]:
+    uow = UnitOfWork(session)
+    try:
+        yield uow
+    finally:
+        # FastAPI runs this after the response has been sent, so it can't
+        # commit on the handler's behalf: whatever wasn't committed is dropped
+        if session.in_transaction():
+            await uow.rollback()
@@ -1,16 +1,17 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from src.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.session import get_session, read_your_writes
 from src.models.user import User
+from src.repositories.user import UserRepository
 from src.core.config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_session)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,7 +26,8 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    await read_your_writes.identify(session, f"username:{username}")
+    user = await UserRepository(db=session).get_principal(username=username)
     if user is None:
         raise credentials_exception
     return user
@@ -35,4 +37,4 @@ async def get_current_active_user(
 ) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
@@ -0,0 +1,21 @@
+from abc import ABCMeta, abstractmethod
+from typing import Optional
+
+
+class ICacheBackend(metaclass=ABCMeta):
+    """Class representing a cache shared between workers."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached value or None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        """Store a value for `ttl` seconds."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Drop the given keys."""
+        raise NotImplementedError
@@ -0,0 +1,23 @@
+from abc import ABCMeta, abstractmethod
+from typing import Awaitable, Callable
+
+MessageHandler = Callable[[str, str], Awaitable[None]]
+
+
+class IPubSub(metaclass=ABCMeta):
+    """Class representing a chat message bus shared by all workers."""
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler) -> None:
+        """Subscribe; `handler(room, message)` is called for every published message."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def publish(self, room: str, message: str) -> None:
+        """Send a message to every subscriber, this process included."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Unsubscribe and release connections."""
+        raise NotImplementedError
@@ -1,17 +1,94 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
-from src.routers import users, products, categories, orders, cart, chat, static
-from src.database import engine, Base
+from src.routers import users, products, categories, orders, cart, chat, static, metrics
+from src.routers.chat import manager as chat_manager
+from src.routers.metrics import record_startup
+from src.api.routes import api_router
+from src.db.engine import check_connection_budget
+from src.db.session import engine, replicas, schema_revisions
+from src.repositories.contact import email_dispatcher
+from src.repositories.interests import interest_resolver
+from src.repositories.menu import menu_snapshot
 from src.core.config import settings
-from src.core.logger import setup_logging
+from src.core.logger import log_pipeline, setup_logging
+from src.core.metrics import MetricsMiddleware, metrics_store
+from src.core.security import password_hasher
 from src.core.exceptions import BaseAPIException
+from src.core.startup import StartupError, StartupTimer
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def check_schema(strict: bool) -> None:
+    """The schema comes from `alembic upgrade head` only; warn (or fail in --check) when it's behind."""
+    try:
+        current, expected = await schema_revisions()
+    except Exception as exc:
+        if strict:
+            raise StartupError(f"Database is unreachable: {exc}") from exc
+        logger.warning("Database is unreachable on startup: %s", exc)
+        return
+
+    if current != expected:
+        message = "Database schema is at %s, the code expects %s; run `alembic upgrade head`" % (
+            ", ".join(sorted(current)) or "no revision", ", ".join(sorted(expected)),
+        )
+        if strict:
+            raise StartupError(message)
+        logger.warning(message)
+
+
+async def start(strict: bool = False) -> StartupTimer:
+    timer = StartupTimer()
+
+    async with timer.phase("logging"):
+        setup_logging()
+    async with timer.phase("database"):
+        check_connection_budget()
+        await check_schema(strict)
+    async with timer.phase("replicas"):
+        await replicas.start()
+    async with timer.phase("workers"):
+        await email_dispatcher.start()
+        await chat_manager.start()
+        await metrics_store.start()
+    async with timer.phase("menu_snapshot"):
+        await menu_snapshot.start()
+    async with timer.phase("interests"):
+        await interest_resolver.start()
+
+    logger.info("Worker ready in %.1f ms", timer.total * 1000)
+    return timer
+
 
-# Setup logging
-setup_logging()
+async def stop() -> None:
+    await metrics_store.stop()
+    await menu_snapshot.stop()
+    await chat_manager.stop()
+    await email_dispatcher.stop()
+    password_hasher.shutdown()
+    await replicas.stop()
+    await engine.dispose()
+    log_pipeline.stop()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    timer = await start()
+    app.state.startup = timer.report()
+    record_startup(app.state.startup)
+    yield
+    await stop()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -19,6 +96,7 @@ app = FastAPI(
     version=settings.VERSION,
     docs_url=f"/{settings.API_PREFIX}/docs",
     openapi_url=f"/{settings.API_PREFIX}/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -29,6 +107,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request counts, latency and queries per route, exported on /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(users, prefix=f"/{settings.API_PREFIX}", tags=["users"])
@@ -38,6 +118,8 @@ app.include_router(orders, prefix=f"/{settings.API_PREFIX}", tags=["orders"])
 app.include_router(cart, prefix=f"/{settings.API_PREFIX}", tags=["cart"])
 app.include_router(chat, prefix=f"/{settings.API_PREFIX}", tags=["chat"])
 app.include_router(static, prefix=f"/{settings.API_PREFIX}", tags=["static"])
+app.include_router(api_router, prefix=f"/{settings.API_PREFIX}/v1")
+app.include_router(metrics, tags=["metrics"])
 
 @app.get("/")
 async def root():
@@ -45,12 +127,17 @@ async def root():
 
 @app.exception_handler(BaseAPIException)
 async def api_exception_handler(request: Request, exc: BaseAPIException):
+    content = {
+        "status": "error",
+        "message": exc.detail
+    }
+    if getattr(exc, "data", None) is not None:
+        content["data"] = exc.data
     return JSONResponse(
         status_code=exc.status_code,
-        content={
-            "status": "error",
-            "message": exc.detail
-        }
+        content=content,
+        # e.g. Retry-After on 503
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -63,6 +150,31 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
+async def check() -> int:
+    """
+    --check: runs the startup pipeline once, strictly (an unreachable
+    database or a schema behind the migrations is an error), prints the
+    phase timings as JSON and exits non-zero on failure.
+    """
+    try:
+        timer = await start(strict=True)
+    except StartupError as exc:
+        print(json.dumps({"status": "error", "message": str(exc)}))
+        await stop()
+        return 1
+
+    await stop()
+    print(json.dumps({"status": "ok", "phases": timer.report()}))
+    return 0
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=settings.PROJECT_NAME)
+    parser.add_argument("--check", action="store_true", help="run the startup phases once and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(asyncio.run(check()))
+
     import uvicorn
-    uvicorn.run("main:app", reload=True)
\ No newline at end of file
+    uvicorn.run("src.main:app", reload=True)
\ No newline at end of file
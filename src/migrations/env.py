@@ -11,18 +11,28 @@ sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 
 from src.core.config import settings  # noqa
 from src.models import *  # noqa
+from src.models.base import Base  # noqa
 
 config = context.config
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-target_metadata = SQLModel.metadata
+# legacy declarative models and the sqlmodel ones (questionnaire) share the database
+target_metadata = [Base.metadata, SQLModel.metadata]
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # skip indexes declared for another dialect (e.g. trigram GIN on SQLite)
+    ddl_if = getattr(object, "_ddl_if", None)
+    if type_ == "index" and ddl_if is not None and ddl_if.dialect:
+        return context.get_context().dialect.name == ddl_if.dialect
+    return True
 
 def run_migrations_offline() -> None:
     context.configure(
         url=settings.DATABASE_URL,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -31,7 +41,11 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
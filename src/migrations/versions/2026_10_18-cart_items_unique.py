@@ -0,0 +1,69 @@
+"""cart items unique, created_at indexes
+
+Revision ID: 9d2e7a4c5b13
+Revises: f631b71a9548
+Create Date: 2026-10-18 14:02:37.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2e7a4c5b13'
+down_revision = 'f631b71a9548'
+branch_labels = None
+depends_on = None
+
+CREATED_AT_TABLES = ['categories', 'users', 'carts', 'orders', 'products', 'cart_items', 'order_items']
+
+# the name Postgres gives UniqueConstraint("cart_id", "product_id") on create_all
+CART_ITEMS_UNIQUE = 'cart_items_cart_id_product_id_key'
+
+
+def upgrade() -> None:
+    # databases created before migrations were stamped at the initial revision,
+    # so check what is already there instead of assuming
+    inspector = sa.inspect(op.get_bind())
+
+    for table in CREATED_AT_TABLES:
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if op.f(f'ix_{table}_created_at') not in indexes:
+            op.create_index(op.f(f'ix_{table}_created_at'), table, ['created_at'], unique=False)
+
+    unique = {tuple(constraint['column_names']) for constraint in inspector.get_unique_constraints('cart_items')}
+    if ('cart_id', 'product_id') in unique:
+        return
+
+    # fold duplicate rows into the oldest one before the constraint can go on
+    op.execute(
+        'UPDATE cart_items SET quantity = ('
+        ' SELECT SUM(COALESCE(dup.quantity, 1)) FROM cart_items AS dup'
+        ' WHERE dup.cart_id = cart_items.cart_id AND dup.product_id = cart_items.product_id'
+        ') WHERE id IN ('
+        ' SELECT MIN(id) FROM cart_items'
+        ' WHERE cart_id IS NOT NULL AND product_id IS NOT NULL'
+        ' GROUP BY cart_id, product_id HAVING COUNT(*) > 1'
+        ')'
+    )
+    op.execute(
+        'DELETE FROM cart_items'
+        ' WHERE cart_id IS NOT NULL AND product_id IS NOT NULL AND id NOT IN ('
+        ' SELECT MIN(id) FROM cart_items'
+        ' WHERE cart_id IS NOT NULL AND product_id IS NOT NULL'
+        ' GROUP BY cart_id, product_id'
+        ')'
+    )
+
+    # SQLite can't add a constraint in place, batch mode rebuilds the table
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.create_unique_constraint(CART_ITEMS_UNIQUE, ['cart_id', 'product_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('cart_items') as batch_op:
+        batch_op.drop_constraint(CART_ITEMS_UNIQUE, type_='unique')
+
+    for table in reversed(CREATED_AT_TABLES):
+        op.drop_index(op.f(f'ix_{table}_created_at'), table_name=table)
@@ -0,0 +1,41 @@
+"""product trigram search
+
+Revision ID: 3b9e4c1d7a52
+Revises: f8cac0458bb3
+Create Date: 2026-10-18 13:20:11.482903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e4c1d7a52'
+down_revision = 'f8cac0458bb3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pg_trgm and GIN exist only on Postgres; SQLite runs use the in-memory index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_products_name_trgm', 'products', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_products_description_trgm', 'products', ['description'], unique=False,
+        postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_products_description_trgm', table_name='products')
+    op.drop_index('ix_products_name_trgm', table_name='products')
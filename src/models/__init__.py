@@ -4,6 +4,9 @@ from .category import Category
 from .cart import Cart, CartItem
 from .order import Order, OrderItem, OrderStatus
 from .base import BaseModel
+from .question import Question
+from .answer import Answer
+from .selected_answer import SelectedAnswer
 
 __all__ = [
     'User', 'UserRole',
@@ -11,5 +14,6 @@ __all__ = [
     'Category',
     'Cart', 'CartItem',
     'Order', 'OrderItem', 'OrderStatus',
-    'BaseModel'
+    'BaseModel',
+    'Question', 'Answer', 'SelectedAnswer',
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float
+from sqlalchemy import Column, Integer, ForeignKey, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from src.models.base import BaseModel
 
@@ -13,6 +13,8 @@ class Cart(BaseModel):
 
 class CartItem(BaseModel):
     __tablename__ = "cart_items"
+    # one row per product: adding it again bumps the quantity (upsert target)
+    __table_args__ = (UniqueConstraint("cart_id", "product_id"),)
 
     cart_id = Column(Integer, ForeignKey("carts.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
@@ -1,9 +1,20 @@
-from sqlalchemy import Column, String, Text, Float, ForeignKey, Integer
+from sqlalchemy import Column, String, Text, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 from src.models.base import BaseModel
 
 class Product(BaseModel):
     __tablename__ = "products"
+    # trigram indexes for /products/search; need pg_trgm, so Postgres only
+    __table_args__ = (
+        Index(
+            "ix_products_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_products_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     name = Column(String, index=True)
     description = Column(Text, nullable=True)
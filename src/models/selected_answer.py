@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+import sqlalchemy as sa
+from sqlmodel import SQLModel, Field, Relationship
+
+
+class SelectedAnswerBase(SQLModel):
+    # users live in the declarative metadata, so no FK constraint across metadatas
+    user_id: int = Field(..., index=True, description="User who answered")
+    question_id: int = Field(..., foreign_key="question.id", index=True, description="Question answered")
+    answer_id: Optional[int] = Field(default=None, foreign_key="answer.id", description="Chosen answer")
+    custom_answer: Optional[str] = Field(default=None, description="Chosen answer ids as CSV, or free text")
+
+
+class SelectedAnswer(SelectedAnswerBase, table=True):
+    __tablename__ = "selected_answer"
+
+    id: Optional[int] = Field(default=None, primary_key=True, index=True)
+
+    # Relationships
+    question: "Question" = Relationship(back_populates="selected_answers")
+    answer: Optional["Answer"] = Relationship(back_populates="selected_answers")
+
+    # Timestamps
+    created_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_type=sa.DateTime(timezone=True),
+        sa_column_kwargs={"server_default": sa.func.now()},
+        nullable=False,
+        description="Time when the record was created"
+    )
@@ -1,22 +1,20 @@
 from datetime import datetime, timedelta
 
 import jwt
-from passlib.context import CryptContext
 from pydantic import EmailStr
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.config import settings
+from src.core.security import get_password_hash, verify_password as _verify_password
 from src.repositories.user import UserRepository as UserServices
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+async def hash_password(password: str) -> str:
+    return await get_password_hash(password)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
 
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _verify_password(password, hashed_password)
 
 
 def create_access_token(data: dict):
@@ -0,0 +1,103 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, literal, update
+from sqlmodel import select
+
+from src.models.cart import Cart, CartItem
+from src.models.product import Product
+from src.repositories.sqlalchemy import BaseSQLAlchemyRepository
+from src.schemas.cart import SCartCreate, SCartUpdate
+
+
+class CartRepository(BaseSQLAlchemyRepository[Cart, SCartCreate, SCartUpdate]):
+    _model = Cart
+
+    async def get_for_user(self, user_id: int) -> Optional[Cart]:
+        query = select(Cart).filter_by(user_id=user_id)
+        response = await self.db.execute(query)
+        return response.scalars().first()
+
+    async def get_or_create_for_user(self, user_id: int) -> Cart:
+        cart = await self.get_for_user(user_id)
+        if cart:
+            return cart
+
+        return await self.create(SCartCreate(user_id=user_id), flush=True)
+
+    async def items(self, cart_id: int) -> List[CartItem]:
+        query = select(CartItem).filter_by(cart_id=cart_id)
+        response = await self.db.execute(query)
+        return response.scalars().all()
+
+    async def get_item(self, cart_id: int, **kwargs) -> Optional[CartItem]:
+        query = select(CartItem).filter_by(cart_id=cart_id, **kwargs)
+        response = await self.db.execute(query)
+        return response.scalars().first()
+
+    async def add_item(self, cart: Cart, product_id: int, quantity: int) -> Optional[CartItem]:
+        """
+        Adds `quantity` of a product to the cart with one upsert: the price
+        is copied from products in the same statement, and an existing row
+        for the product only gets its quantity bumped. The cart total moves
+        by price * quantity instead of being summed over all items.
+        Returns None when the product doesn't exist.
+        """
+        now = datetime.utcnow()
+        insert = self._insert(CartItem).from_select(
+            ["cart_id", "product_id", "quantity", "price", "created_at", "updated_at"],
+            select(
+                literal(cart.id),
+                Product.id,
+                literal(quantity),
+                Product.price,
+                literal(now),
+                literal(now),
+            ).where(Product.id == product_id),
+        )
+        query = insert.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.product_id],
+            set_={
+                "quantity": CartItem.quantity + insert.excluded.quantity,
+                "updated_at": now,
+            },
+        ).returning(CartItem)
+
+        response = await self.db.execute(
+            query, execution_options={"populate_existing": True}
+        )
+        cart_item = response.scalars().first()
+        if cart_item is None:
+            return None
+
+        await self._change_total(cart, cart_item.price * quantity)
+        return cart_item
+
+    async def remove_item(self, cart: Cart, item_id: int) -> bool:
+        """Deletes a cart row and takes its amount off the total; False if it wasn't in the cart."""
+        query = (
+            delete(CartItem)
+            .where(CartItem.id == item_id, CartItem.cart_id == cart.id)
+            .returning(CartItem.price, CartItem.quantity)
+        )
+        row = (await self.db.execute(query)).first()
+        if row is None:
+            return False
+
+        await self._change_total(cart, -row.price * row.quantity)
+        return True
+
+    async def clear(self, cart: Cart) -> None:
+        await self.db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        cart.total_amount = 0.0
+
+    async def _change_total(self, cart: Cart, delta: float) -> None:
+        # applied in SQL so concurrent requests on the same cart add up
+        query = (
+            update(Cart)
+            .where(Cart.id == cart.id)
+            .values(total_amount=func.coalesce(Cart.total_amount, 0) + delta)
+            .returning(Cart.total_amount)
+            .execution_options(synchronize_session=False)
+        )
+        cart.total_amount = (await self.db.execute(query)).scalar_one()
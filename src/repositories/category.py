@@ -0,0 +1,7 @@
+from src.models.category import Category
+from src.repositories.sqlalchemy import BaseSQLAlchemyRepository
+from src.schemas.category import SCategoryCreate, SCategoryUpdate
+
+
+class CategoryRepository(BaseSQLAlchemyRepository[Category, SCategoryCreate, SCategoryUpdate]):
+    _model = Category
@@ -1,11 +1,26 @@
-import fastapi
+import asyncio
+import logging
+import os
+import shutil
 import smtplib
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Set
 
+from fastapi import UploadFile
 from pydantic import BaseModel
+from email.errors import MessageError
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
+from starlette.concurrency import run_in_threadpool
+
 from src.core.config import settings
+from src.core.exceptions import ServiceUnavailableException
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 class EmailRequest(BaseModel):
@@ -13,29 +28,291 @@ class EmailRequest(BaseModel):
     email: str
 
 
-def send_email(body, email, attachment=None, filename=None):
-    sender_email = settings.SENDER_EMAIL
-    sender_password = settings.SENDER_PASSWORD
-    recipient_email = settings.RECIPIENT_EMAIL
+@dataclass
+class OutgoingEmail:
+    body: str
+    email: str
+    attachment_path: Optional[str] = None
+    filename: Optional[str] = None
+    attempts: int = 0
+    sent: bool = False
+
+
+class SMTPConnection:
+    """
+    One long-lived SMTP session, reopened when the server drops it.
+    Blocking: only use it from the dispatcher's worker thread.
+    """
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            user: Optional[str] = None,
+            password: Optional[str] = None,
+            starttls: bool = True,
+            timeout: float = 30,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        return server
+
+    def _alive(self) -> bool:
+        try:
+            return self._server is not None and self._server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+
+    def send(self, msg: MIMEMultipart) -> None:
+        if not self._alive():
+            self.close()
+            self._server = self._connect()
+        self._server.send_message(msg)
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
 
+
+def build_message(job: OutgoingEmail, sender: str, recipient: str) -> MIMEMultipart:
     msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = recipient_email
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Reply-To'] = job.email
 
-    msg.attach(MIMEText(body, 'plain'))
+    msg.attach(MIMEText(job.body, 'plain'))
 
-    if attachment and filename:
-        part = MIMEApplication(attachment, Name=filename)
-        part['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if job.attachment_path and job.filename:
+        with open(job.attachment_path, 'rb') as attachment:
+            part = MIMEApplication(attachment.read(), Name=job.filename)
+        part['Content-Disposition'] = f'attachment; filename="{job.filename}"'
         msg.attach(part)
 
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-    except Exception as exc:
-        raise fastapi.HTTPException(
-            status_code=500,
-            detail=str(exc)
-        )
+    return msg
+
+
+class EmailDispatcher:
+    """
+    Queues contact-us messages and sends them in the background over a
+    persistent SMTP connection. Attachments are spooled to disk until
+    sent. Failed messages are retried with exponential backoff.
+    """
+
+    def __init__(
+            self,
+            connection: SMTPConnection,
+            sender: str,
+            recipient: str,
+            queue_size: int = 100,
+            batch_size: int = 20,
+            max_retries: int = 5,
+            retry_backoff: float = 2.0,
+            spool_dir: Optional[str] = None,
+    ) -> None:
+        self.connection = connection
+        self.sender = sender
+        self.recipient = recipient
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spool_dir = spool_dir or os.path.join(tempfile.gettempdir(), "contact-spool")
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._retries: Set[asyncio.TimerHandle] = set()
+        # smtplib blocks, so the connection lives on its own thread
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        if not self.running:
+            return
+
+        if self._retries:
+            logger.warning("Dropping %s emails waiting for a retry", len(self._retries))
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email queue not drained on shutdown, %s messages left", self._queue.qsize())
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.connection.close)
+        self._executor.shutdown(wait=False)
+        self._worker = None
+
+    async def enqueue(self, body: str, email: str, file: Optional[UploadFile] = None) -> None:
+        await self.start()
+
+        if self._queue.full():
+            raise ServiceUnavailableException("Too many messages in the queue, retry shortly")
+
+        job = OutgoingEmail(body=body, email=email)
+        if file is not None and file.filename:
+            job.attachment_path = await run_in_threadpool(self._spool, file)
+            job.filename = file.filename
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._discard(job)
+            raise ServiceUnavailableException("Too many messages in the queue, retry shortly")
+
+    def _spool(self, file: UploadFile) -> str:
+        path = os.path.join(self.spool_dir, uuid.uuid4().hex)
+        with open(path, 'wb') as spooled:
+            shutil.copyfileobj(file.file, spooled)
+        return path
+
+    def _discard(self, job: OutgoingEmail) -> None:
+        if job.attachment_path:
+            try:
+                os.remove(job.attachment_path)
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                logger.warning("Spooled attachment %s not removed: %s", job.attachment_path, exc)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                failed = await loop.run_in_executor(self._executor, self._send_batch, batch)
+                for job in failed:
+                    self._retry(job)
+            except Exception as exc:
+                logger.error("Email batch crashed: %s", exc)
+                for job in batch:
+                    if not job.sent:
+                        self._retry(job)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _send_batch(self, batch: List[OutgoingEmail]) -> List[OutgoingEmail]:
+        failed = []
+        for job in batch:
+            try:
+                msg = build_message(job, self.sender, self.recipient)
+            except OSError as exc:
+                # the spooled attachment is gone or unreadable; retrying won't bring it back
+                logger.error("Dropping email from %r, its attachment can't be read: %s", job.email, exc)
+                self.failed += 1
+                self._discard(job)
+                continue
+
+            try:
+                self.connection.send(msg)
+            except MessageError as exc:
+                # a malformed message (e.g. a header with a newline in it)
+                # won't get any better on a retry
+                logger.error("Dropping email from %r, it can't be built: %s", job.email, exc)
+                self.failed += 1
+                self._discard(job)
+                continue
+            except Exception as exc:
+                logger.warning("Sending email from %s failed: %s", job.email, exc)
+                # drop the session, the next message reconnects
+                self.connection.close()
+                failed.append(job)
+                continue
+
+            job.sent = True
+            self.sent += 1
+            self._discard(job)
+        return failed
+
+    def _retry(self, job: OutgoingEmail) -> None:
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self.failed += 1
+            logger.error("Giving up on email from %s after %s attempts", job.email, job.attempts)
+            self._discard(job)
+            return
+
+        self.retried += 1
+        delay = self.retry_backoff * 2 ** (job.attempts - 1)
+
+        def requeue() -> None:
+            self._retries.discard(handle)
+            self._requeue(job)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retries.add(handle)
+
+    def _requeue(self, job: OutgoingEmail) -> None:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._retry(job)
+
+    def metrics(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+
+email_dispatcher = EmailDispatcher(
+    connection=SMTPConnection(
+        host=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        starttls=settings.SMTP_STARTTLS,
+    ),
+    sender=settings.SMTP_USER,
+    recipient=settings.RECIPIENT_EMAIL,
+    queue_size=settings.EMAIL_QUEUE_SIZE,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    spool_dir=settings.EMAIL_SPOOL_DIR,
+)
@@ -7,8 +7,9 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 
 from src.core.config import settings
-from src.core.exceptions import NotValidCredentialsException
-from src.db.session import get_session
+from src.core.exceptions import NotAuthorizedException, NotValidCredentialsException
+from src.db.session import get_session, read_your_writes
+from src.models.user import UserRole
 from src.repositories.user import UserRepository as UserServices
 
 bearer = HTTPBearer()
@@ -37,9 +38,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
                 detail="Could not validate credentials"
             )
 
-        # Get user from database
+        # Users who just wrote read from the primary until the replicas catch up
+        await read_your_writes.identify(session, f"id:{user_id}")
+
+        # Get user from the principal cache or the database
         user_repo = UserServices(db=session)
-        user = await user_repo.get(id=int(user_id))
+        user = await user_repo.get_principal(id=int(user_id))
 
         if not user:
             raise HTTPException(
@@ -58,3 +62,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
+
+
+async def get_current_admin(user=Depends(get_current_user)):
+    if user.role != UserRole.ADMIN:
+        raise NotAuthorizedException()
+    return user
@@ -0,0 +1,124 @@
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.core.config import settings
+from src.db.session import SessionLocal
+from src.models.answer import Answer
+from src.models.question import Question
+from src.models.selected_answer import SelectedAnswer
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+GAME_THEMES_QUESTION = "What kind of game themes might your child enjoy?"
+
+CHILD_LEVELS = {
+    2: "Toddler",
+    3: "PreK1",
+    4: "PreK2",
+    5: "Kindergarten",
+    6: "Grade",
+}
+
+
+def parse_answer_ids(custom_answer: Optional[str]) -> Set[int]:
+    """'3, 5,7' -> {3, 5, 7}; free-text tokens are ignored."""
+    if not custom_answer:
+        return set()
+    return {int(token) for token in custom_answer.replace(" ", "").split(",") if token.isdigit()}
+
+
+class InterestResolver:
+    """
+    Turns a user's answer to the game themes question into answer texts.
+    The question id is looked up once, the answers of that question are
+    kept as an id -> text map, and a page of users needs one query for
+    their selections. Both are dropped after questionnaire writes on this
+    worker and expire after `ttl` elsewhere.
+    """
+
+    def __init__(
+            self,
+            question_text: str,
+            session_factory: Callable[[], AsyncSession],
+            ttl: float = 3600,
+    ) -> None:
+        self.question_text = question_text
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.question_id: Optional[int] = None
+        self._answers: Optional[Dict[int, str]] = None
+        self._loaded_at = 0.0
+
+    async def start(self) -> None:
+        try:
+            async with self.session_factory() as session:
+                await self.answers(session)
+        except Exception as exc:
+            logger.warning("Interest answers not loaded on startup: %s", exc)
+
+    def invalidate(self) -> None:
+        self.question_id = None
+        self._answers = None
+
+    async def answers(self, session: AsyncSession) -> Dict[int, str]:
+        if self._answers is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return self._answers
+
+        if self.question_id is None:
+            response = await session.execute(
+                select(Question.__table__.c.id).where(Question.__table__.c.question_text == self.question_text)
+            )
+            self.question_id = response.scalar_one_or_none()
+            if self.question_id is None:
+                return {}
+
+        answer = Answer.__table__
+        response = await session.execute(
+            select(answer.c.id, answer.c.answer_text)
+            .where(answer.c.question_id == self.question_id)
+            .order_by(answer.c.id)
+        )
+        self._answers = dict(response.all())
+        self._loaded_at = time.monotonic()
+        return self._answers
+
+    async def resolve(
+            self,
+            session: AsyncSession,
+            user_ids: Iterable[int],
+    ) -> Dict[int, Tuple[List[str], List[str]]]:
+        """user id -> (interests, selected_interests) for the users that answered."""
+        answers = await self.answers(session)
+        user_ids = list(user_ids)
+        if not answers or not user_ids:
+            return {}
+
+        selected = SelectedAnswer.__table__
+        response = await session.execute(
+            select(selected.c.user_id, selected.c.custom_answer)
+            .where(selected.c.question_id == self.question_id, selected.c.user_id.in_(user_ids))
+            .order_by(selected.c.id)
+        )
+
+        resolved = {}
+        for user_id, custom_answer in response.all():
+            if user_id in resolved or not custom_answer:
+                continue
+            texts = [answers[id] for id in sorted(parse_answer_ids(custom_answer)) if id in answers]
+            # a single id is the one interest, a list comes from the multi-select step
+            if custom_answer.isdigit():
+                resolved[user_id] = (texts, [])
+            else:
+                resolved[user_id] = ([], texts)
+        return resolved
+
+
+interest_resolver = InterestResolver(
+    question_text=GAME_THEMES_QUESTION,
+    session_factory=SessionLocal,
+    ttl=settings.QUESTIONNAIRE_CACHE_TTL,
+)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.core.config import settings
+from src.core.etag import compute_etag
+from src.core.pubsub import build_pubsub
+from src.db.session import SessionLocal
+from src.interfaces.pubsub import IPubSub
+from src.models.category import Category
+from src.models.product import Product
+from src.schemas.category import SCategoryRead, SMenuCategoryRead
+from src.schemas.common import IGetResponseBase
+from src.schemas.product import SProductRead
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+MENU_ROOM = "menu"
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Pre-serialized bodies of GET /menu and GET /categories with their ETags."""
+
+    menu: str
+    menu_etag: str
+    categories: str
+    categories_etag: str
+    built_at: datetime
+
+
+class MenuSnapshot:
+    """
+    Keeps the whole Category -> Product tree in memory as ready-to-send
+    JSON. Readers get whatever snapshot is current; a rebuild assembles a
+    new one off to the side and swaps the reference, so nobody ever sees
+    a half-built menu. Admin writes call changed(), which tells every
+    worker (through pub/sub) to rebuild in the background; writes that
+    land during a rebuild trigger one more.
+
+    Other per-worker caches use the same channel: subscribe() a handler
+    to a room, and publish() the room after a write to run it everywhere.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            pubsub: Optional[IPubSub] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.pubsub = pubsub
+        self._snapshot: Optional[Snapshot] = None
+        self._stale = False
+        self._rebuild: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # room -> handlers run on every worker when the room is published
+        self._listeners: Dict[str, List[Callable[[], None]]] = {}
+
+        self.builds = 0
+
+    async def start(self) -> None:
+        self._lock = asyncio.Lock()
+        if self.pubsub is not None:
+            await self.pubsub.start(self._on_message)
+
+        try:
+            await self.rebuild()
+        except Exception as exc:
+            # e.g. schema not migrated yet: the first request builds it instead
+            logger.warning("Menu snapshot not built on startup: %s", exc)
+
+    async def stop(self) -> None:
+        if self._rebuild is not None:
+            self._rebuild.cancel()
+            self._rebuild = None
+        if self.pubsub is not None:
+            await self.pubsub.stop()
+        self._lock = None
+
+    def clear(self) -> None:
+        """Forgets the current snapshot; the next get() builds a fresh one."""
+        self._snapshot = None
+
+    async def get(self) -> Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._snapshot is None:
+                await self.rebuild()
+        return self._snapshot
+
+    async def changed(self) -> None:
+        """Called after admin writes to products or categories."""
+        if self.pubsub is None:
+            self.schedule_rebuild()
+            self._notify(MENU_ROOM)
+        else:
+            await self.pubsub.publish(MENU_ROOM, "rebuild")
+
+    def subscribe(self, room: str, handler: Callable[[], None]) -> None:
+        self._listeners.setdefault(room, []).append(handler)
+
+    async def publish(self, room: str) -> None:
+        """Runs the handlers subscribed to `room` on every worker, this one included."""
+        if self.pubsub is None:
+            self._notify(room)
+        else:
+            await self.pubsub.publish(room, "invalidate")
+
+    async def _on_message(self, room: str, message: str) -> None:
+        if room == MENU_ROOM:
+            self.schedule_rebuild()
+        self._notify(room)
+
+    def _notify(self, room: str) -> None:
+        for handler in self._listeners.get(room, ()):
+            try:
+                handler()
+            except Exception as exc:
+                logger.error("Invalidation handler for %s failed: %s", room, exc)
+
+    def schedule_rebuild(self) -> None:
+        self._stale = True
+        if self._rebuild is None or self._rebuild.done():
+            self._rebuild = asyncio.create_task(self._rebuild_loop())
+
+    async def _rebuild_loop(self) -> None:
+        while self._stale:
+            self._stale = False
+            try:
+                await self.rebuild()
+            except Exception as exc:
+                logger.error("Menu snapshot rebuild failed, serving the previous one: %s", exc)
+
+    async def rebuild(self) -> Snapshot:
+        async with self.session_factory() as session:
+            categories = (await session.execute(
+                select(Category).order_by(Category.name, Category.id)
+            )).scalars().all()
+            products = (await session.execute(
+                select(Product).order_by(Product.name, Product.id)
+            )).scalars().all()
+
+        by_category: Dict[int, List[SProductRead]] = {}
+        for product in products:
+            by_category.setdefault(product.category_id, []).append(SProductRead.model_validate(product))
+
+        categories_read = [SCategoryRead.model_validate(category) for category in categories]
+        built_at = datetime.utcnow()
+        meta = {"built_at": built_at.isoformat()}
+
+        menu = IGetResponseBase[List[SMenuCategoryRead]](
+            data=[
+                SMenuCategoryRead(**category.model_dump(), products=by_category.get(category.id, []))
+                for category in categories_read
+            ],
+            meta=meta,
+        ).model_dump_json()
+        categories_body = IGetResponseBase[List[SCategoryRead]](
+            data=categories_read,
+            meta=meta,
+        ).model_dump_json()
+
+        snapshot = Snapshot(
+            menu=menu,
+            menu_etag=compute_etag(menu),
+            categories=categories_body,
+            categories_etag=compute_etag(categories_body),
+            built_at=built_at,
+        )
+        # single reference assignment: readers see the old or the new menu, never a mix
+        self._snapshot = snapshot
+        self.builds += 1
+        logger.info("Menu snapshot rebuilt: %s categories, %s products", len(categories), len(products))
+        return snapshot
+
+
+menu_snapshot = MenuSnapshot(
+    session_factory=SessionLocal,
+    pubsub=build_pubsub(settings.MENU_BACKEND, settings.DATABASE_URL, channel="menu"),
+)
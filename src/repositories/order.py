@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, literal, update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select
+
+from src.models.cart import Cart, CartItem
+from src.models.order import Order, OrderItem, OrderStatus
+from src.repositories.sqlalchemy import BaseSQLAlchemyRepository
+from src.schemas.order import SOrderCreate, SOrderUpdate
+
+
+class OrderRepository(BaseSQLAlchemyRepository[Order, SOrderCreate, SOrderUpdate]):
+    _model = Order
+
+    async def create_from_cart(
+            self,
+            cart: Cart,
+            delivery_address: str,
+            phone_number: str,
+    ) -> Optional[Order]:
+        """
+        Turns the cart into an order without loading the cart items: the
+        order is inserted from an aggregate over cart_items, its rows are
+        copied with INSERT ... SELECT, and the cart is emptied. All of it
+        lands in the caller's unit of work, so it commits or rolls back as
+        one. The cart row is locked first, so two checkouts of the same
+        cart can't both copy its items. Returns the order with its items
+        loaded, or None when the cart is empty.
+        """
+        # held until the unit of work ends; SQLite ignores it, its writers are serialized anyway
+        await self.db.execute(select(Cart.id).where(Cart.id == cart.id).with_for_update())
+
+        now = datetime.utcnow()
+        query = self._insert(Order).from_select(
+            ["user_id", "status", "total_amount", "delivery_address",
+             "phone_number", "created_at", "updated_at"],
+            select(
+                literal(cart.user_id),
+                literal(OrderStatus.PENDING, Order.__table__.c.status.type),
+                func.sum(CartItem.price * CartItem.quantity),
+                literal(delivery_address),
+                literal(phone_number),
+                literal(now),
+                literal(now),
+            )
+            .where(CartItem.cart_id == cart.id)
+            .having(func.count(CartItem.id) > 0),
+        ).returning(Order)
+        order = (await self.db.execute(query)).scalars().first()
+        if order is None:
+            return None
+
+        query = self._insert(OrderItem).from_select(
+            ["order_id", "product_id", "quantity", "price", "created_at", "updated_at"],
+            select(
+                literal(order.id),
+                CartItem.product_id,
+                CartItem.quantity,
+                CartItem.price,
+                literal(now),
+                literal(now),
+            ).where(CartItem.cart_id == cart.id),
+        ).returning(OrderItem)
+        items = (await self.db.execute(query)).scalars().all()
+
+        await self.db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        await self.db.execute(
+            update(Cart)
+            .where(Cart.id == cart.id)
+            .values(total_amount=0.0)
+            .execution_options(synchronize_session=False)
+        )
+
+        cart.total_amount = 0.0
+        set_committed_value(order, "items", items)
+        return order
@@ -0,0 +1,133 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, cast, func, literal, or_, tuple_
+from sqlmodel import select
+
+from src.core.cache import ResponseCache, build_backend
+from src.core.config import settings
+from src.core.exceptions import ValidationException
+from src.core.pagination import decode_cursor, encode_cursor
+from src.core.search import DESCRIPTION_WEIGHT, TrigramIndex
+from src.models.product import Product
+from src.repositories.menu import MENU_ROOM, menu_snapshot
+from src.repositories.sqlalchemy import BaseSQLAlchemyRepository
+from src.schemas.product import SProductCreate, SProductUpdate
+
+# Serialized GET /products pages, keyed by query string; dropped on product writes
+product_list_cache = ResponseCache(
+    namespace="products",
+    ttl=settings.CATALOG_CACHE_TTL,
+    maxsize=settings.CATALOG_CACHE_MAXSIZE,
+    backend=build_backend(settings.CACHE_URL),
+)
+
+# /products/search on databases without pg_trgm; rebuilt lazily after product writes
+product_search_index = TrigramIndex()
+
+
+def forget_catalog() -> None:
+    """Drops this worker's copies when any worker announces a catalog write."""
+    product_list_cache.forget()
+    product_search_index.invalidate()
+
+
+# catalog writes already publish the menu rebuild notice
+menu_snapshot.subscribe(MENU_ROOM, forget_catalog)
+
+
+class ProductRepository(BaseSQLAlchemyRepository[Product, SProductCreate, SProductUpdate]):
+    _model = Product
+
+    async def catalog(
+            self,
+            category_id: Optional[int] = None,
+            min_price: Optional[float] = None,
+            max_price: Optional[float] = None,
+            cursor: Optional[str] = None,
+            limit: int = 50,
+            sort_field: Optional[str] = None,
+            sort_order: Optional[str] = None,
+    ) -> Tuple[List[Product], Optional[str]]:
+        criteria = []
+        if min_price is not None:
+            criteria.append(Product.price >= min_price)
+        if max_price is not None:
+            criteria.append(Product.price <= max_price)
+
+        return await self.paginate(
+            cursor=cursor,
+            limit=limit,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            criteria=criteria,
+            category_id=category_id,
+        )
+
+    async def search(
+            self,
+            q: str,
+            cursor: Optional[str] = None,
+            limit: int = 20,
+    ) -> Tuple[List[Product], Optional[str]]:
+        """
+        Fuzzy search on name and description, best matches first. On
+        Postgres it's pg_trgm word similarity served by the GIN trigram
+        indexes, elsewhere the in-memory TrigramIndex. Pages are keyset
+        on (score, id), so the cursor works the same with both.
+        """
+        after = None
+        if cursor:
+            position = decode_cursor(cursor)
+            if position["f"] != "score":
+                raise ValidationException("Cursor was issued for a different listing")
+            after = (float(position["v"]), position["id"])
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            matches = await self._search_trigram(q, after, limit + 1)
+        else:
+            matches = await self._search_index(q, after, limit + 1)
+
+        next_cursor = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            score, last = matches[-1]
+            next_cursor = encode_cursor("score", "desc", score, last.id)
+
+        return [product for _, product in matches], next_cursor
+
+    async def _search_trigram(self, q: str, after, limit: int) -> List[Tuple[float, Product]]:
+        needle = literal(q)
+        score = cast(func.greatest(
+            func.word_similarity(needle, Product.name),
+            func.word_similarity(needle, func.coalesce(Product.description, "")) * DESCRIPTION_WEIGHT,
+        ), Float)
+
+        # <% is the indexable form of word_similarity() >= threshold
+        query = (
+            select(Product, score.label("score"))
+            .where(or_(needle.op("<%")(Product.name), needle.op("<%")(Product.description)))
+            .order_by(score.desc(), Product.id.desc())
+            .limit(limit)
+        )
+        if after:
+            query = query.where(tuple_(score, Product.id) < tuple_(literal(after[0], Float), literal(after[1])))
+
+        response = await self.db.execute(query)
+        return [(row.score, row.Product) for row in response]
+
+    async def _search_index(self, q: str, after, limit: int) -> List[Tuple[float, Product]]:
+        if not product_search_index.ready:
+            response = await self.db.execute(select(Product.id, Product.name, Product.description))
+            product_search_index.build(response.all())
+
+        matches = product_search_index.search(q)
+        if after:
+            matches = [(score, id) for score, id in matches if (score, id) < after]
+        matches = matches[:limit]
+        if not matches:
+            return []
+
+        response = await self.db.execute(select(Product).where(Product.id.in_([id for _, id in matches])))
+        products = {product.id: product for product in response.scalars()}
+        # a product deleted since the index was built just drops out
+        return [(score, products[id]) for score, id in matches if id in products]
@@ -1,7 +1,83 @@
+from typing import Any, Dict, List
+
+from sqlmodel import select
+
+from src.core.cache import ResponseCache, build_backend
+from src.core.config import settings
+from src.models.answer import Answer
 from src.models.question import Question
+from src.repositories.interests import interest_resolver
+from src.repositories.menu import menu_snapshot
 from src.repositories.sqlalchemy import BaseSQLAlchemyRepository
 from src.schemas.question import SQuestionCreate, SQuestionUpdate
 
+# Serialized GET /question body; dropped on any question or answer write
+questionnaire_cache = ResponseCache(
+    namespace="questionnaire",
+    ttl=settings.QUESTIONNAIRE_CACHE_TTL,
+    maxsize=1,
+    backend=build_backend(settings.CACHE_URL),
+)
+
+
+QUESTIONNAIRE_ROOM = "questionnaire"
+
+
+def forget_questionnaire() -> None:
+    """Drops this worker's copies when any worker announces a questionnaire write."""
+    questionnaire_cache.forget()
+    interest_resolver.invalidate()
+
+
+menu_snapshot.subscribe(QUESTIONNAIRE_ROOM, forget_questionnaire)
+
+
+async def questionnaire_changed() -> None:
+    """Drops everything derived from questions and answers after a write, on every worker."""
+    await questionnaire_cache.invalidate()
+    interest_resolver.invalidate()
+    await menu_snapshot.publish(QUESTIONNAIRE_ROOM)
+
+
+QUESTION_FIELDS = ("id", "question_text", "sequence_number", "is_multiple", "is_popup", "step", "is_single")
+
 
 class QuestionsRepository(BaseSQLAlchemyRepository[Question, SQuestionCreate, SQuestionUpdate]):
     _model = Question
+
+    async def questionnaire(self) -> List[Dict[str, Any]]:
+        """
+        All questions with their answers, in the SQuestionRead shape, from a
+        single question LEFT JOIN answer projection: plain rows, no ORM
+        objects and no per-question answer query.
+        """
+        question, answer = Question.__table__, Answer.__table__
+        query = (
+            select(
+                *(question.c[field] for field in QUESTION_FIELDS),
+                answer.c.id.label("answer_id"),
+                answer.c.answer_text,
+                answer.c.created_at.label("answer_created_at"),
+            )
+            .select_from(question.outerjoin(answer, answer.c.question_id == question.c.id))
+            .order_by(question.c.id, answer.c.id)
+        )
+        response = await self.db.execute(query)
+
+        questions: Dict[int, Dict[str, Any]] = {}
+        for row in response.mappings():
+            item = questions.get(row["id"])
+            if item is None:
+                item = {field: row[field] for field in QUESTION_FIELDS}
+                item["answers"] = []
+                questions[row["id"]] = item
+
+            if row["answer_id"] is not None:
+                item["answers"].append({
+                    "question_id": row["id"],
+                    "answer_text": row["answer_text"],
+                    "id": row["answer_id"],
+                    "created_at": row["answer_created_at"],
+                })
+
+        return list(questions.values())
@@ -1,17 +1,35 @@
 import logging
-from typing import Any, Generic, List, Optional, Type, TypeVar
+from datetime import datetime
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Set, Tuple, Type, TypeVar
 
+from sqlalchemy import delete, insert, inspect as sa_inspect, literal, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 from sqlmodel import SQLModel, select
 
+from src.core.exceptions import ConflictException, ValidationException
+from src.core.pagination import SORT_ORDERS, decode_cursor, encode_cursor
+from src.db.loader import EntityLoader
+from src.db.routing import REPLICA
 from src.interfaces.repository import IRepository
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=SQLModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=SQLModel)
+T = TypeVar("T")
 logger: logging.Logger = logging.getLogger(__name__)
 
+# rows per statement/transaction in the bulk_* methods
+BULK_CHUNK_SIZE = 500
+
+
+def _chunks(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     _model: Type[ModelType]
@@ -19,13 +37,33 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
     def __init__(self, db: AsyncSession) -> None:
         self.db = db
 
+    def _select(self):
+        """Base statement for listings; override to add default filters."""
+        return select(self._model)
+
+    def _replica(self, query):
+        """Lets a read go to a replica, unless this session has written or is pinned to the primary."""
+        return query.execution_options(**{REPLICA: True})
+
+    def _insert(self, model: Optional[Type[Any]] = None):
+        """INSERT for the session's dialect, so ON CONFLICT clauses are available."""
+        model = model or self._model
+        if self.db.get_bind().dialect.name == "postgresql":
+            return postgresql_insert(model)
+        return sqlite_insert(model)
+
     async def create(self, obj_in: CreateSchemaType, **kwargs: Any) -> ModelType:
-        logger.info(f"Inserting new object[{obj_in.__class__.__name__}]")
+        logger.info("Inserting new object[%s]", obj_in.__class__.__name__)
 
-        db_obj = self._model.from_orm(obj_in)
+        if issubclass(self._model, SQLModel):
+            db_obj = self._model.from_orm(obj_in)
+        else:
+            # plain declarative models (src.models.base.BaseModel)
+            db_obj = self._model(**obj_in.model_dump())
         add = kwargs.get("add", True)
-        flush = kwargs.get("flush", True)
-        commit = kwargs.get("commit", True)
+        # ids are assigned when the unit of work flushes or commits; pass
+        # flush=True when the caller needs db_obj.id right away
+        flush = kwargs.get("flush", False)
         unique_fields = kwargs.get("unique_fields", None)
 
         if unique_fields:
@@ -34,44 +72,100 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
                 if obj_exists:
                     raise Exception(f"{self._model.__tablename__.capitalize()} already exists")
             except Exception as exc:
-                logger.error(exc)
+                logger.error("%s", exc)
                 raise exc
 
         if add:
             self.db.add(db_obj)
+            self._forget()
 
-        if add and commit:
-            try:
-                await self.db.commit()
-                await self.db.refresh(db_obj)
-            except Exception as exc:
-                logger.error(exc)
-                await self.db.rollback()
-
-        elif add and flush:
+        if add and flush:
             await self.db.flush()
 
         return db_obj
 
+    def _load_options(
+            self,
+            fields: Optional[List[str]] = None,
+            relations: Optional[List[str]] = None,
+            required: Tuple[str, ...] = (),
+    ) -> List[Any]:
+        """
+        Loader options for a sparse read: load_only() on `fields` plus the
+        primary key and `required` columns, selectinload() on `relations`.
+        Unknown names are rejected instead of silently ignored.
+        """
+        mapper = sa_inspect(self._model)
+        options: List[Any] = []
+
+        if fields:
+            unknown = set(fields) - set(mapper.column_attrs.keys())
+            if unknown:
+                raise ValidationException(f"Unknown fields: {', '.join(sorted(unknown))}")
+            names = dict.fromkeys([*(column.key for column in mapper.primary_key), *required, *fields])
+            options.append(load_only(*(getattr(self._model, name) for name in names)))
+
+        if relations:
+            unknown = set(relations) - set(mapper.relationships.keys())
+            if unknown:
+                raise ValidationException(f"Unknown relations: {', '.join(sorted(unknown))}")
+            options.extend(selectinload(getattr(self._model, relation)) for relation in relations)
+
+        return options
+
     async def get(
             self,
             relations: Optional[List[str]] = None,
+            fields: Optional[List[str]] = None,
             **kwargs: Any) -> Optional[ModelType]:
-        logger.info(f"Fetching [{self._model.__class__.__name__}] object by [{kwargs}]")
+        """
+        One object by filters, through the session's EntityLoader: repeated
+        lookups in a request are answered once, and concurrent get(id=...)
+        calls share one query.
+        """
+        logger.info("Fetching [%s] object by [%s]", self._model.__name__, kwargs)
 
-        query = select(self._model).filter_by(**kwargs)
+        # reject unknown names even when the loader answers from memory
+        self._load_options(fields, relations)
+        return await EntityLoader.of(self.db).load(self, kwargs, fields=fields, relations=relations)
 
-        if relations:
-            for relation in relations:
-                query = query.options(selectinload(getattr(self._model, relation)))
+    async def _fetch(
+            self,
+            fields: Optional[List[str]] = None,
+            relations: Optional[List[str]] = None,
+            **kwargs: Any) -> Optional[ModelType]:
+        query = self._select().filter_by(**kwargs)
+        query = query.options(*self._load_options(fields, relations))
+        query = self._replica(query)
 
         response = await self.db.execute(query)
         scalar: Optional[ModelType] = response.scalar_one_or_none()
 
         return scalar
 
+    async def _fetch_many(
+            self,
+            ids: List[Any],
+            fields: Optional[List[str]] = None,
+            relations: Optional[List[str]] = None,
+    ) -> List[ModelType]:
+        query = self._select().where(self._model.id.in_(ids))
+        query = query.options(*self._load_options(fields, relations))
+        query = self._replica(query)
+
+        response = await self.db.execute(query)
+        return response.scalars().all()
+
+    def _visible(self, obj: ModelType) -> bool:
+        """Whether get() may return `obj`; mirrors the filters of _select()."""
+        return True
+
+    def _forget(self) -> None:
+        """Drops this model's lookups from the request's loader after a write."""
+        EntityLoader.of(self.db).forget(self._model)
+
     async def update(self, obj_current: ModelType, obj_in: UpdateSchemaType) -> ModelType:
-        logger.info(f"Updating [{self._model.__class__.__name__}] object with [{obj_in}]")
+        logger.info("Updating [%s] object with [%s]", self._model.__name__, obj_in)
 
         update_data = obj_in.model_dump(
             exclude_unset=True)
@@ -80,8 +174,7 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
             setattr(obj_current, field, update_data[field])
 
         self.db.add(obj_current)
-        await self.db.commit()
-        await self.db.refresh(obj_current)
+        self._forget()
 
         return obj_current
 
@@ -90,7 +183,7 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
         if not obj:
             raise Exception(f"{self._model.__tablename__.capitalize()} not found")
         await self.db.delete(obj)
-        await self.db.commit()
+        self._forget()
 
     async def all(
             self,
@@ -99,34 +192,110 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
             sort_field: Optional[str] = None,
             sort_order: Optional[str] = None,
             relations: Optional[List[str]] = None,
+            cursor: Optional[str] = None,
+            criteria: Optional[List[Any]] = None,
+            fields: Optional[List[str]] = None,
             **kwargs: Any
     ) -> List[ModelType]:
+        """
+        Returns one page of objects. Without a cursor the page is taken with
+        OFFSET `skip`; with a cursor (see paginate) it seeks past the last row
+        of the previous page on (sort_field, id), and `skip` is ignored.
+        `criteria` are extra WHERE clauses (ranges etc.) besides the equality
+        filters in kwargs. `fields` limits the loaded columns (the id and
+        sort column are always loaded), `relations` are loaded in bulk.
+        """
         columns = self._model.__table__.columns
 
+        if cursor:
+            position = decode_cursor(cursor)
+            if sort_field and sort_field != position["f"] or sort_order and sort_order != position["o"]:
+                raise ValidationException("Cursor was issued for a different sort order")
+            sort_field, sort_order = position["f"], position["o"]
+
         if not sort_field:
             sort_field = "created_at"
 
         if not sort_order:
             sort_order = "desc"
 
-        order_by = getattr(columns[sort_field], sort_order)()
-
-        query = select(self._model).order_by(order_by).offset(skip).limit(limit)
+        # both may come from a client-made cursor, they end up in getattr() and ORDER BY
+        if sort_field not in columns:
+            raise ValidationException(f"Unknown sort field: {sort_field}")
+        if sort_order not in SORT_ORDERS:
+            raise ValidationException(f"Unknown sort order: {sort_order}")
+
+        sort_column = columns[sort_field]
+        order_by = [getattr(sort_column, sort_order)()]
+        if sort_field != "id":
+            # id breaks ties so that rows with equal sort values keep a stable order
+            order_by.append(getattr(columns["id"], sort_order)())
+
+        query = self._select().order_by(*order_by).limit(limit)
+
+        if cursor:
+            if sort_field == "id":
+                seek = sort_column < position["id"] if sort_order == "desc" else sort_column > position["id"]
+            else:
+                key = tuple_(sort_column, columns["id"])
+                last = tuple_(literal(position["v"], sort_column.type), literal(position["id"]))
+                seek = key < last if sort_order == "desc" else key > last
+            query = query.where(seek)
+        else:
+            query = query.offset(skip)
 
         if kwargs:
             query = query.filter_by(**{k: v for k, v in kwargs.items() if v is not None})
 
-        if relations:
-            for relation in relations:
-                query = query.options(selectinload(getattr(self._model, relation)))
+        if criteria:
+            query = query.where(*criteria)
+
+        query = query.options(*self._load_options(fields, relations, required=(sort_field,)))
+        query = self._replica(query)
 
         response = await self.db.execute(query)
         return response.scalars().all()
 
+    async def paginate(
+            self,
+            cursor: Optional[str] = None,
+            limit: int = 100,
+            sort_field: Optional[str] = None,
+            sort_order: Optional[str] = None,
+            criteria: Optional[List[Any]] = None,
+            **kwargs: Any
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination: returns a page and the cursor of the next one
+        (None on the last page). Page cost doesn't grow with depth.
+        """
+        items = await self.all(
+            limit=limit + 1,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            cursor=cursor,
+            criteria=criteria,
+            **kwargs
+        )
+
+        if len(items) <= limit:
+            return items, None
+
+        items = items[:limit]
+        if cursor:
+            position = decode_cursor(cursor)
+            sort_field, sort_order = position["f"], position["o"]
+
+        sort_field = sort_field or "created_at"
+        last = items[-1]
+        next_cursor = encode_cursor(sort_field, sort_order or "desc", getattr(last, sort_field), last.id)
+
+        return items, next_cursor
+
     async def f(self, **kwargs: Any) -> List[ModelType]:
-        logger.info(f"Fetching [{self._model.__class__.__name__}] object by [{kwargs}]")
+        logger.info("Fetching [%s] object by [%s]", self._model.__name__, kwargs)
 
-        query = select(self._model).filter_by(**kwargs)  # type: ignore
+        query = self._replica(select(self._model).filter_by(**kwargs))  # type: ignore
         response = await self.db.execute(query)
         scalars: List[ModelType] = response.scalars().all()
 
@@ -142,6 +311,179 @@ class BaseSQLAlchemyRepository(IRepository, Generic[ModelType, CreateSchemaType,
 
         return instance
 
+    def _values(self, obj_in: Any, exclude_unset: bool = False) -> Dict[str, Any]:
+        """Column values of a schema or dict, ignoring keys that aren't columns."""
+        data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=exclude_unset)
+        columns = self._model.__table__.columns
+        return {key: value for key, value in data.items() if key in columns}
+
+    async def existing_ids(self, ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> Set[int]:
+        """The subset of `ids` that have a row in this table."""
+        existing: Set[int] = set()
+        for chunk in _chunks(list(set(ids)), chunk_size):
+            response = await self.db.execute(select(self._model.id).where(self._model.id.in_(chunk)))
+            existing.update(response.scalars().all())
+        return existing
+
+    async def bulk_create(
+            self,
+            objs_in: Sequence[Any],
+            chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        Inserts many rows with executemany + RETURNING, committing once per
+        chunk of `chunk_size` rows. Returns the created objects in input order.
+        """
+        self._forget()
+        created: List[ModelType] = []
+        for chunk in _chunks([self._values(obj_in) for obj_in in objs_in], chunk_size):
+            response = await self.db.execute(insert(self._model).returning(self._model), chunk)
+            created.extend(response.scalars().all())
+            await self.db.commit()
+
+        logger.info("Bulk inserted %s %s rows", len(created), self._model.__tablename__)
+        return created
+
+    async def bulk_upsert(
+            self,
+            objs_in: Sequence[Any],
+            index_elements: Sequence[str] = ("id",),
+            update_fields: Optional[Sequence[str]] = None,
+            chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        INSERT ... ON CONFLICT (index_elements) DO UPDATE for many rows, one
+        multi-row statement with RETURNING per chunk. `update_fields` are
+        overwritten on conflict (default: every given column except the
+        conflict target).
+        """
+        self._forget()
+        rows = [self._values(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+
+        if update_fields is None:
+            update_fields = [key for key in rows[0] if key not in index_elements]
+        columns = self._model.__table__.columns
+
+        upserted: List[ModelType] = []
+        for chunk in _chunks(rows, chunk_size):
+            query = self._insert().values(chunk)
+            changes = {field: query.excluded[field] for field in update_fields}
+            if "updated_at" in columns and "updated_at" not in changes:
+                # ON CONFLICT DO UPDATE doesn't fire column onupdate hooks
+                changes["updated_at"] = datetime.utcnow()
+
+            if changes:
+                query = query.on_conflict_do_update(index_elements=list(index_elements), set_=changes)
+            else:
+                query = query.on_conflict_do_nothing(index_elements=list(index_elements))
+
+            response = await self.db.execute(
+                query.returning(self._model),
+                execution_options={"populate_existing": True},
+            )
+            upserted.extend(response.scalars().all())
+            await self.db.commit()
+
+        if "id" in index_elements and self.db.get_bind().dialect.name == "postgresql":
+            # explicit ids don't advance the serial; move it past them so create() keeps working
+            table = self._model.__tablename__
+            await self.db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            ))
+            await self.db.commit()
+
+        logger.info("Bulk upserted %s %s rows", len(upserted), self._model.__tablename__)
+        return upserted
+
+    async def bulk_update(
+            self,
+            objs_in: Sequence[Any],
+            chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[ModelType]:
+        """
+        UPDATE by primary key for many rows (each item carries its `id` and
+        the columns to change) as executemany, committing once per chunk.
+        Returns the updated objects; ids that don't exist are skipped.
+        """
+        self._forget()
+        rows = [self._values(obj_in, exclude_unset=True) for obj_in in objs_in]
+        existing = await self.existing_ids([row["id"] for row in rows], chunk_size=chunk_size)
+        rows = [row for row in rows if row["id"] in existing]
+        for chunk in _chunks(rows, chunk_size):
+            await self.db.execute(update(self._model), chunk)
+            await self.db.commit()
+
+        updated: List[ModelType] = []
+        for chunk in _chunks([row["id"] for row in rows], chunk_size):
+            response = await self.db.execute(
+                select(self._model).where(self._model.id.in_(chunk)),
+                execution_options={"populate_existing": True},
+            )
+            updated.extend(response.scalars().all())
+
+        logger.info("Bulk updated %s %s rows", len(updated), self._model.__tablename__)
+        return updated
+
+    async def bulk_delete(
+            self,
+            ids: Sequence[int],
+            chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[int]:
+        """
+        DELETE ... WHERE id IN (...) RETURNING id per chunk; returns the ids
+        actually deleted. Rows still referenced by another table are left
+        alone; if there were any, ConflictException (409) lists what was and
+        wasn't deleted once the other chunks are committed.
+        """
+        self._forget()
+        deleted: List[int] = []
+        referenced: List[int] = []
+        for chunk in _chunks(list(ids), chunk_size):
+            blocked = await self.referenced_ids(chunk)
+            referenced.extend(id for id in chunk if id in blocked)
+            chunk = [id for id in chunk if id not in blocked]
+            if not chunk:
+                continue
+            try:
+                response = await self.db.execute(
+                    delete(self._model).where(self._model.id.in_(chunk)).returning(self._model.id)
+                )
+                deleted.extend(response.scalars().all())
+                await self.db.commit()
+            except IntegrityError:
+                # referenced by a row written after the check
+                await self.db.rollback()
+                referenced.extend(chunk)
+
+        logger.info("Bulk deleted %s %s rows", len(deleted), self._model.__tablename__)
+        if referenced:
+            raise ConflictException(
+                f"{len(referenced)} {self._model.__tablename__} rows are still referenced and weren't deleted",
+                data={"deleted": deleted, "not_deleted": referenced},
+            )
+        return deleted
+
+    async def referenced_ids(self, ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> Set[int]:
+        """
+        The subset of `ids` that rows of other tables point to through a
+        foreign key without ON DELETE, i.e. that the database won't let go.
+        """
+        referenced: Set[int] = set()
+        table = self._model.__table__
+        for other in table.metadata.tables.values():
+            for key in other.foreign_keys:
+                if key.column.table is not table or key.ondelete is not None:
+                    continue
+                for chunk in _chunks(list(set(ids)), chunk_size):
+                    response = await self.db.execute(
+                        select(key.parent).where(key.parent.in_(chunk)).distinct()
+                    )
+                    referenced.update(response.scalars().all())
+        return referenced
+
     async def get_existing_object(self, unique_fields: dict) -> Optional[ModelType]:
         """
         Queries the database for an existing object based on unique fields
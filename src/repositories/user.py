@@ -1,16 +1,28 @@
 import logging
 from datetime import datetime
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Sequence
 
-from sqlalchemy.orm import selectinload
+from sqlalchemy import DateTime, Enum, update
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import select
 
+from src.core.cache import TwoLevelCache, build_backend
+from src.core.config import settings
+from src.db.uow import on_commit
 from src.models.user import User
-from src.repositories.sqlalchemy import BaseSQLAlchemyRepository, ModelType
+from src.repositories.sqlalchemy import BULK_CHUNK_SIZE, BaseSQLAlchemyRepository, ModelType
 from src.schemas.user import SUserCreate, SUserUpdate
 
 logger = logging.getLogger(__name__)
 
+# Validated principals for the auth dependencies, keyed by token subject
+principal_cache = TwoLevelCache(
+    namespace="principal",
+    ttl=settings.AUTH_CACHE_TTL,
+    maxsize=settings.AUTH_CACHE_MAXSIZE,
+    backend=build_backend(settings.CACHE_URL),
+)
+
 
 class UserRepository(BaseSQLAlchemyRepository[User, SUserCreate, SUserUpdate]):
     _model = User
@@ -27,64 +39,90 @@ class UserRepository(BaseSQLAlchemyRepository[User, SUserCreate, SUserUpdate]):
         obj.deleted_at = datetime.utcnow()
 
         self.db.add(obj)
-        try:
+        self._forget()
+        keys = _principal_keys(obj)
+        on_commit(self.db, lambda: principal_cache.invalidate(*keys))
+        return True
+
+    async def bulk_delete(self, ids: Sequence[int], chunk_size: int = BULK_CHUNK_SIZE) -> List[int]:
+        """Soft-deletes users in chunks (one UPDATE ... RETURNING each) and drops their cached principals."""
+        self._forget()
+        deleted: List[int] = []
+        for start in range(0, len(ids), chunk_size):
+            query = (
+                update(User)
+                .where(User.id.in_(ids[start:start + chunk_size]), User.deleted_at.is_(None))
+                .values(deleted_at=datetime.utcnow())
+                .returning(User.id, User.username)
+                .execution_options(synchronize_session=False)
+            )
+            rows = (await self.db.execute(query)).all()
             await self.db.commit()
-            await self.db.refresh(obj)
-            return True
-
-        except Exception as exc:
-            await self.db.rollback()
-            print(exc)
-            return False
-
-    async def all(
-            self,
-            skip: int = 0,
-            limit: int = 100,
-            sort_field: Optional[str] = None,
-            sort_order: Optional[str] = None,
-            relations: Optional[List[str]] = None,
-            **kwargs: Any
-    ) -> List[ModelType]:
-        columns = self._model.__table__.columns
 
-        if not sort_field:
-            sort_field = "created_at"
+            deleted.extend(row.id for row in rows)
+            await principal_cache.invalidate(*(key for row in rows for key in _principal_keys(row)))
 
-        if not sort_order:
-            sort_order = "desc"
-
-        order_by = getattr(columns[sort_field], sort_order)()
-
-        query = select(self._model).order_by(order_by).offset(skip).limit(limit)
+        return deleted
 
+    def _select(self):
         # add filter to deleted_at
-        query = query.filter(self._model.deleted_at.is_(None))
-
-        if kwargs:
-            query = query.filter_by(**{k: v for k, v in kwargs.items() if v is not None})
-
-        if relations:
-            for relation in relations:
-                query = query.options(selectinload(getattr(self._model, relation)))
-
-        response = await self.db.execute(query)
-        return response.scalars().all()
-
-    async def get(
-        self,
-        relations: Optional[List[str]] = None,
-        **kwargs: Any
-    ) -> Optional[ModelType]:
-        query = select(self._model).filter_by(**kwargs)
-        query = query.filter(self._model.deleted_at.is_(None))
-
-        if relations:
-            for relation in relations:
-                if hasattr(self._model, relation):
-                    query = query.options(selectinload(getattr(self._model, relation))) # noqa
-
-        response = await self.db.execute(query)
-        scalar: Optional[ModelType] = response.scalar_one_or_none()
-
-        return scalar
+        return select(self._model).filter(self._model.deleted_at.is_(None))
+
+    def _visible(self, obj: ModelType) -> bool:
+        return obj.deleted_at is None
+
+    async def update(self, obj_current: ModelType, obj_in: Any) -> ModelType:
+        stale = _principal_keys(obj_current)
+        obj = await super().update(obj_current=obj_current, obj_in=obj_in)
+        keys = [*stale, *_principal_keys(obj)]
+        # a concurrent request could re-cache the old row if we dropped it before the commit
+        on_commit(self.db, lambda: principal_cache.invalidate(*keys))
+        return obj
+
+    async def get_principal(self, **kwargs: Any) -> Optional[ModelType]:
+        """
+        Same as get(id=...) or get(username=...), but served from the
+        principal cache when possible. Cached users come back detached.
+        """
+        (field, value), = kwargs.items()
+        key = f"{field}:{value}"
+
+        cached = await principal_cache.get(key)
+        if cached is not None:
+            return _principal_from_cache(cached)
+
+        user = await self.get(**kwargs)
+        if user is not None:
+            await principal_cache.set(key, _principal_to_cache(user))
+
+        return user
+
+    async def invalidate_principal(self, obj: ModelType) -> None:
+        await principal_cache.invalidate(*_principal_keys(obj))
+
+
+def _principal_keys(user: User) -> List[str]:
+    keys = [f"id:{user.id}"]
+    if getattr(user, "username", None):
+        keys.append(f"username:{user.username}")
+    return keys
+
+
+def _principal_to_cache(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def _principal_from_cache(data: dict) -> User:
+    values = {}
+    for column in User.__table__.columns:
+        value = data.get(column.key)
+        # values read back from a shared backend arrive as JSON scalars
+        if isinstance(value, str) and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, str) and isinstance(column.type, Enum) and column.type.enum_class:
+            value = column.type.enum_class(value)
+        values[column.key] = value
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
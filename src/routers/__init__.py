@@ -5,5 +5,6 @@ from .orders import router as orders
 from .cart import router as cart
 from .chat import router as chat
 from .static import router as static
+from .metrics import router as metrics
 
-__all__ = ['users', 'products', 'categories', 'orders', 'cart', 'chat', 'static'] 
\ No newline at end of file
+__all__ = ['users', 'products', 'categories', 'orders', 'cart', 'chat', 'static', 'metrics'] 
@@ -1,53 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from src.database import get_db
-from src.models.cart import Cart, CartItem
-from src.models.product import Product
+from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
+from src.repositories.cart import CartRepository
+from src.schemas.cart import SCartItemRead
 from src.dependencies import get_current_active_user
 from src.models.user import User
 
 router = APIRouter()
 
-@router.post("/cart")
+@router.post("/cart", response_model=SCartItemRead)
 async def add_to_cart(
     product_id: int,
     quantity: int = 1,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == product_id
-    ).first()
+    # Корзина, позиция и сумма сохраняются одним коммитом
+    cart_repo = CartRepository(db=uow.session)
+    cart = await cart_repo.get_or_create_for_user(current_user.id)
     
-    if cart_item:
-        cart_item.quantity += quantity
-    else:
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=product_id,
-            quantity=quantity,
-            price=product.price
-        )
-        db.add(cart_item)
-    
-    # Обновляем общую сумму корзины
-    cart.total_amount = sum(item.price * item.quantity for item in cart.items)
-    
-    db.commit()
-    db.refresh(cart_item)
+    # Обновляет позицию и общую сумму корзины
+    cart_item = await cart_repo.add_item(cart, product_id, quantity)
+    if not cart_item:
+        raise HTTPException(status_code=404, detail="Product not found")
+    await uow.commit()
     return cart_item
 
 @router.get("/cart")
@@ -57,39 +35,30 @@ async def get_cart():
 @router.delete("/cart/{item_id}")
 async def remove_from_cart(
     item_id: int,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart_repo = CartRepository(db=uow.session)
+    cart = await cart_repo.get_for_user(current_user.id)
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
     
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
+    # Обновляет общую сумму корзины
+    if not await cart_repo.remove_item(cart, item_id):
         raise HTTPException(status_code=404, detail="Item not found in cart")
-    
-    db.delete(cart_item)
-    
-    # Обновляем общую сумму корзины
-    cart.total_amount = sum(item.price * item.quantity for item in cart.items)
-    
-    db.commit()
+    await uow.commit()
     return {"message": "Item removed from cart"}
 
 @router.delete("/cart")
 async def clear_cart(
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart_repo = CartRepository(db=uow.session)
+    cart = await cart_repo.get_for_user(current_user.id)
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
     
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    cart.total_amount = 0.0
-    db.commit()
-    return {"message": "Cart cleared"} 
\ No newline at end of file
+    await cart_repo.clear(cart)
+    await uow.commit()
+    return {"message": "Cart cleared"}
@@ -1,77 +1,169 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from src.database import get_db
-from src.models.category import Category
+from src.core.etag import etag_response
+from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
+from src.repositories.category import CategoryRepository
+from src.repositories.menu import menu_snapshot
+from src.schemas.category import (
+    SCategoryBatchUpdate,
+    SCategoryCreate,
+    SCategoryRead,
+    SCategoryUpdate,
+    SCategoryUpsert,
+    SMenuCategoryRead,
+)
+from src.schemas.common import IGetResponseBase, IPostResponseBase, SBatchDelete, SBatchRequest
 from src.dependencies import get_current_active_user
 from src.models.user import User, UserRole
 
 router = APIRouter()
 
-@router.post("/category")
+def batch_response(categories) -> IPostResponseBase[List[SCategoryRead]]:
+    return IPostResponseBase[List[SCategoryRead]](
+        data=[SCategoryRead.model_validate(category) for category in categories],
+        meta={"count": len(categories)}
+    )
+
+@router.post("/category", response_model=SCategoryRead)
 async def create_category(
     name: str,
     description: str = None,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    db_category = Category(name=name, description=description)
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    return db_category
-
-@router.get("/categories")
-async def get_categories():
-    return {"message": "List of categories"}
-
-@router.get("/category/{category_id}")
-async def read_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await CategoryRepository(db=uow.session).create(
+        SCategoryCreate(name=name, description=description)
+    )
+    await uow.commit()
+    await menu_snapshot.changed()
+    return category
+
+@router.get("/categories", response_model=IGetResponseBase[List[SCategoryRead]])
+async def get_categories(request: Request):
+    snapshot = await menu_snapshot.get()
+    return etag_response(request, snapshot.categories, snapshot.categories_etag)
+
+@router.get("/menu", response_model=IGetResponseBase[List[SMenuCategoryRead]])
+async def get_menu(request: Request):
+    # Готовый JSON из памяти: без запросов к БД и сериализации
+    snapshot = await menu_snapshot.get()
+    return etag_response(request, snapshot.menu, snapshot.menu_etag)
+
+@router.get("/category/{category_id}", response_model=SCategoryRead)
+async def read_category(category_id: int, session: AsyncSession = Depends(get_session)):
+    category = await CategoryRepository(db=session).get(id=category_id)
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return category
 
-@router.put("/category/{category_id}")
+@router.put("/category/{category_id}", response_model=SCategoryRead)
 async def update_category(
     category_id: int,
     name: str = None,
     description: str = None,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category_repo = CategoryRepository(db=uow.session)
+    category = await category_repo.get(id=category_id)
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    if name:
-        category.name = name
-    if description:
-        category.description = description
-    
-    db.commit()
-    db.refresh(category)
+    changes = {"name": name, "description": description}
+    category = await category_repo.update(
+        obj_current=category,
+        obj_in=SCategoryUpdate(**{k: v for k, v in changes.items() if v})
+    )
+    await uow.commit()
+    await menu_snapshot.changed()
     return category
 
 @router.delete("/category/{category_id}")
 async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category_repo = CategoryRepository(db=uow.session)
+    category = await category_repo.get(id=category_id)
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    db.delete(category)
-    db.commit()
-    return {"message": "Category deleted successfully"} 
\ No newline at end of file
+    # the lookup above is reused, no second query
+    await category_repo.delete(id=category_id)
+    await uow.commit()
+    await menu_snapshot.changed()
+    return {"message": "Category deleted successfully"}
+
+@router.post("/categories/batch", response_model=IPostResponseBase[List[SCategoryRead]])
+async def create_categories(
+    batch: SBatchRequest[SCategoryCreate],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        categories = await CategoryRepository(db=session).bulk_create(batch.items)
+    finally:
+        # earlier chunks are committed even if a later one fails
+        await menu_snapshot.changed()
+    return batch_response(categories)
+
+@router.put("/categories/batch", response_model=IPostResponseBase[List[SCategoryRead]])
+async def upsert_categories(
+    batch: SBatchRequest[SCategoryUpsert],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    # Категории из импорта сопоставляются по slug
+    try:
+        categories = await CategoryRepository(db=session).bulk_upsert(batch.items, index_elements=("slug",))
+    finally:
+        await menu_snapshot.changed()
+    return batch_response(categories)
+
+@router.patch("/categories/batch", response_model=IPostResponseBase[List[SCategoryRead]])
+async def update_categories(
+    batch: SBatchRequest[SCategoryBatchUpdate],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        categories = await CategoryRepository(db=session).bulk_update(batch.items)
+    finally:
+        await menu_snapshot.changed()
+    return batch_response(categories)
+
+@router.post("/categories/batch/delete")
+async def delete_categories(
+    batch: SBatchDelete,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        deleted = await CategoryRepository(db=session).bulk_delete(batch.ids)
+    finally:
+        await menu_snapshot.changed()
+    return {"message": "Categories deleted successfully", "deleted": deleted}
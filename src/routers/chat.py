@@ -1,37 +1,41 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import List
+import re
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status
+from ..core.config import settings
+from ..core.pubsub import build_pubsub
+from ..core.websocket import ConnectionManager, DEFAULT_ROOM
 from ..dependencies import get_current_active_user
 from ..models.user import User, UserRole
 
 router = APIRouter()
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# one room per coffee shop location, e.g. /ws/chat/tverskaya-12
+ROOM_PATTERN = re.compile(r"[\w-]{1,64}")
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-
-manager = ConnectionManager()
+manager = ConnectionManager(
+    queue_size=settings.CHAT_SEND_QUEUE_SIZE,
+    overflow=settings.CHAT_SLOW_CONSUMER_POLICY,
+    send_timeout=settings.CHAT_SEND_TIMEOUT,
+    pubsub=build_pubsub(settings.CHAT_BACKEND, settings.DATABASE_URL),
+)
 
 @router.websocket("/ws/chat")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+@router.websocket("/ws/chat/{room}")
+async def websocket_endpoint(websocket: WebSocket, room: str = DEFAULT_ROOM):
+    if not ROOM_PATTERN.fullmatch(room):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await manager.connect(websocket, room)
     try:
         while True:
             data = await websocket.receive_text()
-            await manager.broadcast(f"Message: {data}")
+            await manager.broadcast(f"Message: {data}", room)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 @router.get("/chat")
 async def get_chat():
-    return {"message": "Chat endpoint"} 
\ No newline at end of file
+    return {"message": "Chat endpoint", **manager.stats()}
@@ -0,0 +1,91 @@
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.logger import log_pipeline
+from src.core.metrics import metrics, metrics_store
+from src.db.engine import pool_metrics
+from src.db.session import replicas
+from src.routers.chat import manager
+
+router = APIRouter()
+
+# Connection pools (per engine; workers add up to the budget in DB_MAX_CONNECTIONS)
+pool_size = metrics.gauge("db_pool_size", "Persistent connections the pool keeps", ("engine",))
+pool_max_overflow = metrics.gauge("db_pool_max_overflow", "Extra connections the pool may open", ("engine",))
+pool_checked_out = metrics.gauge("db_pool_checked_out", "Connections in use", ("engine",))
+pool_overflow = metrics.gauge("db_pool_overflow", "Overflow connections open", ("engine",))
+pool_saturation = metrics.gauge(
+    "db_pool_saturation", "Share of the pool's connections in use, busiest worker", ("engine",), aggregate="max",
+)
+pool_checkouts = metrics.counter("db_pool_checkouts_total", "Connection checkouts", ("engine",))
+pool_timeouts = metrics.counter("db_pool_timeouts_total", "Checkouts that timed out waiting", ("engine",))
+pool_wait_seconds = metrics.counter("db_pool_wait_seconds_total", "Time spent waiting for a connection", ("engine",))
+
+# Read replicas
+replicas_healthy = metrics.gauge("db_replicas_healthy", "Replicas taking reads", aggregate="min")
+replica_reads = metrics.counter("db_replica_reads_total", "Reads routed to a replica")
+replica_fallbacks = metrics.counter("db_replica_fallbacks_total", "Reads sent to the primary for lack of a healthy replica")
+
+# Chat websockets
+ws_connections = metrics.gauge("ws_connections", "Open chat websockets")
+ws_rooms = metrics.gauge("ws_rooms", "Chat rooms with listeners on a worker, added up over workers")
+ws_sent = metrics.counter("ws_messages_sent_total", "Chat messages delivered")
+ws_dropped = metrics.counter("ws_messages_dropped_total", "Chat messages dropped for slow clients")
+ws_evicted = metrics.counter("ws_clients_evicted_total", "Chat clients disconnected for falling behind")
+
+# Logging
+log_queue_depth = metrics.gauge("log_queue_depth", "Log records waiting to be written")
+log_dropped = metrics.counter("log_records_dropped_total", "Log records dropped on a full buffer")
+log_sampled = metrics.counter("log_records_sampled_total", "Log records skipped by sampling")
+
+startup_seconds = metrics.gauge("app_startup_seconds", "Duration of the startup phases", ("phase",), aggregate="max")
+
+
+@metrics.collector
+def collect_runtime() -> None:
+    for name, pool in pool_metrics().items():
+        labels = (name,)
+        if "checked_out" not in pool:
+            # NullPool/StaticPool (SQLite): nothing to report
+            continue
+        capacity = pool["size"] + max(pool["max_overflow"], 0)
+        pool_size.set(labels, pool["size"])
+        pool_max_overflow.set(labels, pool["max_overflow"])
+        pool_checked_out.set(labels, pool["checked_out"])
+        pool_overflow.set(labels, pool["overflow"])
+        pool_saturation.set(labels, pool["checked_out"] / capacity if capacity else 0.0)
+        pool_checkouts.set(labels, pool["checkouts"])
+        pool_timeouts.set(labels, pool["timeouts"])
+        pool_wait_seconds.set(labels, pool["wait_seconds_total"])
+
+    replica_stats = replicas.stats()
+    replicas_healthy.set((), replica_stats["healthy"])
+    replica_reads.set((), replica_stats["reads"])
+    replica_fallbacks.set((), replica_stats["fallbacks"])
+
+    chat_stats = manager.stats()
+    ws_connections.set((), chat_stats["connections"])
+    ws_rooms.set((), chat_stats["rooms"])
+    ws_sent.set((), chat_stats["sent"])
+    ws_dropped.set((), chat_stats["dropped"])
+    ws_evicted.set((), chat_stats["evicted"])
+
+    log_stats = log_pipeline.stats()
+    log_queue_depth.set((), log_stats["queued"])
+    log_dropped.set((), log_stats["dropped"])
+    log_sampled.set((), log_stats["sampled"])
+
+
+def record_startup(report: Dict[str, float]) -> None:
+    for phase, seconds in report.items():
+        startup_seconds.set((phase,), seconds)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        await metrics_store.exposition(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,66 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from src.database import get_db
-from src.models.order import Order, OrderItem, OrderStatus
-from src.models.cart import Cart, CartItem
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
+from src.models.order import OrderStatus
+from src.repositories.cart import CartRepository
+from src.repositories.order import OrderRepository
+from src.schemas.common import IGetResponseBase
+from src.schemas.order import SOrderRead, SOrderUpdate, SOrderWithItemsRead
 from src.dependencies import get_current_active_user
 from src.models.user import User, UserRole
 
 router = APIRouter()
 
-@router.post("/order")
+@router.post("/order", response_model=SOrderWithItemsRead)
 async def create_order(
     delivery_address: str,
     phone_number: str,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = await CartRepository(db=uow.session).get_for_user(current_user.id)
     if not cart:
         raise HTTPException(status_code=404, detail="Cart is empty")
     
-    cart_items = db.query(CartItem).filter(CartItem.cart_id == cart.id).all()
-    if not cart_items:
-        raise HTTPException(status_code=404, detail="Cart is empty")
-    
-    order = Order(
-        user_id=current_user.id,
+    # Заказ, его позиции и очистка корзины - одна транзакция
+    order = await OrderRepository(db=uow.session).create_from_cart(
+        cart,
         delivery_address=delivery_address,
         phone_number=phone_number,
-        total_amount=cart.total_amount,
-        status=OrderStatus.PENDING
     )
-    db.add(order)
-    db.commit()
-    db.refresh(order)
-    
-    for cart_item in cart_items:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            quantity=cart_item.quantity,
-            price=cart_item.price
-        )
-        db.add(order_item)
-    
-    # Clear cart
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    db.commit()
-    
+    if not order:
+        raise HTTPException(status_code=404, detail="Cart is empty")
+    await uow.commit()
     return order
 
-@router.get("/orders")
-async def get_orders():
-    return {"message": "List of orders"}
+@router.get("/orders", response_model=IGetResponseBase[List[SOrderRead]])
+async def get_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    status: Optional[OrderStatus] = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    filters = {"status": status}
+    if current_user.role != UserRole.ADMIN:
+        filters["user_id"] = current_user.id
 
-@router.get("/order/{order_id}")
+    orders, next_cursor = await OrderRepository(db=session).paginate(
+        cursor=cursor,
+        limit=limit,
+        **filters
+    )
+    return IGetResponseBase[List[SOrderRead]](
+        data=[SOrderRead.model_validate(order) for order in orders],
+        meta={"next_cursor": next_cursor}
+    )
+
+@router.get("/order/{order_id}", response_model=SOrderRead)
 async def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order = await OrderRepository(db=session).get(id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -69,21 +72,21 @@ async def get_order(
     
     return order
 
-@router.put("/order/{order_id}")
+@router.put("/order/{order_id}", response_model=SOrderRead)
 async def update_order_status(
     order_id: int,
     status: OrderStatus,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    order = db.query(Order).filter(Order.id == order_id).first()
+    order_repo = OrderRepository(db=uow.session)
+    order = await order_repo.get(id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    order.status = status
-    db.commit()
-    db.refresh(order)
-    return order 
\ No newline at end of file
+    order = await order_repo.update(obj_current=order, obj_in=SOrderUpdate(status=status))
+    await uow.commit()
+    return order
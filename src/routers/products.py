@@ -1,55 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from src.database import get_db
-from src.models.product import Product
-from src.models.category import Category
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from urllib.parse import urlencode
+from src.core.etag import compute_etag, etag_response
+from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
+from src.repositories.category import CategoryRepository
+from src.repositories.menu import menu_snapshot
+from src.repositories.product import ProductRepository, product_list_cache, product_search_index
+from src.schemas.common import IGetResponseBase, IPostResponseBase, SBatchDelete, SBatchRequest
+from src.schemas.product import (
+    SProductBatchUpdate,
+    SProductCreate,
+    SProductRead,
+    SProductUpdate,
+    SProductUpsert,
+)
 from src.dependencies import get_current_active_user
 from src.models.user import User, UserRole
 
 router = APIRouter()
 
-@router.post("/product")
+async def catalog_changed() -> None:
+    """Drops everything derived from the product table after an admin write."""
+    await product_list_cache.invalidate()
+    product_search_index.invalidate()
+    # other workers drop theirs on the rebuild notice (forget_catalog)
+    await menu_snapshot.changed()
+
+async def check_categories(session: AsyncSession, items) -> None:
+    """404 listing the category ids of a batch that don't exist."""
+    category_ids = {item.category_id for item in items if item.category_id is not None}
+    missing = category_ids - await CategoryRepository(db=session).existing_ids(category_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Categories not found: {sorted(missing)}")
+
+def batch_response(products) -> IPostResponseBase[List[SProductRead]]:
+    return IPostResponseBase[List[SProductRead]](
+        data=[SProductRead.model_validate(product) for product in products],
+        meta={"count": len(products)}
+    )
+
+@router.post("/product", response_model=SProductRead)
 async def create_product(
     name: str,
     description: str,
     price: float,
     category_id: int,
     image_url: Optional[str] = None,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await CategoryRepository(db=uow.session).get(id=category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
-    db_product = Product(
+    product = await ProductRepository(db=uow.session).create(SProductCreate(
         name=name,
         description=description,
         price=price,
         category_id=category_id,
         image_url=image_url
+    ))
+    await uow.commit()
+    await catalog_changed()
+    return product
+
+@router.get("/products", response_model=IGetResponseBase[List[SProductRead]])
+async def get_products(
+    request: Request,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = Query(default=None, ge=0),
+    max_price: Optional[float] = Query(default=None, ge=0),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    sort_field: Literal["created_at", "price", "name"] = "created_at",
+    sort_order: Literal["asc", "desc"] = "desc",
+    session: AsyncSession = Depends(get_session)
+):
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=422, detail="min_price is greater than max_price")
+
+    params = {
+        "category_id": category_id,
+        "min_price": min_price,
+        "max_price": max_price,
+        "cursor": cursor,
+        "limit": limit,
+        "sort_field": sort_field,
+        "sort_order": sort_order,
+    }
+    key = urlencode(sorted((k, v) for k, v in params.items() if v is not None))
+
+    # Страница меню из кэша, в БД идем только при промахе
+    cached = await product_list_cache.get(key)
+    if cached is None:
+        products, next_cursor = await ProductRepository(db=session).catalog(**params)
+        body = IGetResponseBase[List[SProductRead]](
+            data=[SProductRead.model_validate(product) for product in products],
+            meta={"next_cursor": next_cursor}
+        ).model_dump_json()
+        cached = {"body": body, "etag": compute_etag(body)}
+        await product_list_cache.set(key, cached)
+
+    return etag_response(request, cached["body"], cached["etag"])
+
+@router.get("/products/search", response_model=IGetResponseBase[List[SProductRead]])
+async def search_products(
+    q: str = Query(min_length=2, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    session: AsyncSession = Depends(get_session)
+):
+    # Нечеткий поиск: "капуч" находит "Капучино"
+    products, next_cursor = await ProductRepository(db=session).search(
+        q.strip(),
+        cursor=cursor,
+        limit=limit
+    )
+    return IGetResponseBase[List[SProductRead]](
+        data=[SProductRead.model_validate(product) for product in products],
+        meta={"next_cursor": next_cursor}
     )
-    db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    return db_product
-
-@router.get("/products")
-async def get_products():
-    return {"message": "List of products"}
-
-@router.get("/product/{product_id}")
-async def read_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+
+@router.get("/product/{product_id}", response_model=SProductRead)
+async def read_product(product_id: int, session: AsyncSession = Depends(get_session)):
+    product = await ProductRepository(db=session).get(id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
-@router.put("/product/{product_id}")
+@router.put("/product/{product_id}", response_model=SProductRead)
 async def update_product(
     product_id: int,
     name: Optional[str] = None,
@@ -57,47 +141,119 @@ async def update_product(
     price: Optional[float] = None,
     category_id: Optional[int] = None,
     image_url: Optional[str] = None,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product_repo = ProductRepository(db=uow.session)
+    product = await product_repo.get(id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    if name:
-        product.name = name
-    if description:
-        product.description = description
-    if price:
-        product.price = price
     if category_id:
-        category = db.query(Category).filter(Category.id == category_id).first()
+        category = await CategoryRepository(db=uow.session).get(id=category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
-        product.category_id = category_id
-    if image_url:
-        product.image_url = image_url
     
-    db.commit()
-    db.refresh(product)
+    changes = {
+        "name": name,
+        "description": description,
+        "price": price,
+        "category_id": category_id,
+        "image_url": image_url,
+    }
+    product = await product_repo.update(
+        obj_current=product,
+        obj_in=SProductUpdate(**{k: v for k, v in changes.items() if v})
+    )
+    await uow.commit()
+    await catalog_changed()
     return product
 
 @router.delete("/product/{product_id}")
 async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product_repo = ProductRepository(db=uow.session)
+    product = await product_repo.get(id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    db.delete(product)
-    db.commit()
-    return {"message": "Product deleted successfully"} 
\ No newline at end of file
+    # the lookup above is reused, no second query
+    await product_repo.delete(id=product_id)
+    await uow.commit()
+    await catalog_changed()
+    return {"message": "Product deleted successfully"}
+
+# Пакетные операции для импорта меню: одна транзакция на каждые BULK_CHUNK_SIZE строк
+
+@router.post("/products/batch", response_model=IPostResponseBase[List[SProductRead]])
+async def create_products(
+    batch: SBatchRequest[SProductCreate],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    await check_categories(session, batch.items)
+    try:
+        products = await ProductRepository(db=session).bulk_create(batch.items)
+    finally:
+        # earlier chunks are committed even if a later one fails
+        await catalog_changed()
+    return batch_response(products)
+
+@router.put("/products/batch", response_model=IPostResponseBase[List[SProductRead]])
+async def upsert_products(
+    batch: SBatchRequest[SProductUpsert],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    await check_categories(session, batch.items)
+    try:
+        products = await ProductRepository(db=session).bulk_upsert(batch.items)
+    finally:
+        await catalog_changed()
+    return batch_response(products)
+
+@router.patch("/products/batch", response_model=IPostResponseBase[List[SProductRead]])
+async def update_products(
+    batch: SBatchRequest[SProductBatchUpdate],
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    await check_categories(session, batch.items)
+    try:
+        products = await ProductRepository(db=session).bulk_update(batch.items)
+    finally:
+        await catalog_changed()
+    return batch_response(products)
+
+@router.post("/products/batch/delete")
+async def delete_products(
+    batch: SBatchDelete,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    try:
+        deleted = await ProductRepository(db=session).bulk_delete(batch.ids)
+    finally:
+        await catalog_changed()
+    return {"message": "Products deleted successfully", "deleted": deleted}
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from src.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from src.db.session import get_session
+from src.db.uow import UnitOfWork, get_uow
 from src.models.user import User, UserRole
+from src.repositories.user import UserRepository
+from src.schemas.common import IGetResponseBase
+from src.schemas.user import SUserAccountRead
 from src.core.security import get_password_hash, verify_password, create_access_token
 from src.dependencies import get_current_active_user
 from datetime import timedelta
@@ -15,31 +19,30 @@ async def register_user(
     username: str,
     email: str,
     password: str,
-    db: Session = Depends(get_db)
+    uow: UnitOfWork = Depends(get_uow)
 ):
-    db_user = db.query(User).filter(User.email == email).first()
+    db_user = await UserRepository(db=uow.session).get(email=email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash(password)
     db_user = User(
         username=username,
         email=email,
         hashed_password=hashed_password
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    uow.session.add(db_user)
+    await uow.commit()
     return {"message": "User created successfully"}
 
 @router.post("/token")
 async def login(
     username: str,
     password: str,
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_session)
 ):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    user = await UserRepository(db=session).get(username=username)
+    if not user or not await verify_password(password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -56,18 +59,17 @@ async def login(
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
-@router.get("/users")
-async def get_users():
-    return {"message": "List of users"}
-
-@router.get("/users")
+@router.get("/users", response_model=IGetResponseBase[List[SUserAccountRead]])
 async def read_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users 
\ No newline at end of file
+    users, next_cursor = await UserRepository(db=session).paginate(cursor=cursor, limit=limit)
+    return IGetResponseBase[List[SUserAccountRead]](
+        data=[SUserAccountRead.model_validate(user) for user in users],
+        meta={"next_cursor": next_cursor}
+    ) 
\ No newline at end of file
@@ -18,6 +18,15 @@ class SAnswerUpdate(AnswerBase):
     answer_text: Optional[str] = None
 
 
+class SAnswerUpsert(SAnswerCreate):
+    """Batch import row, matched on id."""
+    id: int
+
+
+class SAnswerBatchUpdate(SAnswerUpdate):
+    id: int
+
+
 class SAnswerRead(AnswerBase):
     id: int
     created_at: datetime
@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CartBase(BaseModel):
+    user_id: int
+    total_amount: Optional[float] = 0.0
+
+
+class SCartCreate(CartBase):
+    pass
+
+
+class SCartUpdate(CartBase):
+    user_id: Optional[int] = None
+
+
+class SCartItemRead(BaseModel):
+    id: int
+    cart_id: int
+    product_id: int
+    quantity: int
+    price: float
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.schemas.product import SProductRead
+
+
+class CategoryBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    slug: Optional[str] = None
+
+
+class SCategoryCreate(CategoryBase):
+    pass
+
+
+class SCategoryUpdate(CategoryBase):
+    name: Optional[str] = None
+
+
+class SCategoryUpsert(SCategoryCreate):
+    """Batch import row, matched on slug."""
+    slug: str
+
+
+class SCategoryBatchUpdate(SCategoryUpdate):
+    id: int
+
+
+class SCategoryRead(CategoryBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SMenuCategoryRead(SCategoryRead):
+    products: List[SProductRead] = []
@@ -1,6 +1,6 @@
-from typing import Any, Dict, Generic, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 T = TypeVar("T")
@@ -19,3 +19,15 @@ class IGetResponseBase(IResponseBase[T], Generic[T]):
 
 class IPostResponseBase(IResponseBase[T], Generic[T]):
     message: str = "Created successfully"
+
+
+# upper bound for one admin batch request; bigger imports go in several calls
+BATCH_MAX_ITEMS = 5000
+
+
+class SBatchRequest(BaseModel, Generic[T]):
+    items: List[T] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class SBatchDelete(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=BATCH_MAX_ITEMS)
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from src.models.order import OrderStatus
+
+
+class OrderBase(BaseModel):
+    user_id: int
+    status: OrderStatus = OrderStatus.PENDING
+    total_amount: Optional[float] = None
+    delivery_address: Optional[str] = None
+    phone_number: Optional[str] = None
+
+
+class SOrderCreate(OrderBase):
+    pass
+
+
+class SOrderUpdate(OrderBase):
+    user_id: Optional[int] = None
+    status: Optional[OrderStatus] = None
+
+
+class SOrderItemRead(BaseModel):
+    id: int
+    order_id: int
+    product_id: int
+    quantity: int
+    price: float
+
+    class Config:
+        from_attributes = True
+
+
+class SOrderRead(OrderBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SOrderWithItemsRead(SOrderRead):
+    items: List[SOrderItemRead] = []
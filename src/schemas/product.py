@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ProductBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    price: float
+    image_url: Optional[str] = None
+    category_id: int
+
+
+class SProductCreate(ProductBase):
+    pass
+
+
+class SProductUpdate(ProductBase):
+    name: Optional[str] = None
+    price: Optional[float] = None
+    category_id: Optional[int] = None
+
+
+class SProductUpsert(SProductCreate):
+    """Batch import row, matched on id."""
+    id: int
+
+
+class SProductBatchUpdate(SProductUpdate):
+    id: int
+
+
+class SProductRead(ProductBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
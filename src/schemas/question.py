@@ -22,6 +22,15 @@ class SQuestionUpdate(QuestionBase):
     question_text: Optional[str] = None
 
 
+class SQuestionUpsert(SQuestionCreate):
+    """Batch import row, matched on id."""
+    id: int
+
+
+class SQuestionBatchUpdate(SQuestionUpdate):
+    id: int
+
+
 
 class SQuestionRead(QuestionBase):
     id: int
@@ -3,6 +3,8 @@ from typing import Optional, List
 
 from pydantic import BaseModel, EmailStr
 
+from src.models.user import UserRole
+
 
 
 
@@ -39,6 +41,19 @@ class SUserRead(UserBase):
         from_attributes = True
 
 
+class SUserAccountRead(BaseModel):
+    id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    is_active: Optional[bool] = None
+    is_verified: Optional[bool] = None
+    role: Optional[UserRole] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 example_user = SUserRead(
     id=1,
     email="john@doe.com",
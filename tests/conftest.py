@@ -1,49 +1,134 @@
+import os
+import tempfile
+
+# The engines are built from the settings on import, so point them
+# at a throwaway SQLite file before anything from src is loaded.
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TEST_DB_PATH}")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
 
 from src.main import app
-from src.database import Base, get_db
+from src.models.base import Base
+from src.db.session import get_session
+from src.repositories.interests import interest_resolver
+from src.repositories.menu import menu_snapshot
+from src.repositories.product import product_list_cache, product_search_index
+from src.repositories.question import questionnaire_cache
+from src.repositories.user import principal_cache
 from src.core.config import settings
+from src.core.security import create_access_token
+from src.repositories.auth import create_access_token as create_v1_access_token
+from src.models import Category, Product, User, UserRole
+
+pytest_plugins = ["tests.query_budget"]
 
 # Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+)
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{TEST_DB_PATH}",
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
-@pytest.fixture(scope="session")
+@pytest.fixture(scope="function")
 def db_engine():
     Base.metadata.create_all(bind=engine)
+    SQLModel.metadata.create_all(bind=engine)
     yield engine
+    SQLModel.metadata.drop_all(bind=engine)
     Base.metadata.drop_all(bind=engine)
+    # ids are reused once the tables are recreated
+    principal_cache.local.clear()
+    product_list_cache.entries.local.clear()
+    menu_snapshot.clear()
+    product_search_index.invalidate()
+    questionnaire_cache.entries.local.clear()
+    interest_resolver.invalidate()
 
 @pytest.fixture(scope="function")
 def db_session(db_engine):
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal()
 
     yield session
 
     session.close()
-    transaction.rollback()
-    connection.close()
 
 @pytest.fixture(scope="function")
-def client(db_session):
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+def client(db_engine):
+    async def override_get_session():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session] = override_get_session
     with TestClient(app) as test_client:
         yield test_client
-    app.dependency_overrides.clear() 
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope="function")
+def customer(db_session):
+    user = User(
+        username="customer",
+        email="customer@example.com",
+        hashed_password="not-used",
+        is_active=True,
+        role=UserRole.USER,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+@pytest.fixture(scope="function")
+def auth_headers(customer):
+    token = create_access_token(data={"sub": customer.username})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def admin(db_session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        hashed_password="not-used",
+        is_active=True,
+        role=UserRole.ADMIN,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+@pytest.fixture(scope="function")
+def admin_headers(admin):
+    token = create_access_token(data={"sub": admin.username})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def v1_admin_headers(admin):
+    # /api/v1 tokens carry the user id
+    token = create_v1_access_token(data={"sub": str(admin.id)})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def products(db_session):
+    category = Category(name="Coffee", slug="coffee")
+    db_session.add(category)
+    db_session.flush()
+    items = [
+        Product(name="Espresso", price=150.0, category_id=category.id),
+        Product(name="Cappuccino", price=220.0, category_id=category.id),
+    ]
+    db_session.add_all(items)
+    db_session.commit()
+    return items
@@ -0,0 +1,76 @@
+"""
+pytest plugin for query budgets: the `query_budget` fixture checks the
+database work of the requests a test makes to one route.
+
+    def test_checkout(client, auth_headers, query_budget):
+        with query_budget("POST /api/order", max_queries=8):
+            client.post("/api/order", ...)
+
+The block fails if no request reached the route, or if one of them ran
+more queries (or spent more time in the database) than allowed, or
+repeated a statement often enough to look like an N+1.
+"""
+from typing import List, Optional
+
+import pytest
+
+from src.core.metrics import RequestStats, request_observers
+from src.db.engine import instrument_engine
+from src.db.profiler import query_profiler
+
+
+class QueryBudget:
+    def __init__(
+            self,
+            route: str,
+            max_queries: int,
+            max_seconds: Optional[float] = None,
+            repeat_threshold: Optional[int] = None,
+    ) -> None:
+        self.route = route
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+        self.repeat_threshold = repeat_threshold or query_profiler.repeat_threshold
+        self.requests: List[RequestStats] = []
+
+    def _observe(self, method: str, route: str, stats: RequestStats) -> None:
+        if f"{method} {route}" == self.route:
+            self.requests.append(stats)
+
+    def __enter__(self) -> "QueryBudget":
+        request_observers.append(self._observe)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        request_observers.remove(self._observe)
+        if exc_type is not None:
+            return
+
+        assert self.requests, f"No request to {self.route} was made"
+        for number, stats in enumerate(self.requests, 1):
+            problems = []
+            if stats.queries > self.max_queries:
+                problems.append(f"{stats.queries} queries, budget {self.max_queries}")
+            if self.max_seconds is not None and stats.seconds > self.max_seconds:
+                problems.append(f"{stats.seconds * 1000:.1f} ms in the database, budget {self.max_seconds * 1000:.0f} ms")
+            profile = sorted((stats.profile or {}).items(), key=lambda item: item[1][0], reverse=True)
+            problems += [
+                f"N+1: {count} x [{key}]" for key, (count, _, _) in profile if count >= self.repeat_threshold
+            ]
+            if problems:
+                queries = "\n".join(f"  {count} x {site}: {key}" for key, (count, _, site) in profile)
+                pytest.fail(
+                    f"{self.route} (request {number}) is over its query budget: {'; '.join(problems)}\n{queries}",
+                    pytrace=False,
+                )
+
+
+@pytest.fixture
+def query_budget(monkeypatch):
+    from tests.conftest import async_engine
+
+    # the tests' engine isn't built by create_engine, so it isn't instrumented yet
+    instrument_engine(async_engine, "test")
+    # off by default; the per-statement profile is what shows an N+1
+    monkeypatch.setattr(query_profiler, "enabled", True)
+    return QueryBudget
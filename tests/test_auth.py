@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import status
+
+from src.core.cache import InMemoryCacheBackend, TwoLevelCache
+from src.core.exceptions import ServiceUnavailableException
+from src.core.security import PasswordHasher, password_hasher, pwd_context
+from src.db.uow import UnitOfWork
+from src.repositories.user import UserRepository, principal_cache
+from src.schemas.user import SUserUpdate
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def test_principal_is_served_from_cache(client, auth_headers, customer, db_session):
+    assert client.get("/api/orders", headers=auth_headers).status_code == status.HTTP_200_OK
+
+    # The row is gone, but the validated principal is still cached
+    db_session.delete(customer)
+    db_session.commit()
+    assert client.get("/api/orders", headers=auth_headers).status_code == status.HTTP_200_OK
+
+
+def test_user_update_invalidates_principal(client, auth_headers, customer):
+    assert client.get("/api/orders", headers=auth_headers).status_code == status.HTTP_200_OK
+    assert asyncio.run(principal_cache.get(f"username:{customer.username}")) is not None
+
+    async def deactivate():
+        async with TestingAsyncSessionLocal() as session:
+            async with UnitOfWork(session) as uow:
+                repo = UserRepository(db=uow.session)
+                user = await repo.get(id=customer.id)
+                await repo.update(obj_current=user, obj_in=SUserUpdate())
+                # dropped only once the change is committed
+                assert await principal_cache.get(f"username:{customer.username}") is not None
+
+    asyncio.run(deactivate())
+    assert asyncio.run(principal_cache.get(f"username:{customer.username}")) is None
+
+
+def test_two_level_cache_falls_back_to_shared_backend():
+    backend = InMemoryCacheBackend()
+    worker_a = TwoLevelCache("principal", ttl=60, maxsize=10, backend=backend)
+    worker_b = TwoLevelCache("principal", ttl=60, maxsize=10, backend=backend)
+
+    async def scenario():
+        await worker_a.set("id:1", {"id": 1, "username": "barista"})
+        assert await worker_b.get("id:1") == {"id": 1, "username": "barista"}
+
+        await worker_a.invalidate("id:1")
+        worker_b.local.clear()
+        assert await worker_b.get("id:1") is None
+
+    asyncio.run(scenario())
+
+
+def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+
+    async def scenario():
+        hashed = await hasher.run(pwd_context.hash, "espresso")
+        assert await hasher.run(pwd_context.verify, "espresso", hashed)
+
+        slow = asyncio.ensure_future(hasher.run(time.sleep, 0.2))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceUnavailableException):
+            await hasher.run(pwd_context.hash, "latte")
+        await slow
+
+    asyncio.run(scenario())
+    assert hasher.metrics()["rejected"] == 1
+    hasher.shutdown()
+
+
+def test_saturated_login_asks_to_retry(client, customer, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = client.post("/api/token", params={"username": customer.username, "password": "latte"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["status"] == "error"
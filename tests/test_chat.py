@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+from src.core.pubsub import InMemoryHub, InMemoryPubSub, PostgresPubSub
+from src.core.websocket import ConnectionManager, DROP
+
+
+def test_chat_rooms_are_isolated(client):
+    with client.websocket_connect("/api/ws/chat/tverskaya") as alice, \
+            client.websocket_connect("/api/ws/chat/tverskaya") as bob, \
+            client.websocket_connect("/api/ws/chat/arbat") as carol:
+        alice.send_text("капучино готов")
+        assert alice.receive_text() == "Message: капучино готов"
+        assert bob.receive_text() == "Message: капучино готов"
+
+        carol.send_text("hi")
+        assert carol.receive_text() == "Message: hi"
+
+
+class StuckSocket:
+    """Accepts, then never finishes sending."""
+
+    def __init__(self):
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await asyncio.sleep(3600)
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+def test_slow_consumer_does_not_block_room():
+    async def scenario(overflow):
+        manager = ConnectionManager(queue_size=2, overflow=overflow)
+        stuck = StuckSocket()
+        await manager.connect(stuck, "arbat")
+
+        for i in range(5):
+            await manager.broadcast(f"order {i} ready", "arbat")
+        await asyncio.sleep(0)
+        return manager, stuck
+
+    manager, stuck = asyncio.run(scenario("evict"))
+    assert manager.evicted == 1
+    assert manager.active_connections == 0
+    assert stuck.closed_with is not None
+    # the close task was kept alive until it finished, then let go
+    assert not manager._closing
+
+    manager, _ = asyncio.run(scenario(DROP))
+    assert manager.dropped >= 2
+    assert manager.active_connections == 1
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.received.append(message)
+
+
+def test_broadcast_reaches_other_workers():
+    hub = InMemoryHub()
+
+    async def scenario():
+        worker_a = ConnectionManager(pubsub=InMemoryPubSub(hub))
+        worker_b = ConnectionManager(pubsub=InMemoryPubSub(hub))
+        await worker_a.start()
+        await worker_b.start()
+
+        on_a, on_b, elsewhere = RecordingSocket(), RecordingSocket(), RecordingSocket()
+        await worker_a.connect(on_a, "arbat")
+        await worker_b.connect(on_b, "arbat")
+        await worker_b.connect(elsewhere, "tverskaya")
+
+        await worker_a.broadcast("раф готов", "arbat")
+        await asyncio.sleep(0.01)
+
+        await worker_a.stop()
+        await worker_b.stop()
+        return on_a, on_b, elsewhere
+
+    on_a, on_b, elsewhere = asyncio.run(scenario())
+    assert on_a.received == ["раф готов"]
+    assert on_b.received == ["раф готов"]
+    assert elsewhere.received == []
+
+
+def test_notifications_are_delivered_from_tracked_tasks():
+    received = []
+
+    async def handler(room, message):
+        await asyncio.sleep(0)
+        received.append((room, message))
+
+    async def scenario():
+        pubsub = PostgresPubSub("postgresql://localhost/coffee")
+        pubsub._handler = handler
+        pubsub._on_notify(None, 1, "chat", json.dumps({"origin": "other", "room": "arbat", "message": "раф готов"}))
+        assert len(pubsub._deliveries) == 1
+        await asyncio.sleep(0.01)
+        assert not pubsub._deliveries
+
+        pubsub._on_notify(None, 1, "chat", json.dumps({"origin": "other", "room": "arbat", "message": "later"}))
+        await pubsub.stop()
+        assert not pubsub._deliveries
+
+    asyncio.run(scenario())
+    assert received == [("arbat", "раф готов")]
@@ -0,0 +1,148 @@
+import asyncio
+import socket
+import time
+
+import pytest
+from fastapi import status
+
+from src.repositories.contact import EmailDispatcher, OutgoingEmail, SMTPConnection, email_dispatcher
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_contact_us_is_queued_and_delivered(client, smtp_server, monkeypatch, tmp_path):
+    controller, handler = smtp_server
+    monkeypatch.setattr(email_dispatcher, "connection", SMTPConnection(
+        host=controller.hostname, port=controller.port, starttls=False
+    ))
+    monkeypatch.setattr(email_dispatcher, "spool_dir", str(tmp_path))
+
+    response = client.post(
+        "/api/v1/contact-us/",
+        data={"body": "Где заказать торт?", "email": "guest@example.com"},
+        files={"file": ("menu.txt", b"latte, raf", "text/plain")},
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+    assert wait_for(lambda: len(handler.messages) == 1)
+    assert 'filename="menu.txt"' in handler.messages[0]
+    assert wait_for(lambda: not any(tmp_path.iterdir()))
+
+
+def test_failed_sends_are_retried_with_backoff(smtp_server, tmp_path):
+    controller, handler = smtp_server
+    port = controller.port
+    dispatcher = EmailDispatcher(
+        connection=SMTPConnection(host="127.0.0.1", port=1, starttls=False, timeout=1),
+        sender="cafe@example.com",
+        recipient="support@example.com",
+        retry_backoff=0.05,
+        spool_dir=str(tmp_path),
+    )
+
+    async def scenario():
+        await dispatcher.enqueue(body="hello", email="guest@example.com")
+        for _ in range(100):
+            if dispatcher.retried:
+                break
+            await asyncio.sleep(0.01)
+
+        # the server comes back before the retry fires
+        dispatcher.connection = SMTPConnection(host="127.0.0.1", port=port, starttls=False)
+        for _ in range(100):
+            if dispatcher.sent:
+                break
+            await asyncio.sleep(0.02)
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert dispatcher.metrics()["sent"] == 1
+    assert len(handler.messages) == 1
+
+
+def test_malformed_email_fails_alone(smtp_server, tmp_path):
+    controller, handler = smtp_server
+    dispatcher = EmailDispatcher(
+        connection=SMTPConnection(host=controller.hostname, port=controller.port, starttls=False),
+        sender="cafe@example.com",
+        recipient="support@example.com",
+        retry_backoff=0.05,
+        spool_dir=str(tmp_path),
+    )
+
+    async def scenario():
+        await dispatcher.enqueue(body="first", email="guest@example.com")
+        await dispatcher.enqueue(body="spam", email="guest@example.com\nBcc: victim@example.com")
+        await dispatcher.enqueue(body="last", email="other@example.com")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert dispatcher.metrics()["sent"] == 2
+    assert dispatcher.metrics()["failed"] == 1
+    assert dispatcher.retried == 0
+    assert len(handler.messages) == 2
+    assert "victim@example.com" not in "".join(handler.messages)
+
+
+def test_lost_attachment_is_dropped_not_retried(smtp_server, tmp_path):
+    controller, handler = smtp_server
+    dispatcher = EmailDispatcher(
+        connection=SMTPConnection(host=controller.hostname, port=controller.port, starttls=False),
+        sender="cafe@example.com",
+        recipient="support@example.com",
+        retry_backoff=0.05,
+        spool_dir=str(tmp_path),
+    )
+
+    async def scenario():
+        await dispatcher.start()
+        lost = OutgoingEmail(body="menu", email="guest@example.com",
+                             attachment_path=str(tmp_path / "gone"), filename="menu.txt")
+        await dispatcher._queue.put(lost)
+        await dispatcher.enqueue(body="hello", email="other@example.com")
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert dispatcher.metrics()["failed"] == 1
+    assert dispatcher.retried == 0
+    assert dispatcher.metrics()["sent"] == 1
+    assert len(handler.messages) == 1
+
+
+def test_contact_us_rejects_invalid_email(client):
+    response = client.post(
+        "/api/v1/contact-us/",
+        data={"body": "hi", "email": "guest@example.com\nBcc: victim@example.com"},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
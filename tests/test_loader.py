@@ -0,0 +1,73 @@
+import asyncio
+
+from sqlalchemy import event
+
+from src.db.uow import UnitOfWork
+from src.models import Category
+from src.repositories.category import CategoryRepository
+from src.repositories.user import UserRepository
+from src.schemas.category import SCategoryUpdate
+from tests.conftest import TestingAsyncSessionLocal, async_engine
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(async_engine.sync_engine, "before_cursor_execute", self)
+
+
+def test_concurrent_gets_share_one_query(db_session):
+    db_session.add_all([Category(name=name, slug=name.lower()) for name in ("Coffee", "Tea", "Cocoa")])
+    db_session.commit()
+
+    async def scenario():
+        async with TestingAsyncSessionLocal() as session:
+            repo = CategoryRepository(db=session)
+            with QueryCounter() as counter:
+                coffee, tea, again, missing = await asyncio.gather(
+                    repo.get(id=1), repo.get(id=2), repo.get(id=1), repo.get(id=99)
+                )
+                assert [coffee.name, tea.name, missing] == ["Coffee", "Tea", None]
+                assert again is coffee
+                assert len(counter.statements) == 1
+                assert " IN " in counter.statements[0]
+
+                # loaded earlier in the request: no query at all
+                assert await repo.get(id=2) is tea
+                assert await repo.get(id=99) is None
+                # same for repeated lookups by other columns
+                assert await repo.get(slug="cocoa") is await repo.get(slug="cocoa")
+                assert len(counter.statements) == 2
+
+    asyncio.run(scenario())
+
+
+def test_writes_drop_cached_lookups(db_session, customer):
+    db_session.add(Category(name="Coffee", slug="coffee"))
+    db_session.commit()
+
+    async def scenario():
+        async with TestingAsyncSessionLocal() as session:
+            async with UnitOfWork(session) as uow:
+                repo = CategoryRepository(db=uow.session)
+                coffee = await repo.get(slug="coffee")
+                await repo.update(obj_current=coffee, obj_in=SCategoryUpdate(slug="espresso-bar"))
+                assert await repo.get(slug="coffee") is None
+                assert await repo.get(slug="espresso-bar") is coffee
+
+                # a soft-deleted user isn't handed out from memory either
+                users = UserRepository(db=uow.session)
+                assert await users.get(id=customer.id) is not None
+                await users.delete(id=customer.id)
+                assert await users.get(id=customer.id) is None
+
+    asyncio.run(scenario())
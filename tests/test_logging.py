@@ -0,0 +1,72 @@
+import logging
+
+import pytest
+from loguru import logger as loguru_logger
+
+from src.core.logger import LogPipeline, parse_sample_rates
+
+
+@pytest.fixture
+def messages():
+    collected = []
+    handler_id = loguru_logger.add(collected.append, format="{name}:{function} {level} {message}")
+    yield collected
+    loguru_logger.remove(handler_id)
+
+
+def make_logger(name, pipeline):
+    log = logging.getLogger(name)
+    log.handlers = [pipeline]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    return log
+
+
+def test_records_are_written_by_the_writer_thread(messages):
+    pipeline = LogPipeline()
+    log = make_logger("tests.pipeline", pipeline)
+    pipeline.start()
+
+    order = {"id": 1, "status": "pending"}
+    log.info("Order %s is %s", 1, order)
+    # mutable arguments are rendered when logged, not when written
+    order["status"] = "confirmed"
+    log.warning("Slow query: %.1f ms", 512.34)
+    pipeline.stop()
+
+    assert [message.rstrip("\n") for message in messages] == [
+        "tests.pipeline:test_records_are_written_by_the_writer_thread INFO Order 1 is {'id': 1, 'status': 'pending'}",
+        "tests.pipeline:test_records_are_written_by_the_writer_thread WARNING Slow query: 512.3 ms",
+    ]
+    assert pipeline.stats()["written"] == 2
+
+
+def test_hot_loggers_are_sampled(messages):
+    pipeline = LogPipeline(sample_rates=parse_sample_rates("tests.hot=0.1, tests.hot.muted=0"))
+    hot = make_logger("tests.hot.repository", pipeline)
+    muted = make_logger("tests.hot.muted", pipeline)
+    pipeline.start()
+
+    for i in range(100):
+        hot.info("Fetching %s", i)
+        muted.debug("Fetching %s", i)
+    hot.error("Warnings and above are always kept")
+    muted.warning("Even here")
+    pipeline.stop()
+
+    assert len(messages) == 12
+    assert pipeline.stats()["sampled"] == 190
+
+
+def test_full_buffer_drops_records(messages):
+    pipeline = LogPipeline(maxsize=5)
+    log = make_logger("tests.flood", pipeline)
+
+    # no writer yet: the buffer fills up and the rest is counted, not waited on
+    for i in range(8):
+        log.info("Record %s", i)
+    assert pipeline.stats()["dropped"] == 3
+
+    pipeline.start()
+    pipeline.stop()
+    assert [message.split()[-1] for message in messages] == ["0", "1", "2", "3", "4"]
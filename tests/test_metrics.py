@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import re
+import time
+
+from src.core.metrics import MetricsRegistry, MultiprocessStore
+from src.db.engine import instrument_engine
+from src.models import Category, Product
+from tests.conftest import async_engine
+
+
+def sample(text, name, **labels):
+    """Value of one series in an exposition, 0 if absent."""
+    for line in text.splitlines():
+        match = re.fullmatch(r"([a-z_]+)(?:\{(.*)\})? (\S+)", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+        if found == {key: str(value) for key, value in labels.items()}:
+            return float(match.group(3))
+    return 0.0
+
+
+def test_requests_are_recorded_per_route(client, db_session):
+    instrument_engine(async_engine, "test")
+    category = Category(name="Coffee", slug="coffee")
+    db_session.add(category)
+    db_session.flush()
+    product = Product(name="Espresso", price=150.0, category_id=category.id)
+    db_session.add(product)
+    db_session.commit()
+
+    route = dict(method="GET", route="/api/product/{product_id}")
+    before = client.get("/metrics").text
+
+    assert client.get(f"/api/product/{product.id}").status_code == 200
+    assert client.get("/api/product/9999").status_code == 404
+    assert client.get("/no/such/page").status_code == 404
+
+    after = client.get("/metrics")
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = after.text
+
+    def delta(name, **labels):
+        return sample(text, name, **labels) - sample(before, name, **labels)
+
+    assert delta("http_requests_total", status="200", **route) == 1
+    assert delta("http_requests_total", status="404", **route) == 1
+    assert delta("http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert delta("http_request_duration_seconds_count", **route) == 2
+    assert delta("http_request_duration_seconds_bucket", le="+Inf", **route) == 2
+    # each lookup is one query, counted against the request that made it
+    assert delta("http_request_db_queries_sum", **route) == 2
+    assert delta("db_queries_total", engine="test") >= 2
+    assert sample(text, "http_requests_in_progress", method="GET") == 1
+    assert "# TYPE ws_connections gauge" in text
+
+
+def test_workers_are_added_up(tmp_path):
+    directory = str(tmp_path)
+
+    def worker(requests, connections):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc((), requests)
+        registry.gauge("connections", "Connections").set((), connections)
+        registry.gauge("saturation", "Busiest pool", aggregate="max").set((), connections / 10)
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)).observe((), 0.5)
+        return registry
+
+    # a worker that exited a while ago: its counters still count, its gauges don't
+    exited = worker(requests=5, connections=7).collect()
+    with open(os.path.join(directory, "1.json"), "w") as file:
+        json.dump({"time": time.time() - 60, "stopped": False, "metrics": exited}, file)
+
+    other = MultiprocessStore(worker(requests=2, connections=3), directory)
+    asyncio.run(other.write())
+    os.replace(other.path, os.path.join(directory, "2.json"))
+
+    text = asyncio.run(MultiprocessStore(worker(requests=1, connections=4), directory).exposition())
+
+    assert sample(text, "requests_total") == 8
+    assert sample(text, "connections") == 7
+    assert sample(text, "saturation") == 0.4
+    assert sample(text, "latency_seconds_bucket", le="0.1") == 0
+    assert sample(text, "latency_seconds_bucket", le="1.0") == 3
+    assert sample(text, "latency_seconds_count") == 3
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+from fastapi import status
+
+from src.core.pagination import encode_cursor
+from src.models import Cart, Order
+
+
+def test_add_to_cart_and_checkout(client, auth_headers, products):
+    espresso, cappuccino = products
+
+    response = client.post(
+        "/api/cart", params={"product_id": espresso.id, "quantity": 2}, headers=auth_headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["quantity"] == 2
+
+    client.post("/api/cart", params={"product_id": cappuccino.id}, headers=auth_headers)
+    response = client.post(
+        "/api/cart", params={"product_id": espresso.id, "quantity": 1}, headers=auth_headers
+    )
+    assert response.json()["quantity"] == 3
+
+    response = client.post(
+        "/api/order",
+        params={"delivery_address": "ул. Примерная, 1", "phone_number": "+79991234567"},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    order = response.json()
+    assert order["total_amount"] == 3 * 150.0 + 220.0
+    assert sorted((i["product_id"], i["quantity"]) for i in order["items"]) == [
+        (espresso.id, 3), (cappuccino.id, 1)
+    ]
+
+    response = client.get(f"/api/order/{order['id']}", headers=auth_headers)
+    assert response.json()["status"] == "pending"
+
+    response = client.post(
+        "/api/order",
+        params={"delivery_address": "ул. Примерная, 1", "phone_number": "+79991234567"},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_remove_from_cart(client, auth_headers, products):
+    espresso, _ = products
+
+    item = client.post(
+        "/api/cart", params={"product_id": espresso.id}, headers=auth_headers
+    ).json()
+
+    response = client.delete(f"/api/cart/{item['id']}", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.delete(f"/api/cart/{item['id']}", headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_cart_total_follows_changes(client, auth_headers, customer, products, db_session):
+    espresso, cappuccino = products
+
+    client.post("/api/cart", params={"product_id": espresso.id, "quantity": 2}, headers=auth_headers)
+    item = client.post(
+        "/api/cart", params={"product_id": cappuccino.id}, headers=auth_headers
+    ).json()
+    client.post("/api/cart", params={"product_id": espresso.id}, headers=auth_headers)
+
+    cart = db_session.query(Cart).filter_by(user_id=customer.id).one()
+    assert cart.total_amount == 3 * 150.0 + 220.0
+
+    client.delete(f"/api/cart/{item['id']}", headers=auth_headers)
+    db_session.refresh(cart)
+    assert cart.total_amount == 3 * 150.0
+
+    response = client.post("/api/cart", params={"product_id": 999}, headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_list_orders_with_cursor(client, auth_headers, customer, db_session):
+    created_at = datetime(2024, 1, 1, 12, 0)
+    db_session.add_all([
+        Order(user_id=customer.id, total_amount=100.0 + i, created_at=created_at)
+        for i in range(5)
+    ])
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/orders", params=params, headers=auth_headers).json()
+        seen.extend(order["id"] for order in body["data"])
+        cursor = body["meta"]["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+    response = client.get("/api/orders", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    for forged in (
+        encode_cursor("price", "desc", 100.0, seen[0]),
+        encode_cursor("id", "sideways", 1, seen[0]),
+    ):
+        response = client.get("/api/orders", params={"cursor": forged}, headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_failed_request_rolls_back_its_unit_of_work(client, auth_headers, customer, db_session):
+    # the cart is created before the product lookup fails; nothing may persist
+    response = client.post("/api/cart", params={"product_id": 999}, headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert db_session.query(Cart).filter_by(user_id=customer.id).count() == 0
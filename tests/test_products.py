@@ -0,0 +1,259 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import status
+
+from src.core.pubsub import InMemoryHub, InMemoryPubSub
+from src.models import Category, Order, OrderItem, Product
+from src.repositories.menu import MENU_ROOM, MenuSnapshot, menu_snapshot
+from src.repositories.question import QUESTIONNAIRE_ROOM
+from tests.conftest import TestingAsyncSessionLocal
+
+
+@pytest.fixture
+def menu(db_session):
+    coffee = Category(name="Coffee", slug="coffee")
+    tea = Category(name="Tea", slug="tea")
+    db_session.add_all([coffee, tea])
+    db_session.flush()
+    db_session.add_all([
+        Product(name="Espresso", price=150.0, category_id=coffee.id),
+        Product(name="Cappuccino", price=220.0, category_id=coffee.id),
+        Product(name="Latte", price=250.0, category_id=coffee.id),
+        Product(name="Green tea", price=120.0, category_id=tea.id),
+    ])
+    db_session.commit()
+    return coffee, tea
+
+
+def test_list_products_filters_and_pages(client, menu):
+    coffee, _ = menu
+
+    response = client.get(
+        "/api/products",
+        params={"category_id": coffee.id, "min_price": 200, "sort_field": "price", "sort_order": "asc"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["name"] for p in response.json()["data"]] == ["Cappuccino", "Latte"]
+
+    names, cursor = [], None
+    while True:
+        params = {"limit": 3, "sort_field": "price", "sort_order": "asc"}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/products", params=params).json()
+        names += [p["name"] for p in body["data"]]
+        cursor = body["meta"]["next_cursor"]
+        if not cursor:
+            break
+    assert names == ["Green tea", "Espresso", "Cappuccino", "Latte"]
+
+    response = client.get("/api/products", params={"min_price": 300, "max_price": 100})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_list_products_etag(client, menu):
+    response = client.get("/api/products")
+    etag = response.headers["etag"]
+
+    response = client.get("/api/products", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_product_writes_invalidate_listing(client, admin_headers, menu):
+    coffee, _ = menu
+    etag = client.get("/api/products").headers["etag"]
+
+    response = client.post(
+        "/api/product",
+        params={"name": "Mocha", "description": "", "price": 270.0, "category_id": coffee.id},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/api/products", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert "Mocha" in [p["name"] for p in response.json()["data"]]
+
+
+def test_menu_served_from_snapshot(menu, client, admin_headers):
+    coffee, tea = menu
+    # built on first request once the fixture data is in place
+    menu_snapshot.clear()
+    builds = menu_snapshot.builds
+
+    body = client.get("/api/menu").json()
+    assert [c["name"] for c in body["data"]] == ["Coffee", "Tea"]
+    assert [p["name"] for p in body["data"][1]["products"]] == ["Green tea"]
+
+    categories = client.get("/api/categories")
+    assert [c["name"] for c in categories.json()["data"]] == ["Coffee", "Tea"]
+    assert client.get(
+        "/api/categories", headers={"If-None-Match": categories.headers["etag"]}
+    ).status_code == status.HTTP_304_NOT_MODIFIED
+    assert menu_snapshot.builds == builds + 1
+
+    client.post(
+        "/api/product",
+        params={"name": "Oolong", "description": "", "price": 180.0, "category_id": tea.id},
+        headers=admin_headers,
+    )
+    for _ in range(50):
+        products = client.get("/api/menu").json()["data"][1]["products"]
+        if len(products) == 2:
+            break
+        time.sleep(0.05)
+    assert [p["name"] for p in products] == ["Green tea", "Oolong"]
+
+
+def test_search_products(client, admin_headers, db_session, menu):
+    coffee, _ = menu
+    db_session.add_all([
+        Product(name="Капучино", price=220.0, category_id=coffee.id),
+        Product(name="Раф", description="Сливки и ванильный сироп", price=260.0, category_id=coffee.id),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/products/search", params={"q": "капуч"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [p["name"] for p in response.json()["data"]] == ["Капучино"]
+
+    # typo, and a hit in the description only
+    assert [p["name"] for p in client.get("/api/products/search", params={"q": "cappucino"}).json()["data"]] == ["Cappuccino"]
+    assert [p["name"] for p in client.get("/api/products/search", params={"q": "ванильный"}).json()["data"]] == ["Раф"]
+
+    client.post(
+        "/api/product",
+        params={"name": "Капучино XL", "description": "", "price": 300.0, "category_id": coffee.id},
+        headers=admin_headers,
+    )
+    first = client.get("/api/products/search", params={"q": "капуч", "limit": 1}).json()
+    second = client.get(
+        "/api/products/search", params={"q": "капуч", "limit": 1, "cursor": first["meta"]["next_cursor"]}
+    ).json()
+    assert sorted(p["name"] for p in first["data"] + second["data"]) == ["Капучино", "Капучино XL"]
+    assert second["meta"]["next_cursor"] is None
+
+
+def test_product_batch_endpoints(client, menu, auth_headers, admin_headers):
+    coffee, tea = menu
+    items = [{"name": f"Syrup {i}", "price": 30.0 + i, "category_id": coffee.id} for i in range(3)]
+
+    response = client.post("/api/products/batch", json={"items": items}, headers=auth_headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.post("/api/products/batch", json={"items": items}, headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    created = response.json()["data"]
+    assert [p["name"] for p in created] == ["Syrup 0", "Syrup 1", "Syrup 2"]
+    assert response.json()["meta"] == {"count": 3}
+
+    response = client.post(
+        "/api/products/batch",
+        json={"items": [{"name": "Ghost", "price": 1.0, "category_id": 999}]},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.patch(
+        "/api/products/batch",
+        json={"items": [{"id": created[0]["id"], "price": 45.0}, {"id": 999, "price": 1.0}]},
+        headers=admin_headers,
+    )
+    assert [(p["name"], p["price"]) for p in response.json()["data"]] == [("Syrup 0", 45.0)]
+
+    response = client.put(
+        "/api/products/batch",
+        json={"items": [
+            {"id": created[1]["id"], "name": "Vanilla syrup", "price": 40.0, "category_id": coffee.id},
+            {"id": 500, "name": "Matcha", "price": 300.0, "category_id": tea.id},
+        ]},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert sorted(p["name"] for p in response.json()["data"]) == ["Matcha", "Vanilla syrup"]
+
+    response = client.post(
+        "/api/products/batch/delete",
+        json={"ids": [created[2]["id"], 999]},
+        headers=admin_headers,
+    )
+    assert response.json()["deleted"] == [created[2]["id"]]
+
+    # batch writes invalidate the cached listing like single ones do
+    names = [p["name"] for p in client.get("/api/products", params={"limit": 200}).json()["data"]]
+    assert "Matcha" in names and "Vanilla syrup" in names and "Syrup 2" not in names
+
+
+def test_batch_delete_keeps_ordered_products(client, menu, customer, admin_headers, db_session):
+    espresso = db_session.query(Product).filter_by(name="Espresso").one()
+    latte = db_session.query(Product).filter_by(name="Latte").one()
+    order = Order(user_id=customer.id, total_amount=150.0)
+    db_session.add(order)
+    db_session.flush()
+    db_session.add(OrderItem(order_id=order.id, product_id=espresso.id, quantity=1, price=150.0))
+    db_session.commit()
+    assert "Latte" in [p["name"] for p in client.get("/api/products").json()["data"]]
+
+    response = client.post(
+        "/api/products/batch/delete",
+        json={"ids": [espresso.id, latte.id]},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["data"] == {"deleted": [latte.id], "not_deleted": [espresso.id]}
+
+    # the part that was committed is visible straight away
+    names = [p["name"] for p in client.get("/api/products").json()["data"]]
+    assert "Espresso" in names and "Latte" not in names
+
+
+def test_delete_product(client, menu, admin_headers, db_session, query_budget):
+    latte = db_session.query(Product).filter_by(name="Latte").one()
+
+    assert client.delete("/api/product/9999", headers=admin_headers).status_code == status.HTTP_404_NOT_FOUND
+    with query_budget("DELETE /api/product/{product_id}", max_queries=3):
+        response = client.delete(f"/api/product/{latte.id}", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert client.delete(f"/api/product/{latte.id}", headers=admin_headers).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_category_batch_upsert_by_slug(client, menu, admin_headers):
+    response = client.put(
+        "/api/categories/batch",
+        json={"items": [
+            {"name": "Coffee drinks", "slug": "coffee"},
+            {"name": "Desserts", "slug": "desserts"},
+        ]},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    menu_snapshot.clear()
+    names = [c["name"] for c in client.get("/api/categories").json()["data"]]
+    assert names == ["Coffee drinks", "Desserts", "Tea"]
+
+
+def test_cache_invalidation_reaches_other_workers():
+    hub = InMemoryHub()
+    forgotten = []
+
+    async def scenario():
+        worker_a = MenuSnapshot(TestingAsyncSessionLocal, pubsub=InMemoryPubSub(hub))
+        worker_b = MenuSnapshot(TestingAsyncSessionLocal, pubsub=InMemoryPubSub(hub))
+        worker_b.subscribe(MENU_ROOM, lambda: forgotten.append("catalog"))
+        worker_b.subscribe(QUESTIONNAIRE_ROOM, lambda: forgotten.append("questionnaire"))
+        await worker_a.start()
+        await worker_b.start()
+
+        await worker_a.changed()
+        await worker_a.publish(QUESTIONNAIRE_ROOM)
+
+        await worker_a.stop()
+        await worker_b.stop()
+
+    asyncio.run(scenario())
+    assert forgotten == ["catalog", "questionnaire"]
@@ -0,0 +1,96 @@
+import pytest
+from fastapi import status
+
+from src.core.metrics import RequestStats, request_observers
+from src.db import profiler
+from src.db.profiler import QueryProfiler, fingerprint, query_profiler
+from tests.query_budget import QueryBudget
+
+CHECKOUT = {"delivery_address": "ул. Примерная, 1", "phone_number": "+79991234567"}
+
+
+def fill_cart(client, auth_headers, products):
+    for product in products:
+        client.post("/api/cart", params={"product_id": product.id, "quantity": 2}, headers=auth_headers)
+
+
+def test_user_endpoints_stay_within_budget(client, customer, query_budget):
+    with query_budget("GET /api/v1/user/", max_queries=2):
+        response = client.get("/api/v1/user/")
+    assert response.status_code == status.HTTP_200_OK
+
+    with query_budget("GET /api/v1/user/{id_or_uuid}", max_queries=2):
+        response = client.get(f"/api/v1/user/{customer.id}")
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_checkout_stays_within_budget(client, auth_headers, products, query_budget):
+    fill_cart(client, auth_headers, products)
+
+    with query_budget("POST /api/order", max_queries=7):
+        response = client.post("/api/order", params=CHECKOUT, headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_fingerprint_ignores_values():
+    assert fingerprint(
+        "SELECT * FROM users WHERE id IN ($1, $2, $3) AND name = 'bob' LIMIT 10"
+    ) == fingerprint(
+        "SELECT *\n  FROM users WHERE id IN ($1) AND name = 'it''s me' LIMIT 20"
+    ) == "SELECT * FROM users WHERE id IN (?) AND name = ? LIMIT ?"
+    assert fingerprint(
+        "INSERT INTO carts_2 (a, b) VALUES (?, ?), (?, ?), (?, ?)"
+    ) == "INSERT INTO carts_2 (a, b) VALUES (?)"
+
+
+def test_profiler_is_off_by_default_and_bounded(monkeypatch):
+    idle = QueryProfiler()
+    idle.observe(None, "SELECT 1", 0.01)
+    assert idle.queries == {}
+
+    sites = iter(["routers/cart.py:10", "routers/cart.py:20", "routers/cart.py:30", "routers/cart.py:10"])
+    monkeypatch.setattr(profiler, "call_site", lambda: next(sites))
+    bounded = QueryProfiler(enabled=True, max_fingerprints=1, max_sites=2)
+    stats = RequestStats()
+    for _ in range(3):
+        bounded.observe(stats, "SELECT * FROM carts WHERE id = 1", 0.01)
+    bounded.observe(stats, "SELECT * FROM products", 0.01)
+
+    assert list(bounded.queries) == ["SELECT * FROM carts WHERE id = ?"]
+    assert bounded.queries["SELECT * FROM carts WHERE id = ?"]["sites"] == {
+        "routers/cart.py:10": 1, "routers/cart.py:20": 1, "other": 1,
+    }
+    # still counted against the request
+    assert stats.profile["SELECT * FROM products"][0] == 1
+
+
+def test_repeated_statements_fail_the_budget():
+    stats = RequestStats()
+    stats.queries = 6
+    stats.profile = {"SELECT * FROM products WHERE id = ?": [6, 0.01, "routers/cart.py:42"]}
+
+    with pytest.raises(pytest.fail.Exception, match=r"N\+1: 6 x"):
+        with QueryBudget("GET /api/cart", max_queries=10):
+            for observer in request_observers:
+                observer("GET", "/api/cart", stats)
+    assert "N+1: 6 x [SELECT * FROM products WHERE id = ?] from routers/cart.py:42" in query_profiler.violations(stats)
+
+
+def test_offenders_are_reported_to_admins(client, auth_headers, products, v1_admin_headers, query_budget, monkeypatch):
+    assert client.delete("/api/v1/admin/queries", headers=v1_admin_headers).status_code == status.HTTP_200_OK
+    fill_cart(client, auth_headers, products)
+    monkeypatch.setattr(query_profiler, "max_queries", 3)
+
+    client.post("/api/order", params=CHECKOUT, headers=auth_headers)
+
+    response = client.get("/api/v1/admin/queries", headers=v1_admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert data["routes"][0]["route"] == "POST /api/order"
+    assert data["routes"][0]["flagged"] == 1
+    assert data["recent"][-1]["reasons"] == ["7 queries, budget 3"]
+    sites = {site for query in data["queries"] for site in query["sites"]}
+    assert any(site.startswith("repositories/order.py:") for site in sites)
+    assert response.json()["meta"]["budget"]["queries"] == 3
+
+    assert client.get("/api/v1/admin/queries").status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,70 @@
+from fastapi import status
+
+
+def question_payload(text, sequence_number):
+    return {
+        "question_text": text,
+        "sequence_number": sequence_number,
+        "is_multiple": False,
+        "is_popup": False,
+        "step": 1,
+        "is_single": True,
+    }
+
+
+def test_questionnaire_cached_with_etag(client):
+    question = client.post("/api/v1/question/", json=question_payload("Любимый напиток?", 1)).json()["data"]
+    client.post("/api/v1/question/", json=question_payload("Как часто заходите?", 2))
+    for text in ("Капучино", "Латте"):
+        client.post("/api/v1/answer/", json={"question_id": question["id"], "answer_text": text})
+
+    response = client.get("/api/v1/question/")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()["data"]
+    assert [q["question_text"] for q in data] == ["Любимый напиток?", "Как часто заходите?"]
+    assert [a["answer_text"] for a in data[0]["answers"]] == ["Капучино", "Латте"]
+    assert data[1]["answers"] == []
+
+    etag = response.headers["etag"]
+    response = client.get("/api/v1/question/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # an answer write drops the cached questionnaire
+    client.post("/api/v1/answer/", json={"question_id": question["id"], "answer_text": "Раф"})
+    response = client.get("/api/v1/question/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["data"][0]["answers"]) == 3
+
+
+def test_questionnaire_batch_endpoints(client, v1_admin_headers):
+    items = [question_payload(f"Вопрос {i}", i) for i in range(3)]
+
+    response = client.post("/api/v1/question/batch", json={"items": items})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.post("/api/v1/question/batch", json={"items": items}, headers=v1_admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    questions = response.json()["data"]
+    assert [q["question_text"] for q in questions] == ["Вопрос 0", "Вопрос 1", "Вопрос 2"]
+
+    answers = [{"question_id": questions[0]["id"], "answer_text": text} for text in ("Да", "Нет")]
+    response = client.post("/api/v1/answer/batch", json={"items": answers}, headers=v1_admin_headers)
+    answer_ids = [a["id"] for a in response.json()["data"]]
+
+    response = client.post(
+        "/api/v1/answer/batch",
+        json={"items": [{"question_id": 999, "answer_text": "?"}]},
+        headers=v1_admin_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    client.patch(
+        "/api/v1/answer/batch",
+        json={"items": [{"id": answer_ids[1], "answer_text": "Иногда"}]},
+        headers=v1_admin_headers,
+    )
+    client.post("/api/v1/question/batch/delete", json={"ids": [questions[2]["id"]]}, headers=v1_admin_headers)
+
+    data = client.get("/api/v1/question/").json()["data"]
+    assert [q["question_text"] for q in data] == ["Вопрос 0", "Вопрос 1"]
+    assert [a["answer_text"] for a in data[0]["answers"]] == ["Да", "Иногда"]
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+from fastapi import status
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.db.routing import REPLICAS, ReplicaSet, RoutingSession
+from src.db.session import get_session, read_your_writes
+from src.main import app
+from src.models import Category, Order, Product
+from src.models.order import OrderStatus
+from tests.conftest import TEST_DB_PATH, async_engine
+
+
+def replica_engine(path):
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def replica(client, db_session, customer, admin, tmp_path):
+    """A second SQLite file standing in for a streaming replica, copied from the primary."""
+    category = Category(name="Coffee", slug="coffee")
+    db_session.add(category)
+    db_session.flush()
+    db_session.add_all([
+        Product(name="Espresso", price=150.0, category_id=category.id),
+        Order(user_id=customer.id, status=OrderStatus.PENDING, total_amount=150.0,
+              delivery_address="Main st. 1", phone_number="+70000000000"),
+    ])
+    db_session.commit()
+
+    path = os.path.join(tmp_path, "replica.db")
+    shutil.copy(TEST_DB_PATH, path)
+    replicas = ReplicaSet([replica_engine(path)])
+    session_factory = sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        info={REPLICAS: replicas},
+        expire_on_commit=False,
+    )
+
+    async def override_get_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    yield replicas
+    read_your_writes.writers.local.clear()
+
+
+def test_reads_are_served_by_replica(client, db_session, replica):
+    product = db_session.query(Product).one()
+    product.name = "Doppio"
+    db_session.commit()
+
+    # the replica hasn't caught up yet
+    assert client.get(f"/api/product/{product.id}").json()["name"] == "Espresso"
+    assert replica.stats()["reads"] == 1
+
+
+def test_writer_reads_own_writes(client, db_session, replica, auth_headers, admin_headers):
+    order = db_session.query(Order).one()
+
+    response = client.put(f"/api/order/{order.id}", params={"status": "confirmed"}, headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    # the admin wrote, so their reads stick to the primary for a while
+    response = client.get(f"/api/order/{order.id}", headers=admin_headers)
+    assert response.json()["status"] == "confirmed"
+
+    # other users keep reading from the lagging replica
+    response = client.get(f"/api/order/{order.id}", headers=auth_headers)
+    assert response.json()["status"] == "pending"
+
+
+def test_unhealthy_replica_falls_back_to_primary(client, db_session, replica, tmp_path):
+    broken = ReplicaSet([replica_engine(os.path.join(tmp_path, "missing", "replica.db"))])
+    asyncio.run(broken.check())
+    assert broken.pick() is None
+    assert broken.stats() == {"replicas": 1, "healthy": 0, "reads": 0, "fallbacks": 1}
+
+    replica.mark(replica.engines[0], False)
+    product = db_session.query(Product).one()
+    product.name = "Doppio"
+    db_session.commit()
+    assert client.get(f"/api/product/{product.id}").json()["name"] == "Doppio"
+
+    asyncio.run(replica.check())
+    assert client.get(f"/api/product/{product.id}").json()["name"] == "Espresso"
@@ -0,0 +1,61 @@
+from fastapi import status
+
+from src.models import Answer, Order, Question, SelectedAnswer, User
+from src.repositories.interests import GAME_THEMES_QUESTION, parse_answer_ids
+
+
+def test_parse_answer_ids():
+    assert parse_answer_ids("3, 5,7") == {3, 5, 7}
+    assert parse_answer_ids("12") == {12}
+    assert parse_answer_ids("dinosaurs") == set()
+    assert parse_answer_ids(None) == set()
+
+
+def test_users_with_interests(client, customer, db_session):
+    question = Question(question_text=GAME_THEMES_QUESTION, sequence_number=1, is_multiple=True,
+                        is_popup=False, step=1, is_single=False)
+    db_session.add(question)
+    db_session.flush()
+    space, animals, music = [Answer(question_id=question.id, answer_text=text)
+                             for text in ("Space", "Animals", "Music")]
+    db_session.add_all([space, animals, music])
+    other = User(username="other", email="other@example.com", hashed_password="x", is_active=True)
+    db_session.add(other)
+    db_session.flush()
+    db_session.add_all([
+        SelectedAnswer(user_id=customer.id, question_id=question.id, custom_answer=str(animals.id)),
+        SelectedAnswer(user_id=other.id, question_id=question.id, custom_answer=f"{music.id}, {space.id}"),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/v1/user/", params={"limit": 10})
+    assert response.status_code == status.HTTP_200_OK
+    users = {user["email"]: user for user in response.json()["data"]}
+    assert users["customer@example.com"]["interests"] == ["Animals"]
+    assert users["other@example.com"]["selected_interests"] == ["Space", "Music"]
+
+    response = client.get("/api/v1/user/", params={"include": "orders"})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/api/v1/user/", params={"include": "payments"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_sparse_fieldsets(client, customer, db_session):
+    db_session.add(Order(user_id=customer.id, total_amount=150.0))
+    db_session.commit()
+
+    response = client.get("/api/v1/user/", params={"fields": "id,email"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["data"] == [{"id": customer.id, "email": "customer@example.com"}]
+
+    response = client.get(f"/api/v1/user/{customer.id}", params={"fields": "email", "include": "orders"})
+    data = response.json()["data"]
+    assert set(data) == {"email", "orders"}
+    assert [order["total_amount"] for order in data["orders"]] == [150.0]
+
+    response = client.get(f"/api/v1/user/{customer.id}")
+    assert response.json()["data"]["interests"] == []
+    assert "orders" not in response.json()["data"]
+
+    assert client.get("/api/v1/user/", params={"fields": "hashed_password"}).status_code == 422
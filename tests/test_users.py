@@ -1,40 +1,38 @@
 import pytest
 from fastapi import status
 
-def test_register_user(client):
+from src.models import User
+
+REGISTRATION = {
+    "username": "testuser",
+    "email": "test@example.com",
+    "password": "testpassword",
+}
+
+
+def test_register_user(client, db_session):
+    # /register takes its fields as query parameters
+    response = client.post("/api/register", params=REGISTRATION)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"message": "User created successfully"}
+
+    user = db_session.query(User).filter_by(email="test@example.com").one()
+    assert user.username == "testuser"
+    assert user.hashed_password != "testpassword"
+
     response = client.post(
-        "/api/register",
-        json={
-            "email": "test@example.com",
-            "password": "testpassword",
-            "full_name": "Test User"
-        }
+        "/api/token", params={"username": "testuser", "password": "testpassword"}
     )
-    assert response.status_code == status.HTTP_201_CREATED
-    data = response.json()
-    assert data["email"] == "test@example.com"
-    assert data["full_name"] == "Test User"
-    assert "id" in data
-    assert "password" not in data
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["token_type"] == "bearer"
 
 def test_register_user_duplicate_email(client):
     # Сначала регистрируем пользователя
-    client.post(
-        "/api/register",
-        json={
-            "email": "test@example.com",
-            "password": "testpassword",
-            "full_name": "Test User"
-        }
-    )
-    
+    client.post("/api/register", params=REGISTRATION)
+
     # Пытаемся зарегистрировать пользователя с тем же email
     response = client.post(
-        "/api/register",
-        json={
-            "email": "test@example.com",
-            "password": "testpassword",
-            "full_name": "Test User"
-        }
+        "/api/register", params={**REGISTRATION, "username": "otheruser"}
     )
-    assert response.status_code == status.HTTP_400_BAD_REQUEST 
\ No newline at end of file
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Email already registered"